@@ -0,0 +1,64 @@
+import os
+import time
+
+import pandas as pd
+
+from data_loader import get_team_roster
+from optimizer import SquadModel
+
+DEFAULT_ALTERNATIVES = int(os.getenv("TACTIQ_ALTERNATIVES", 5))
+
+
+def k_best_squads(data, team_id, num_defenders, num_midfielders, num_forwards, k=DEFAULT_ALTERNATIVES,
+                  max_training_time=None, max_cost=None, settings=None):
+    """The k best distinct squads (different sets of players) for a team and formation.
+
+    One SquadModel is built; after each solve a no-good cut excludes the squad
+    just found and the same model is solved again, so the k squads come out in
+    objective order without k rebuilds. Fewer than k are returned when the
+    roster runs out of feasible squads.
+
+    `settings` are passed to the solver (see optimizer.solver_settings()).
+
+    Returns ([(selected_df, status, objective_value), ...] best first, total seconds).
+    """
+    roster = get_team_roster(data, team_id)
+    if roster is None:
+        raise ValueError("No players found for the selected Team ID")
+
+    start = time.perf_counter()
+    model = SquadModel(roster, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+    squads = []
+    for _ in range(k):
+        status = model.solve(settings)
+        if not model.has_solution:
+            break
+        assignment = model.assignment()
+        squads.append((model.selected_players(), status, float(model.objective_value())))
+        model.exclude_squad([i for i, _ in assignment])
+    if not squads:
+        raise ValueError("No feasible squad for this formation and budget")
+    return squads, time.perf_counter() - start
+
+
+def alternatives_table(squads):
+    """Ranked table of squads: objective gap to the best and the players swapped in and out"""
+    best_df, _, best_objective = squads[0]
+    best_players = set(best_df['player_name'])
+    rows = []
+    for rank, (selected_df, status, objective_value) in enumerate(squads, start=1):
+        players = set(selected_df['player_name'])
+        gap = best_objective - objective_value
+        rows.append({
+            'rank': rank,
+            'objective_value': objective_value,
+            'gap': gap,
+            'gap_pct': 100 * gap / abs(best_objective) if best_objective else 0.0,
+            'total_rating': float(selected_df['overall_rating'].sum()),
+            'total_training_time': float(selected_df['training_time'].sum()),
+            'total_cost': float(selected_df['cost'].sum()),
+            'players_in': ', '.join(sorted(players - best_players)),
+            'players_out': ', '.join(sorted(best_players - players)),
+            'status': status,
+        })
+    return pd.DataFrame(rows)
@@ -1,36 +1,65 @@
 import dash
-from dash import dcc, html, dash_table, Input, Output, State
+from dash import dcc, html, dash_table, Input, Output, State, Patch
+from flask import Response, jsonify
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
 import pandas as pd
-import pulp
-from google import genai
-from google.genai import types
 import math
 import markdown
 import os
+import time
 from dotenv import load_dotenv
 
-# Load environment variables from .env
+# Load environment variables from .env (before the modules below read their settings)
 load_dotenv()
 
+from data_loader import PLAYER_DATA_PATH, LivePlayerData
+from optimizer import (run_optimization, SOLUTION_CACHE, DEFAULT_SOLVER_SETTINGS, SquadModelPool, available_solvers,
+                       solver_settings)
+from model_server import start_model_server
+from formation_sweep import sweep_formations
+from frontier import compute_frontier, create_frontier_figure
+from alternatives import DEFAULT_ALTERNATIVES, alternatives_table, k_best_squads
+from sensitivity import player_importance
+from pitch import create_vertical_pitch
+from jobs import create_job_manager, ignore_progress, lower_job_priority
+from session_store import create_session_store, is_session_key, new_session_key
+from prompt_context import PROMPT_CONTEXT
+from assistant import GEMINI_MODEL, stream_reply, STREAM_METRICS
+from llm_client import create_assistant_client
+from response_cache import context_hash, create_response_cache
+from chat_log import ChatLog
+from instrumentation import STAGE_METRICS, annotate, mark_error, record_stage, stage, traced
+
 # Initialize Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "TACTIQ"
+server = app.server
 
-# Configure Gemini API (safely from .env)
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY)
+# Gemini client (created on first use, key read from .env); falls back to the local stub without a key
+client = create_assistant_client()
 
-# Load player data
-PLAYER_DATA_PATH = "Database.xlsx"
+# Load player data; the workbook is polled and reloaded in the background when it changes.
+# Callbacks read TEAM_DATA.index once and use that snapshot for the whole request.
+TEAM_DATA = LivePlayerData(PLAYER_DATA_PATH)
 print("Loading player data...")
 try:
-    PLAYER_DATA = pd.read_excel(PLAYER_DATA_PATH)
-    print(f"✓ Loaded {len(PLAYER_DATA)} players from {PLAYER_DATA_PATH}")
+    _load_start = time.perf_counter()
+    TEAM_DATA.load()
+    print(f"✓ Loaded {len(TEAM_DATA.index.df)} players from {PLAYER_DATA_PATH} in {time.perf_counter() - _load_start:.2f}s")
+    print(f"✓ Indexed {len(TEAM_DATA.index)} teams")
 except Exception as e:
     print(f"✗ Error loading player data: {e}")
-    PLAYER_DATA = None
+TEAM_DATA.start()
+
+
+# Background job queue for long-running callbacks (None = run synchronously). Results
+# are never reused for a repeated request: Build Squad and chat both write the session
+JOB_MANAGER = create_job_manager()
+# Squad and roster context for the chat stay server-side; the browser only holds the session key
+SESSION_STORE = create_session_store()
+# Each browser session's squad model, re-solved in place when only the formation or budgets
+# change. Background jobs exit after one click, so they reach it in a long-lived solver process
+MODEL_POOL = start_model_server() if JOB_MANAGER is not None else SquadModelPool()
 
 # Custom CSS
 app.index_string = '''
@@ -263,6 +292,13 @@ app.index_string = '''
 </html>
 '''
 
+def ready_placeholder():
+    return html.Div([
+        html.Div([
+            html.H3("Ready to Build Your Squad", style={'color': '#2c3e50', 'fontWeight': '700', 'textAlign': 'center', 'marginTop': '100px'})
+        ])
+    ])
+
 # App layout
 app.layout = html.Div([
     # Sidebar
@@ -316,10 +352,40 @@ app.layout = html.Div([
                         dbc.Input(id='max-cost', type='number', min=0, placeholder='Leave empty for no limit', className='input-modern')
                     ]),
                     html.Small("Total budget for all players", style={'fontSize': '11px', 'color': '#7f8c8d', 'marginTop': '4px', 'display': 'block'})
+                ], style={'marginBottom': '20px'}),
+                
+                # Advanced solver settings
+                html.Details([
+                    html.Summary("Advanced solver settings", style={'fontSize': '13px', 'color': '#2c3e50', 'fontWeight': '600', 'cursor': 'pointer', 'marginBottom': '10px'}),
+                    html.Label("Solver", style={'fontSize': '12px', 'color': '#2c3e50', 'fontWeight': '600', 'marginBottom': '4px', 'display': 'block'}),
+                    dcc.Dropdown(id='solver-backend', options=available_solvers(), value=DEFAULT_SOLVER_SETTINGS['backend'],
+                                 clearable=False, style={'fontSize': '13px', 'marginBottom': '10px'}),
+                    html.Label("Time Limit (seconds)", style={'fontSize': '12px', 'color': '#2c3e50', 'fontWeight': '600', 'marginBottom': '4px', 'display': 'block'}),
+                    dbc.Input(id='solver-time-limit', type='number', min=0, value=DEFAULT_SOLVER_SETTINGS['time_limit'],
+                              placeholder='No limit', className='input-modern', style={'marginBottom': '10px'}),
+                    html.Label("MIP Gap (%)", style={'fontSize': '12px', 'color': '#2c3e50', 'fontWeight': '600', 'marginBottom': '4px', 'display': 'block'}),
+                    dbc.Input(id='solver-gap', type='number', min=0, step=0.1,
+                              value=DEFAULT_SOLVER_SETTINGS['gap_rel'] * 100 if DEFAULT_SOLVER_SETTINGS['gap_rel'] is not None else None,
+                              placeholder='Solve to optimality', className='input-modern', style={'marginBottom': '10px'}),
+                    html.Label("Threads", style={'fontSize': '12px', 'color': '#2c3e50', 'fontWeight': '600', 'marginBottom': '4px', 'display': 'block'}),
+                    dbc.Input(id='solver-threads', type='number', min=1, step=1, value=DEFAULT_SOLVER_SETTINGS['threads'],
+                              placeholder='Solver default', className='input-modern'),
+                    html.Small("Large rosters: a time limit or gap returns the best squad found so far", style={'fontSize': '11px', 'color': '#7f8c8d', 'marginTop': '4px', 'display': 'block'})
                 ], style={'marginBottom': '24px'}),
                 
                 html.Button("Build Squad", id='optimize-btn', className='btn-primary-modern', 
-                           style={'width': '100%', 'fontSize': '15px'})
+                           style={'width': '100%', 'fontSize': '15px'}),
+                html.Div(id='optimize-progress', style={'fontSize': '12px', 'color': '#7f8c8d', 'textAlign': 'center', 'marginTop': '6px'}),
+                html.Button("Cancel", id='cancel-optimize-btn', className='btn-primary-modern',
+                           style={'display': 'none'}),
+                html.Button("Compare Formations", id='sweep-btn', className='btn-primary-modern',
+                           style={'width': '100%', 'fontSize': '13px', 'marginTop': '8px', 'background': 'white', 'color': '#2c3e50'}),
+                html.Button("Trade-off Frontier", id='frontier-btn', className='btn-primary-modern',
+                           style={'width': '100%', 'fontSize': '13px', 'marginTop': '8px', 'background': 'white', 'color': '#2c3e50'}),
+                html.Button("Alternative Squads", id='alternatives-btn', className='btn-primary-modern',
+                           style={'width': '100%', 'fontSize': '13px', 'marginTop': '8px', 'background': 'white', 'color': '#2c3e50'}),
+                html.Button("Player Importance", id='importance-btn', className='btn-primary-modern',
+                           style={'width': '100%', 'fontSize': '13px', 'marginTop': '8px', 'background': 'white', 'color': '#2c3e50'})
             ], style={'marginBottom': '24px'}),
             
             # Stats Cards
@@ -333,424 +399,183 @@ app.layout = html.Div([
     
     # Main Content
     html.Div([
-        html.Div(id='results-container')
+        html.Div(ready_placeholder(), id='results-container'),
+        dcc.Loading(html.Div(id='sweep-container'), type='circle'),
+        dcc.Loading(html.Div(id='frontier-container'), type='circle'),
+        dcc.Loading(html.Div(id='alternatives-container'), type='circle'),
+        dcc.Loading(html.Div(id='importance-container'), type='circle')
     ], className='main-content'),
     
     # Store for chat history and team data
-    dcc.Store(id='chat-history', data=[]),
-    dcc.Store(id='selected-team-data', data=None),
-    dcc.Store(id='all-team-players-data', data=None)
+    dcc.Store(id='chat-id', data=None),
+    dcc.Store(id='session-key', data=None),
+    dcc.Store(id='chat-request', data=None)
 ])
 
-def run_optimization(df, team_id, num_defenders, num_midfielders, num_forwards, max_training_time=None, max_cost=None):
-    """Run the optimization algorithm with optional training time and cost constraints"""
-    num_goalkeepers = 1
-    alpha = 1.0
-    beta = 0.1
-    
-    team_df = df[df["team_id"] == team_id].reset_index(drop=True)
-    if team_df.empty:
-        return None, "No players found for the selected Team ID"
-    
-    if not any(team_df["final_position"].str.contains("Goalkeeper", case=False, na=False)):
-        return None, f"Team {team_id} has no eligible Goalkeeper!"
-    
-    # Check if budget constraint is feasible
-    if max_cost is not None and max_cost > 0:
-        total_players_needed = num_defenders + num_midfielders + num_forwards + num_goalkeepers
-        # Find the cheapest possible team
-        cheapest_11 = team_df.nsmallest(total_players_needed, 'Cost')['Cost'].sum()
-        if cheapest_11 > max_cost:
-            return None, f"Insufficient budget! Minimum cost for 11 players is ${cheapest_11:,.0f}, but your budget is ${max_cost:,.0f}"
-    
-    position_map = {
-        "Forward": ["Forward"],
-        "Midfielder": ["Mid"],
-        "Defender": ["Defender"],
-        "Goalkeeper": ["Goalkeeper"],
-        "Forward-Mid All-rounder": ["Forward", "Mid"],
-        "Mid-Back All-rounder": ["Mid", "Defender"],
-        "All All-rounder": ["Forward", "Mid", "Defender"]
-    }
-    
-    players = team_df.index.tolist()
-    roles = ["Defender", "Mid", "Forward", "Goalkeeper"]
-    
-    x = pulp.LpVariable.dicts("player", players, cat='Binary')
-    y = {role: pulp.LpVariable.dicts(role, players, cat='Binary') for role in roles}
-    
-    prob = pulp.LpProblem("Team_Selection", pulp.LpMaximize)
-    
-    prob += pulp.lpSum([
-        alpha * team_df.loc[i, "overall_rating"] * x[i] -
-        beta * team_df.loc[i, "training_time"] * x[i] for i in players
-    ])
-    
-    for role in roles:
-        for i in players:
-            if role in position_map.get(team_df.loc[i, "final_position"], []):
-                prob += y[role][i] <= x[i]
-            else:
-                prob += y[role][i] == 0
-    
-    for i in players:
-        prob += pulp.lpSum([y[role][i] for role in roles]) == x[i]
-    
-    prob += pulp.lpSum([y["Defender"][i] for i in players]) == num_defenders
-    prob += pulp.lpSum([y["Mid"][i] for i in players]) == num_midfielders
-    prob += pulp.lpSum([y["Forward"][i] for i in players]) == num_forwards
-    prob += pulp.lpSum([y["Goalkeeper"][i] for i in players]) == num_goalkeepers
-    prob += pulp.lpSum([x[i] for i in players]) == num_defenders + num_midfielders + num_forwards + num_goalkeepers
-    
-    # Add training time constraint if specified
-    if max_training_time is not None and max_training_time > 0:
-        prob += pulp.lpSum([team_df.loc[i, "training_time"] * x[i] for i in players]) <= max_training_time
-    
-    # Add cost constraint if specified
-    if max_cost is not None and max_cost > 0:
-        prob += pulp.lpSum([team_df.loc[i, "Cost"] * x[i] for i in players]) <= max_cost
-    
-    mid_all_rounders = [i for i in players if "Mid" in position_map.get(team_df.loc[i, "final_position"], []) and "Defender" in position_map.get(team_df.loc[i, "final_position"], [])]
-    def_all_rounders = [i for i in players if "Defender" in position_map.get(team_df.loc[i, "final_position"], []) and "Mid" in position_map.get(team_df.loc[i, "final_position"], [])]
-    
-    if len(mid_all_rounders) >= 1:
-        prob += pulp.lpSum([x[i] for i in mid_all_rounders]) >= 1
-    if len(mid_all_rounders) >= 2:
-        prob += pulp.lpSum([x[i] for i in mid_all_rounders]) >= 2
-    if len(def_all_rounders) >= 1:
-        prob += pulp.lpSum([x[i] for i in def_all_rounders]) >= 1
-    if len(def_all_rounders) >= 2:
-        prob += pulp.lpSum([x[i] for i in def_all_rounders]) >= 2
-    
-    prob.solve(pulp.PULP_CBC_CMD(msg=0))
-    
-    # Check if solution is infeasible
-    if pulp.LpStatus[prob.status] == 'Infeasible':
-        if max_cost is not None and max_cost > 0:
-            return None, f"Cannot build a team with the given budget of ${max_cost:,.0f} and formation constraints. Try increasing the budget or adjusting the formation."
-        else:
-            return None, "Optimization failed. The formation constraints cannot be satisfied with the available players."
-    
-    selected_data = []
-    for i in players:
-        if pulp.value(x[i]) == 1:
-            assigned_role = None
-            for role in roles:
-                if pulp.value(y[role][i]) == 1:
-                    assigned_role = role
-                    break
-            
-            selected_data.append({
-                'player_name': team_df.loc[i, 'player_name'],
-                'team_name': team_df.loc[i, 'team_name'] if 'team_name' in team_df.columns else 'N/A',
-                'final_position': team_df.loc[i, 'final_position'],
-                'assigned_role': assigned_role,
-                'overall_rating': team_df.loc[i, 'overall_rating'],
-                'training_time': team_df.loc[i, 'training_time'],
-                'cost': team_df.loc[i, 'Cost']
-            })
-    
-    selected_df = pd.DataFrame(selected_data)
-    status = pulp.LpStatus[prob.status]
-    objective_value = pulp.value(prob.objective)
-    
-    return selected_df, status, objective_value
-
-def create_vertical_pitch(selected_df):
-    """Create vertical football pitch with player positions"""
-    fig = go.Figure()
-    
-    # Vertical pitch dimensions
-    pitch_width = 60
-    pitch_height = 90
-    
-    # Draw pitch background
-    fig.add_shape(type="rect", x0=0, y0=0, x1=pitch_width, y1=pitch_height,
-                  fillcolor="#1a7f3e", line=dict(color="white", width=3))
-    
-    # Halfway line
-    fig.add_shape(type="line", x0=0, y0=pitch_height/2, x1=pitch_width, y1=pitch_height/2,
-                  line=dict(color="white", width=2))
-    
-    # Center circle
-    fig.add_shape(type="circle", 
-                  x0=pitch_width/2-8, y0=pitch_height/2-8,
-                  x1=pitch_width/2+8, y1=pitch_height/2+8,
-                  line=dict(color="white", width=2), fillcolor="rgba(0,0,0,0)")
-    
-    # Center spot
-    fig.add_shape(type="circle", 
-                  x0=pitch_width/2-0.7, y0=pitch_height/2-0.7,
-                  x1=pitch_width/2+0.7, y1=pitch_height/2+0.7,
-                  fillcolor="white", line=dict(color="white", width=0))
-    
-    # Bottom penalty area (our goal)
-    fig.add_shape(type="rect", x0=12, y0=0, x1=pitch_width-12, y1=14,
-                  line=dict(color="white", width=2), fillcolor="rgba(0,0,0,0)")
-    
-    # Top penalty area (opponent goal)
-    fig.add_shape(type="rect", x0=12, y0=pitch_height-14, x1=pitch_width-12, y1=pitch_height,
-                  line=dict(color="white", width=2), fillcolor="rgba(0,0,0,0)")
-    
-    # Bottom goal area (6-yard box)
-    fig.add_shape(type="rect", x0=21, y0=0, x1=pitch_width-21, y1=5,
-                  line=dict(color="white", width=2), fillcolor="rgba(0,0,0,0)")
-    
-    # Top goal area (6-yard box)
-    fig.add_shape(type="rect", x0=21, y0=pitch_height-5, x1=pitch_width-21, y1=pitch_height,
-                  line=dict(color="white", width=2), fillcolor="rgba(0,0,0,0)")
-    
-    # Penalty spots
-    fig.add_shape(type="circle", x0=pitch_width/2-0.7, y0=10-0.7,
-                  x1=pitch_width/2+0.7, y1=10+0.7,
-                  fillcolor="white", line=dict(color="white", width=0))
-    fig.add_shape(type="circle", x0=pitch_width/2-0.7, y0=pitch_height-10-0.7,
-                  x1=pitch_width/2+0.7, y1=pitch_height-10+0.7,
-                  fillcolor="white", line=dict(color="white", width=0))
-    
-    # Plot players if data available
-    if selected_df is not None and len(selected_df) > 0:
-        positions = {
-            'Goalkeeper': [],
-            'Defender': [],
-            'Mid': [],
-            'Forward': []
-        }
-        
-        for idx, player in selected_df.iterrows():
-            role = player['assigned_role'] if 'assigned_role' in player else None
-            name = player['player_name'] if 'player_name' in player else f"Player {idx}"
-            
-            if role in positions:
-                positions[role].append(name)
-        
-        all_x = []
-        all_y = []
-        all_names = []
-        
-        # Goalkeeper (bottom - defending)
-        for i, player_name in enumerate(positions['Goalkeeper']):
-            all_x.append(pitch_width / 2)
-            all_y.append(8)
-            all_names.append(player_name)
-        
-        # Defenders (bottom third)
-        num_def = len(positions['Defender'])
-        if num_def > 0:
-            spacing = pitch_width / (num_def + 1)
-            for i, player_name in enumerate(positions['Defender']):
-                x = spacing * (i + 1)
-                all_x.append(x)
-                all_y.append(22)
-                all_names.append(player_name)
-        
-        # Midfielders (middle third)
-        num_mid = len(positions['Mid'])
-        if num_mid > 0:
-            spacing = pitch_width / (num_mid + 1)
-            for i, player_name in enumerate(positions['Mid']):
-                x = spacing * (i + 1)
-                all_x.append(x)
-                all_y.append(45)
-                all_names.append(player_name)
-        
-        # Forwards (top third - attacking)
-        num_fwd = len(positions['Forward'])
-        if num_fwd > 0:
-            spacing = pitch_width / (num_fwd + 1)
-            for i, player_name in enumerate(positions['Forward']):
-                x = spacing * (i + 1)
-                all_x.append(x)
-                all_y.append(68)
-                all_names.append(player_name)
-        
-        # Add player icons as SVG stick figures
-        for i in range(len(all_x)):
-            x, y = all_x[i], all_y[i]
-            
-            # Head
-            fig.add_shape(
-                type="circle",
-                x0=x-0.8, y0=y+1.5,
-                x1=x+0.8, y1=y+3.1,
-                fillcolor='#1e293b',
-                line=dict(color='#1e293b', width=1),
-                layer='above'
-            )
-            
-            # Body
-            fig.add_shape(
-                type="line",
-                x0=x, y0=y+1.5,
-                x1=x, y1=y-1.5,
-                line=dict(color='#1e293b', width=2.5),
-                layer='above'
-            )
-            
-            # Arms
-            fig.add_shape(
-                type="line",
-                x0=x-1.5, y0=y+0.5,
-                x1=x+1.5, y1=y+0.5,
-                line=dict(color='#1e293b', width=2.5),
-                layer='above'
-            )
-        
-        # Add player names
-        if len(all_x) > 0:
-            fig.add_trace(go.Scatter(
-                x=all_x,
-                y=[y - 3 for y in all_y],
-                mode='text',
-                text=all_names,
-                textfont=dict(
-                    size=7,
-                    color='white',
-                    family='Arial Black'
-                ),
-                showlegend=False,
-                hoverinfo='text',
-                hovertext=all_names
-            ))
-    
-    # Update layout
-    fig.update_layout(
-        xaxis=dict(range=[-2, pitch_width+2], showgrid=False, zeroline=False, visible=False),
-        yaxis=dict(range=[-2, pitch_height+2], showgrid=False, zeroline=False, visible=False),
-        plot_bgcolor='#1a7f3e',
-        paper_bgcolor='white',
-        margin=dict(l=20, r=20, t=20, b=20),
-        height=900,
-        shapes=[shape for shape in fig.layout.shapes]
-    )
-    
-    fig.update_xaxes(fixedrange=True)
-    fig.update_yaxes(fixedrange=True, scaleanchor="x", scaleratio=1)
-    
-    for trace in fig.data:
-        trace.update(visible=True)
-    
-    return fig
-
-def get_football_assistant_response(user_message, chat_history, team_data=None, all_team_players=None):
-    """Get response from Gemini with football-specific guardrails, team context, and Google Search"""
-    
-    system_prompt = """You are a professional football coach assistant with deep knowledge of tactics, formations, player performance, and team strategies. 
-
-STRICT RULES:
-1. ONLY answer questions related to football/soccer (tactics, formations, players, teams, training, strategies, match analysis)
-2. If asked about non-football topics, politely redirect: "I'm specialized in football coaching and tactics. Please ask me about formations, players, team strategies, or match analysis."
-3. Keep responses concise (2-3 paragraphs maximum)
-4. Be professional and insightful
-5. Base advice on established football principles
-6. You have access to Google Search - use it when you need current information about players, teams, tactics, or recent matches
-7. You can talk in all language. If you are instructed to talk or explain in any particular language you should be able to answer it in that language ONLY. 
-You can discuss:
-- Team formations and tactics
-- Player positioning and roles
-- Match strategies and analysis
-- Training methods
-- Player synergy and chemistry
-- Historical team performance
-- Tactical adjustments
-"""
-
-    # Add ALL team players context
-    if all_team_players is not None and len(all_team_players) > 0:
-        system_prompt += f"""
-
-COMPLETE TEAM ROSTER (All {len(all_team_players)} available players):
-"""
-        for player in all_team_players:
-            cost_value = player.get('Cost', 'N/A')
-            system_prompt += f"- {player['player_name']} ({player['team_name']}) - Position: {player['final_position']} | Rating: {player['overall_rating']}, Training: {player['training_time']} hours, Cost: ${cost_value}\n"
-        
-        system_prompt += "\n"
-
-    # Add optimized team context
-    if team_data:
-        system_prompt += f"""
-CURRENTLY SELECTED 11 PLAYERS (Optimized Squad):
-Formation: {team_data['formation']} (1 Goalkeeper - {team_data['formation']})
-Total Players: {team_data['total_players']}
-Total Team Rating: {team_data['total_rating']:.1f}
-Total Training Time: {team_data['total_training_time']:.1f} hours
-Total Cost: ${team_data['total_cost']:,.0f}
-"""
-        if team_data.get('max_training_time'):
-            system_prompt += f"Max Training Time Constraint: {team_data['max_training_time']} hours\n"
-        if team_data.get('max_cost'):
-            system_prompt += f"Max Cost Budget: ${team_data['max_cost']:,.0f}\n"
-        
-        system_prompt += f"""Optimization Status: {team_data['status']}
-Objective Value: {team_data['objective_value']:.2f}
-
-Selected Players:
-"""
-        for player in team_data['players']:
-            system_prompt += f"- {player['player_name']} ({player['team_name']}) - {player['assigned_role']} | Rating: {player['overall_rating']}, Training: {player['training_time']} hours, Cost: ${player['cost']}\n"
-        
-        system_prompt += """
-When discussing the team, you can refer to both the selected 11 players AND the complete roster. Provide tactical insights, suggest alternatives from the bench, analyze strengths and weaknesses.
-"""
-    
-    system_prompt += "\nCurrent conversation context:"
-    
+def build_conversation(user_message, recent_messages, system_prompt):
+    """System prompt with team context, the recent messages (ChatLog.window) and the new question"""
     # Build conversation history
     conversation = system_prompt + "\n\n"
-    for msg in chat_history[-6:]:
+    for msg in recent_messages:
         conversation += f"{msg['role']}: {msg['content']}\n"
     conversation += f"User: {user_message}\nAssistant:"
-    
-    try:
-        # Enable Google Search
-        response = client.models.generate_content(
-            model='gemini-2.0-flash-exp',
-            contents=conversation,
-            config=types.GenerateContentConfig(
-                tools=[types.Tool(google_search=types.GoogleSearch())],
-                response_modalities=["TEXT"]
-            )
-        )
-        return response.text
-    except Exception as e:
-        return f"I apologize, but I encountered an error. Please try rephrasing your question. Error: {str(e)}"
+    return conversation
+
+def stream_football_assistant_response(user_message, recent_messages, system_prompt):
+    """Stream Gemini's answer (football guardrails, team context, Google Search) as text chunks"""
+    with stage("prompt"):
+        conversation = build_conversation(user_message, recent_messages, system_prompt)
+    start = time.perf_counter()
+    with stage("llm"):
+        for i, chunk in enumerate(stream_reply(client, conversation)):
+            if i == 0:
+                record_stage("llm_first_token", time.perf_counter() - start)
+            yield chunk
+
+@server.route("/api/player-data")
+def player_data_stats():
+    """Version, fingerprint and reload history of the player data"""
+    return jsonify(TEAM_DATA.stats())
+
+@server.route("/api/solution-cache")
+def solution_cache_stats():
+    """Hit/miss counters of the optimization result cache"""
+    return jsonify(SOLUTION_CACHE.stats())
+
+@server.route("/api/assistant-metrics")
+def assistant_metrics():
+    """Time to first token and total time of recent AI coach replies"""
+    return jsonify({**STREAM_METRICS.summary(), 'client': client.stats()})
+
+@server.route("/api/response-cache")
+def response_cache_stats():
+    """Size and hit/miss counters of the quick-prompt response cache"""
+    return jsonify(RESPONSE_CACHE.stats() if RESPONSE_CACHE is not None else {'enabled': False})
+
+@server.route("/api/sessions")
+def session_stats():
+    """Backend, size and hit/miss counters of the server-side session store"""
+    return jsonify(SESSION_STORE.stats())
+
+@server.route("/metrics")
+def prometheus_metrics():
+    """Request and stage latency histograms and error counts in Prometheus text format"""
+    return Response(STAGE_METRICS.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@server.route("/api/prompt-context/<session_key>")
+def prompt_context_sizes(session_key):
+    """Character and estimated token size of each system-prompt block for a session"""
+    session = SESSION_STORE.get(session_key)
+    if session is None:
+        return jsonify({'error': 'unknown or expired session'}), 404
+    context = session_prompt(session)
+    return jsonify({'chars': context.chars, 'tokens': context.tokens, 'blocks': context.sizes(),
+                    'cache': PROMPT_CONTEXT.stats()})
+
+def save_session(team_id, team_data, all_team_players, session_key=None, data_version=None):
+    """Store the chat context of an optimization and return its session key (kept across clicks)"""
+    if team_data is None and all_team_players is None:
+        return None
+    session_key = session_key or new_session_key()
+    store_session(session_key, {'team_id': team_id, 'data_version': data_version,
+                                'team_data': team_data, 'all_team_players': all_team_players})
+    return session_key
+
+def store_session(session_key, session):
+    """Save a chat context with its system prompt rendered once, for the chat jobs to read back"""
+    # Chat replies run in forked jobs, so PROMPT_CONTEXT's memo would not outlive a message
+    session['prompt_context'] = PROMPT_CONTEXT.build(session.get('team_data'), session.get('all_team_players'),
+                                                     session.get('team_id'), session.get('data_version'))
+    SESSION_STORE.set(session_key, session)
+
+def session_prompt(session):
+    """The session's rendered system prompt (rendered now for sessions saved without one)"""
+    context = session.get('prompt_context')
+    if context is None:
+        context = PROMPT_CONTEXT.build(session.get('team_data'), session.get('all_team_players'),
+                                       session.get('team_id'), session.get('data_version'))
+    return context
+
+def settings_from_inputs(backend, time_limit, gap_percent, threads):
+    """Solver settings from the advanced panel (gap is entered as a percentage)"""
+    gap_rel = gap_percent / 100 if gap_percent not in (None, "") else None
+    return solver_settings(backend, time_limit, gap_rel, threads)
 
 # Callbacks
-@app.callback(
+SOLVER_STATES = [State('solver-backend', 'value'),
+                 State('solver-time-limit', 'value'),
+                 State('solver-gap', 'value'),
+                 State('solver-threads', 'value')]
+
+OPTIMIZE_DEPENDENCIES = [
     [Output('results-container', 'children'),
      Output('stats-container', 'children'),
      Output('optimality-container', 'children'),
-     Output('selected-team-data', 'data'),
-     Output('all-team-players-data', 'data')],
+     Output('session-key', 'data')],
     Input('optimize-btn', 'n_clicks'),
     [State('team-id', 'value'),
      State('num-defenders', 'value'),
      State('num-midfielders', 'value'),
      State('num-forwards', 'value'),
      State('max-training-time', 'value'),
-     State('max-cost', 'value')]
-)
-def optimize_team(n_clicks, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost):
+     State('max-cost', 'value'),
+     *SOLVER_STATES,
+     State('session-key', 'data')]
+]
+
+if JOB_MANAGER is not None:
+    # Solve in a separate background process so the web worker stays free
+    optimize_callback = app.callback(
+        *OPTIMIZE_DEPENDENCIES,
+        background=True,
+        manager=JOB_MANAGER,
+        progress=Output('optimize-progress', 'children'),
+        progress_default="",
+        running=[
+            (Output('optimize-btn', 'disabled'), True, False),
+            (Output('cancel-optimize-btn', 'style'),
+             {'width': '100%', 'fontSize': '13px', 'marginTop': '8px', 'background': 'white', 'color': '#e74c3c'},
+             {'display': 'none'}),
+        ],
+        cancel=[Input('cancel-optimize-btn', 'n_clicks')],
+        prevent_initial_call=True
+    )
+else:
+    def optimize_callback(func):
+        app.callback(*OPTIMIZE_DEPENDENCIES, prevent_initial_call=True)(
+            lambda *args: func(ignore_progress, *args))
+        return func
+
+@optimize_callback
+@traced("optimize")
+def optimize_team(set_progress, n_clicks, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                  solver_backend=None, solver_time_limit=None, solver_gap=None, solver_threads=None, session_key=None):
     stats_display = html.Div()
     optimality_display = html.Div()
     team_data = None
     all_team_players_data = None
+    team_index = TEAM_DATA.index
     
-    if n_clicks is None or PLAYER_DATA is None:
-        return html.Div([
-            html.Div([
-                html.H3("Ready to Build Your Squad", style={'color': '#2c3e50', 'fontWeight': '700', 'textAlign': 'center', 'marginTop': '100px'})
-            ])
-        ]), stats_display, optimality_display, team_data, all_team_players_data
+    if n_clicks is None or team_index is None:
+        return ready_placeholder(), stats_display, optimality_display, None
     
+    if JOB_MANAGER is not None:
+        lower_job_priority()
+    annotate(team_id=team_id, formation=f"{num_defenders}-{num_midfielders}-{num_forwards}",
+             max_training_time=max_training_time, max_cost=max_cost)
+    
+    session_key = session_key or new_session_key()
     try:
+        set_progress(f"Solving squad for team {team_id}...")
         # Get ALL players from the selected team - rename Cost to cost for consistency
-        team_df = PLAYER_DATA[PLAYER_DATA["team_id"] == team_id].copy()
-        team_df['cost'] = team_df['Cost']  # Create lowercase version
-        all_team_players_data = team_df[['player_name', 'team_name', 'final_position', 'overall_rating', 'training_time', 'cost']].to_dict('records')
+        with stage("roster_records"):
+            roster = team_index.get(team_id)
+            if roster is not None:
+                all_team_players_data = roster.df[['player_name', 'team_name', 'final_position', 'overall_rating', 'training_time', 'Cost']].rename(columns={'Cost': 'cost'}).to_dict('records')
         
-        result = run_optimization(PLAYER_DATA, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+        settings = settings_from_inputs(solver_backend, solver_time_limit, solver_gap, solver_threads)
+        result = run_optimization(team_index, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                                  settings=settings, pool=MODEL_POOL, session=session_key)
         
         if result[0] is None:
             error_msg = result[1] if len(result) > 1 else "Optimization Failed"
@@ -758,9 +583,13 @@ def optimize_team(n_clicks, team_id, num_defenders, num_midfielders, num_forward
                 html.H3(error_msg, style={'color': '#e74c3c', 'textAlign': 'center', 'marginBottom': '16px'}),
                 html.P("Try adjusting the formation, increasing the budget, or removing constraints.", 
                        style={'textAlign': 'center', 'color': '#7f8c8d'})
-            ]), stats_display, optimality_display, team_data, all_team_players_data
+            ]), stats_display, optimality_display, save_session(
+                team_id, team_data, all_team_players_data, session_key, team_index.fingerprint)
         
         selected_df, status, objective_value = result
+        set_progress("Drawing formation...")
+        with stage("figure"):
+            pitch_figure = create_vertical_pitch(selected_df)
         
         # Prepare team data for LLM
         team_data = {
@@ -875,7 +704,10 @@ def optimize_team(n_clicks, team_id, num_defenders, num_midfielders, num_forward
                         ], style={'marginBottom': '12px'}),
                         
                         html.Div([
-                            html.Div(id='chat-messages', className='chat-messages'),
+                            html.Div([
+                                html.Div(id='chat-messages', children=[]),
+                                html.Div(id='chat-stream')
+                            ], className='chat-messages'),
                             html.Div([
                                 dbc.Input(id='chat-input', placeholder='Ask about tactics, players, formations...', className='input-modern', style={'flex': '1'}),
                                 html.Button("Send", id='send-btn', className='btn-primary-modern', style={'padding': '10px 20px'})
@@ -889,18 +721,262 @@ def optimize_team(n_clicks, team_id, num_defenders, num_midfielders, num_forward
                 dbc.Col([
                     html.Div([
                         html.Label("Team Formation", className="section-title"),
-                        dcc.Graph(figure=create_vertical_pitch(selected_df), config={'displayModeBar': False}, style={'height': '950px'})
+                        dcc.Graph(figure=pitch_figure, config={'displayModeBar': False}, style={'height': '950px'})
                     ], className='pitch-container')
                 ], width=5)
             ])
         ])
         
-        return results, stats_display, optimality_display, team_data, all_team_players_data
+        return results, stats_display, optimality_display, save_session(
+            team_id, team_data, all_team_players_data, session_key, team_index.fingerprint)
         
+    except Exception as e:
+        mark_error(e)
+        return html.Div([
+            html.H3(f"Error: {str(e)}", style={'color': '#e74c3c', 'textAlign': 'center'})
+        ]), stats_display, optimality_display, session_key  # keep the chat tied to the last saved squad
+
+@app.callback(
+    Output('sweep-container', 'children'),
+    Input('sweep-btn', 'n_clicks'),
+    [State('team-id', 'value'),
+     State('max-training-time', 'value'),
+     State('max-cost', 'value'),
+     *SOLVER_STATES],
+    prevent_initial_call=True
+)
+def compare_formations(n_clicks, team_id, max_training_time, max_cost, *solver_inputs):
+    """Solve every formation for the team and show them ranked side by side"""
+    team_index = TEAM_DATA.index
+    if team_index is None:
+        return html.Div()
+    try:
+        table = sweep_formations(team_index, team_id, max_training_time, max_cost,
+                                 settings=settings_from_inputs(*solver_inputs))
+    except Exception as e:
+        return html.Div([
+            html.H3(f"Error: {str(e)}", style={'color': '#e74c3c', 'textAlign': 'center'})
+        ], className='card-modern')
+    
+    return html.Div([
+        html.Label("Formation Comparison", className="section-title"),
+        dash_table.DataTable(
+            data=table.to_dict('records'),
+            columns=[
+                {'name': 'Rank', 'id': 'rank'},
+                {'name': 'Formation', 'id': 'formation'},
+                {'name': 'Objective', 'id': 'objective_value', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Rating', 'id': 'total_rating', 'type': 'numeric', 'format': {'specifier': '.0f'}},
+                {'name': 'Training (hrs)', 'id': 'total_training_time', 'type': 'numeric', 'format': {'specifier': '.1f'}},
+                {'name': 'Cost', 'id': 'total_cost', 'type': 'numeric', 'format': {'specifier': '$,.0f'}},
+                {'name': 'Status', 'id': 'status'}
+            ],
+            tooltip_data=[{'status': row['message']} if row['message'] else {} for row in table.to_dict('records')],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '12px', 'fontSize': '13px', 'fontFamily': 'Inter, sans-serif', 'border': '1px solid #000000'},
+            style_header={'backgroundColor': 'white', 'fontWeight': '700', 'color': '#2c3e50', 'border': '1px solid #000000'},
+            style_data={'border': '1px solid #000000', 'backgroundColor': 'white'},
+            style_data_conditional=[
+                {'if': {'row_index': 0}, 'backgroundColor': '#eafaf1', 'fontWeight': '700'},
+                {'if': {'filter_query': '{status} = "Infeasible"'}, 'color': '#e74c3c'}
+            ]
+        )
+    ], className='card-modern')
+
+def analysis_callback(button_id, *dependencies):
+    """Register a CBC-heavy analysis as a background job (a plain callback when jobs are off)"""
+    if JOB_MANAGER is None:
+        return app.callback(*dependencies, prevent_initial_call=True)
+    # Dozens of solves per click: keep them off the web worker like Build Squad
+    return app.callback(*dependencies, background=True, manager=JOB_MANAGER,
+                        running=[(Output(button_id, 'disabled'), True, False)], prevent_initial_call=True)
+
+@analysis_callback(
+    'frontier-btn',
+    Output('frontier-container', 'children'),
+    Input('frontier-btn', 'n_clicks'),
+    [State('team-id', 'value'),
+     State('num-defenders', 'value'),
+     State('num-midfielders', 'value'),
+     State('num-forwards', 'value'),
+     State('max-training-time', 'value'),
+     State('max-cost', 'value'),
+     *SOLVER_STATES]
+)
+def show_frontier(n_clicks, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                  *solver_inputs):
+    """Rating vs training time and rating vs cost trade-off curves for the formation"""
+    team_index = TEAM_DATA.index
+    if team_index is None:
+        return html.Div()
+    if JOB_MANAGER is not None:
+        lower_job_priority()
+    
+    charts = []
+    for budget, title in [('training_time', "Rating vs Training Time"), ('cost', "Rating vs Cost")]:
+        try:
+            points, elapsed = compute_frontier(team_index, team_id, num_defenders, num_midfielders, num_forwards,
+                                               budget, max_training_time=max_training_time, max_cost=max_cost,
+                                               settings=settings_from_inputs(*solver_inputs))
+        except Exception as e:
+            charts.append(dbc.Col(html.P(f"{title}: {str(e)}", style={'color': '#e74c3c'}), width=6))
+            continue
+        charts.append(dbc.Col([
+            html.Div(title, style={'fontSize': '13px', 'fontWeight': '700', 'color': '#2c3e50'}),
+            dcc.Graph(figure=create_frontier_figure(points, budget), config={'displayModeBar': False}),
+            html.Small(f"{len(points)} budget levels solved in {elapsed:.2f}s on one warm-started model",
+                       style={'fontSize': '11px', 'color': '#7f8c8d'})
+        ], width=6))
+    
+    return html.Div([
+        html.Label(f"Trade-off Frontier ({num_defenders}-{num_midfielders}-{num_forwards})", className="section-title"),
+        dbc.Row(charts)
+    ], className='card-modern')
+
+@analysis_callback(
+    'alternatives-btn',
+    Output('alternatives-container', 'children'),
+    Input('alternatives-btn', 'n_clicks'),
+    [State('team-id', 'value'),
+     State('num-defenders', 'value'),
+     State('num-midfielders', 'value'),
+     State('num-forwards', 'value'),
+     State('max-training-time', 'value'),
+     State('max-cost', 'value'),
+     *SOLVER_STATES,
+     State('session-key', 'data')]
+)
+def show_alternatives(n_clicks, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                      *inputs):
+    """The next-best distinct squads for the formation, ranked, with their gap to the optimum"""
+    *solver_inputs, session_key = inputs
+    team_index = TEAM_DATA.index
+    if team_index is None:
+        return html.Div()
+    if JOB_MANAGER is not None:
+        lower_job_priority()
+    try:
+        squads, elapsed = k_best_squads(team_index, team_id, num_defenders, num_midfielders, num_forwards,
+                                        k=DEFAULT_ALTERNATIVES + 1, max_training_time=max_training_time,
+                                        max_cost=max_cost, settings=settings_from_inputs(*solver_inputs))
     except Exception as e:
         return html.Div([
             html.H3(f"Error: {str(e)}", style={'color': '#e74c3c', 'textAlign': 'center'})
-        ]), stats_display, optimality_display, None, None
+        ], className='card-modern')
+    table = alternatives_table(squads)
+    columns = ['rank', 'objective_value', 'gap', 'players_in', 'players_out']
+    attach_analysis(session_key, team_id, f"{num_defenders}-{num_midfielders}-{num_forwards}", max_training_time,
+                    max_cost, 'alternatives', table[columns].iloc[1:].to_dict('records'))
+    
+    return html.Div([
+        html.Label(f"Alternative Squads ({num_defenders}-{num_midfielders}-{num_forwards})", className="section-title"),
+        dash_table.DataTable(
+            data=table.to_dict('records'),
+            columns=[
+                {'name': 'Rank', 'id': 'rank'},
+                {'name': 'Objective', 'id': 'objective_value', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Gap', 'id': 'gap', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Gap %', 'id': 'gap_pct', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Rating', 'id': 'total_rating', 'type': 'numeric', 'format': {'specifier': '.0f'}},
+                {'name': 'Training (hrs)', 'id': 'total_training_time', 'type': 'numeric', 'format': {'specifier': '.1f'}},
+                {'name': 'Cost', 'id': 'total_cost', 'type': 'numeric', 'format': {'specifier': '$,.0f'}},
+                {'name': 'In', 'id': 'players_in'},
+                {'name': 'Out', 'id': 'players_out'},
+                {'name': 'Status', 'id': 'status'}
+            ],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '12px', 'fontSize': '13px', 'fontFamily': 'Inter, sans-serif', 'border': '1px solid #000000'},
+            style_header={'backgroundColor': 'white', 'fontWeight': '700', 'color': '#2c3e50', 'border': '1px solid #000000'},
+            style_data={'border': '1px solid #000000', 'backgroundColor': 'white'},
+            style_data_conditional=[
+                {'if': {'row_index': 0}, 'backgroundColor': '#eafaf1', 'fontWeight': '700'}
+            ]
+        ),
+        html.Small(f"{len(table)} squads solved in {elapsed:.2f}s on one model with no-good cuts",
+                   style={'fontSize': '11px', 'color': '#7f8c8d'})
+    ], className='card-modern')
+
+def attach_analysis(session_key, team_id, formation, max_training_time, max_cost, name, records):
+    """Add an analysis of the squad to the chat context when it belongs to the session's current squad"""
+    session = SESSION_STORE.get(session_key) if session_key else None
+    team_data = (session or {}).get('team_data')
+    if not team_data or session.get('team_id') != team_id or team_data['formation'] != formation \
+            or team_data.get('max_training_time') != max_training_time or team_data.get('max_cost') != max_cost:
+        return
+    session['team_data'] = {**team_data, name: records}
+    store_session(session_key, session)
+
+@app.callback(
+    Output('importance-container', 'children'),
+    Input('importance-btn', 'n_clicks'),
+    [State('team-id', 'value'),
+     State('num-defenders', 'value'),
+     State('num-midfielders', 'value'),
+     State('num-forwards', 'value'),
+     State('max-training-time', 'value'),
+     State('max-cost', 'value'),
+     *SOLVER_STATES,
+     State('session-key', 'data')],
+    prevent_initial_call=True
+)
+def show_importance(n_clicks, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                    *inputs):
+    """How much worse the best squad gets without each of its players, most important first"""
+    *solver_inputs, session_key = inputs
+    team_index = TEAM_DATA.index
+    if team_index is None:
+        return html.Div()
+    try:
+        table, elapsed = player_importance(team_index, team_id, num_defenders, num_midfielders, num_forwards,
+                                           max_training_time, max_cost, settings=settings_from_inputs(*solver_inputs))
+    except Exception as e:
+        return html.Div([
+            html.H3(f"Error: {str(e)}", style={'color': '#e74c3c', 'textAlign': 'center'})
+        ], className='card-modern')
+    importance = [{**row, 'loss': None if pd.isna(row['loss']) else row['loss']}
+                  for row in table[['rank', 'player_name', 'assigned_role', 'loss', 'replaced_by']].to_dict('records')]
+    attach_analysis(session_key, team_id, f"{num_defenders}-{num_midfielders}-{num_forwards}", max_training_time,
+                    max_cost, 'importance', importance)
+    solved = int((table['method'] == 'MIP').sum())
+    
+    return html.Div([
+        html.Label(f"Player Importance ({num_defenders}-{num_midfielders}-{num_forwards})", className="section-title"),
+        dash_table.DataTable(
+            data=table.to_dict('records'),
+            columns=[
+                {'name': 'Rank', 'id': 'rank'},
+                {'name': 'Player', 'id': 'player_name'},
+                {'name': 'Role', 'id': 'assigned_role'},
+                {'name': 'Objective Without', 'id': 'objective_value', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Loss', 'id': 'loss', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Loss %', 'id': 'loss_pct', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Best Replacement', 'id': 'replaced_by'},
+                {'name': 'Status', 'id': 'status'}
+            ],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '12px', 'fontSize': '13px', 'fontFamily': 'Inter, sans-serif', 'border': '1px solid #000000'},
+            style_header={'backgroundColor': 'white', 'fontWeight': '700', 'color': '#2c3e50', 'border': '1px solid #000000'},
+            style_data={'border': '1px solid #000000', 'backgroundColor': 'white'},
+            style_data_conditional=[
+                {'if': {'row_index': 0}, 'backgroundColor': '#eafaf1', 'fontWeight': '700'},
+                {'if': {'filter_query': '{status} = "Infeasible"'}, 'color': '#e74c3c'}
+            ]
+        ),
+        html.Small(f"{len(table)} exclusions in {elapsed:.2f}s on one model - {len(table) - solved} settled by "
+                   f"bounds without a MIP solve", style={'fontSize': '11px', 'color': '#7f8c8d'})
+    ], className='card-modern')
+
+QUICK_PROMPTS = {
+    'prompt-1': "Analyze the tactical strengths and weaknesses of this optimized squad",
+    'prompt-2': "Explain the player synergies and chemistry within the selected formation",
+    'prompt-3': "Design a targeted training drill to improve our team's weakest areas",
+    'prompt-4': "Create a match strategy that maximizes each player's individual strengths",
+    'prompt-5': "Compare this squad to the complete roster - what are alternative lineup options?",
+    'prompt-6': "What tactical adjustments should we make if we're losing at halftime?"
+}
+
+# Answers to the quick prompts, per squad snapshot (None = always ask Gemini)
+RESPONSE_CACHE = create_response_cache(QUICK_PROMPTS.values())
 
 # Handle prompt button clicks
 @app.callback(
@@ -922,31 +998,83 @@ def fill_prompt(n1, n2, n3, n4, n5, n6):
     
     button_id = ctx.triggered[0]['prop_id'].split('.')[0]
     
-    prompts = {
-        'prompt-1': "Analyze the tactical strengths and weaknesses of this optimized squad",
-        'prompt-2': "Explain the player synergies and chemistry within the selected formation",
-        'prompt-3': "Design a targeted training drill to improve our team's weakest areas",
-        'prompt-4': "Create a match strategy that maximizes each player's individual strengths",
-        'prompt-5': "Compare this squad to the complete roster - what are alternative lineup options?",
-        'prompt-6': "What tactical adjustments should we make if we're losing at halftime?"
-    }
-    
-    return prompts.get(button_id, "")
+    return QUICK_PROMPTS.get(button_id, "")
+
+def render_message(msg):
+    """Chat bubble for one message"""
+    if msg['role'] == 'user':
+        return html.Div(msg['content'], className='chat-message user-message')
+    return html.Div([
+        dcc.Markdown(msg['content'], style={'margin': '0'})
+    ], className='chat-message bot-message')
+
+CHAT_DEPENDENCIES = [
+    [Output('chat-messages', 'children', allow_duplicate=True),
+     Output('chat-stream', 'children')],
+    Input('chat-request', 'data'),
+    State('session-key', 'data')
+]
+# Seconds between partial-answer updates pushed to the chat panel
+CHAT_STREAM_UPDATE_INTERVAL = 0.25
+
+if JOB_MANAGER is not None:
+    # Answer in a background job; the question and partial answer are shown in chat-stream as progress
+    chat_callback = app.callback(
+        *CHAT_DEPENDENCIES,
+        background=True,
+        manager=JOB_MANAGER,
+        interval=int(CHAT_STREAM_UPDATE_INTERVAL * 1000),
+        progress=[Output('chat-stream', 'children', allow_duplicate=True)],
+        running=[(Output('send-btn', 'disabled'), True, False)],
+        prevent_initial_call=True
+    )
+else:
+    def chat_callback(func):
+        app.callback(*CHAT_DEPENDENCIES, prevent_initial_call=True)(
+            lambda *args: func(ignore_progress, *args))
+        return func
+
+def append_messages(*messages):
+    """Patch that adds bubbles to the chat without resending the ones already shown"""
+    patch = Patch()
+    patch.extend([render_message(msg) for msg in messages])
+    return patch
+
+def load_chat(session_key, chat_id):
+    """(session, chat id, chat log) - history lives server-side; the browser only holds the chat id"""
+    session = SESSION_STORE.get(session_key, {})
+    if not is_session_key(chat_id):  # also replaces ids that were not issued by the server
+        chat_id = new_session_key()
+    return session, chat_id, SESSION_STORE.get(f"chat:{chat_id}") or ChatLog(chat_id)
+
+def response_cache_key(user_message, session):
+    """RESPONSE_CACHE key of a question about the session's squad (None unless it is a quick prompt)"""
+    squad_hash = context_hash(session.get('team_data'), session.get('all_team_players'), session.get('team_id'),
+                              session.get('data_version'))
+    return RESPONSE_CACHE.key(user_message, squad_hash, GEMINI_MODEL, client.backend_name)
 
 @app.callback(
     [Output('chat-messages', 'children'),
-     Output('chat-history', 'data'),
-     Output('chat-input', 'value', allow_duplicate=True)],
+     Output('chat-id', 'data'),
+     Output('chat-input', 'value', allow_duplicate=True),
+     Output('chat-request', 'data')],
     Input('send-btn', 'n_clicks'),
     [State('chat-input', 'value'),
-     State('chat-history', 'data'),
-     State('selected-team-data', 'data'),
-     State('all-team-players-data', 'data')],
+     State('chat-id', 'data'),
+     State('session-key', 'data')],
     prevent_initial_call=True
 )
-def handle_chat(n_clicks, user_message, chat_history, team_data, all_team_players):
+@traced("chat")
+def send_chat(n_clicks, user_message, chat_id, session_key):
+    """Answer in the web worker when no model call is needed, else hand the question to handle_chat"""
+    with stage("session_load"):
+        session, chat_id, chat_log = load_chat(session_key, chat_id)
+        team_data = session.get('team_data')
+        all_team_players = session.get('all_team_players')
+    annotate(chat_id=chat_id, team_id=session.get('team_id'))
+    
     if n_clicks is None or not user_message or user_message.strip() == '':
-        if not chat_history:
+        if not len(chat_log):
             welcome_msg = "Hello! I'm your football coaching assistant with Google Search access. Ask me about tactics, formations, player strategies, or team analysis."
             if team_data:
                 welcome_msg += f"\n\nI can see you've optimized a {team_data['formation']} formation. I also have access to all {len(all_team_players) if all_team_players else 0} players in your team roster!"
@@ -956,35 +1084,59 @@ def handle_chat(n_clicks, user_message, chat_history, team_data, all_team_player
                     welcome_msg += f" Your budget constraint is ${team_data['max_cost']:,.0f}."
             return [html.Div([
                 dcc.Markdown(welcome_msg, style={'margin': '0'})
-            ], className='chat-message bot-message')], chat_history, ''
+            ], className='chat-message bot-message')], chat_id, '', dash.no_update
         
-        messages = []
-        for msg in chat_history:
-            if msg['role'] == 'user':
-                messages.append(html.Div(msg['content'], className='chat-message user-message'))
-            else:
-                messages.append(html.Div([
-                    dcc.Markdown(msg['content'], style={'margin': '0'})
-                ], className='chat-message bot-message'))
-        return messages, chat_history, ''
+        # Redraw the retained history (e.g. after the squad panel was rebuilt)
+        return [render_message(msg) for msg in chat_log.messages], chat_id, '', dash.no_update
+    
+    # Quick prompts about the same squad are answered from the response cache right here,
+    # without starting a job
+    if RESPONSE_CACHE is not None:
+        with stage("response_cache"):
+            cached_response = RESPONSE_CACHE.get(response_cache_key(user_message, session))
+        annotate(cache_hit=cached_response is not None)
+        if cached_response is not None:
+            user_entry = chat_log.append('user', user_message)
+            bot_entry = chat_log.append('assistant', cached_response)
+            SESSION_STORE.set(f"chat:{chat_id}", chat_log)
+            return append_messages(user_entry, bot_entry), chat_id, '', dash.no_update
     
-    chat_history.append({'role': 'user', 'content': user_message})
+    return dash.no_update, chat_id, '', {'message': user_message, 'chat_id': chat_id, 'n_clicks': n_clicks}
+
+@chat_callback
+@traced("chat_reply")
+def handle_chat(set_progress, request, session_key):
+    """Stream the model's answer to a question send_chat could not answer from the cache"""
+    user_message = request['message']
+    with stage("session_load"):
+        session, chat_id, chat_log = load_chat(session_key, request['chat_id'])
+    annotate(chat_id=chat_id, team_id=session.get('team_id'))
     
-    # Get bot response with full context
-    bot_response = get_football_assistant_response(user_message, chat_history, team_data, all_team_players)
+    user_entry = chat_log.append('user', user_message)
+    user_bubble = render_message(user_entry)
+    set_progress([[user_bubble, html.Div("...", className='chat-message bot-message')]])
     
-    chat_history.append({'role': 'assistant', 'content': bot_response})
+    # Stream the bot response with full context, showing the partial answer as it arrives
+    bot_response = ""
+    last_update = time.perf_counter()
+    try:
+        for chunk in stream_football_assistant_response(user_message, chat_log.window, session_prompt(session).text):
+            bot_response += chunk
+            if time.perf_counter() - last_update >= CHAT_STREAM_UPDATE_INTERVAL:
+                set_progress([[user_bubble, render_message({'role': 'assistant', 'content': bot_response})]])
+                last_update = time.perf_counter()
+    except Exception as e:
+        mark_error(e)
+        bot_response = f"I apologize, but I encountered an error. Please try rephrasing your question. Error: {str(e)}"
+    else:
+        if RESPONSE_CACHE is not None:
+            # Recomputed here: the request comes from the browser and must not choose the key
+            RESPONSE_CACHE.put(response_cache_key(user_message, session), bot_response)
     
-    messages = []
-    for msg in chat_history:
-        if msg['role'] == 'user':
-            messages.append(html.Div(msg['content'], className='chat-message user-message'))
-        else:
-            messages.append(html.Div([
-                dcc.Markdown(msg['content'], style={'margin': '0'})
-            ], className='chat-message bot-message'))
+    bot_entry = chat_log.append('assistant', bot_response)
+    SESSION_STORE.set(f"chat:{chat_id}", chat_log)
     
-    return messages, chat_history, ''
+    return append_messages(user_entry, bot_entry), []
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 8050)) 
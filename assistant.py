@@ -0,0 +1,133 @@
+"""Streaming Gemini replies for the AI coach, with time-to-first-token metrics.
+
+stream_reply() yields the answer chunk by chunk from
+`client.models.generate_content_stream`, so the chat can show text as soon as
+the model starts producing it. FakeStreamingClient mimics that API locally
+(fixed latency, word-sized chunks); it is the "stub" backend of llm_client.
+"""
+import os
+import time
+from collections import deque
+
+import numpy as np
+from google.genai import types
+
+try:
+    import diskcache
+except ImportError:  # metrics stay per process
+    diskcache = None
+
+from jobs import ForkSafeCache
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+METRICS_DIR = os.getenv("TACTIQ_METRICS_DIR", os.path.join(".tactiq_cache", "metrics"))
+
+
+def generation_config():
+    """Text answers with Google Search grounding enabled"""
+    return types.GenerateContentConfig(
+        tools=[types.Tool(google_search=types.GoogleSearch())],
+        response_modalities=["TEXT"]
+    )
+
+
+class StreamMetrics:
+    """Time to first token and total time of the most recent `window` replies.
+
+    Replies are streamed inside background-job processes, so with a
+    `directory` the samples go to a diskcache deque every process shares.
+    """
+
+    def __init__(self, window=1000, directory=None):
+        if directory is not None and diskcache is not None:
+            self._samples = ForkSafeCache(diskcache.Deque(directory=directory, maxlen=window))
+        else:
+            self._samples = deque(maxlen=window)
+
+    def record(self, first_token, total):
+        self._samples.append((first_token, total))
+
+    def record_error(self):
+        self._samples.append((None, None))
+
+    def summary(self):
+        """Reply and error counts plus mean/p50/p95 seconds of each timing"""
+        samples = list(self._samples)
+        replies = [(first, total) for first, total in samples if total is not None]
+        result = {"replies": len(replies), "errors": len(samples) - len(replies)}
+        first_tokens = [first for first, _ in replies if first is not None]
+        for name, values in (("time_to_first_token", first_tokens), ("total_time", [t for _, t in replies])):
+            if values:
+                data = np.array(values)
+                result[name] = {"mean": float(data.mean()), "p50": float(np.percentile(data, 50)),
+                                "p95": float(np.percentile(data, 95))}
+        return result
+
+
+def _create_stream_metrics():
+    try:
+        return StreamMetrics(directory=METRICS_DIR)
+    except OSError as e:
+        print(f"✗ Assistant metrics kept per process: {e}")
+        return StreamMetrics()
+
+
+STREAM_METRICS = _create_stream_metrics()
+
+
+def stream_reply(client, contents, model=GEMINI_MODEL, metrics=STREAM_METRICS):
+    """Yield the model's answer as text chunks, recording time to first token"""
+    start = time.perf_counter()
+    first_token = None
+    try:
+        for chunk in client.models.generate_content_stream(model=model, contents=contents,
+                                                           config=generation_config()):
+            text = chunk.text
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield text
+    except Exception:
+        metrics.record_error()
+        raise
+    metrics.record(first_token, time.perf_counter() - start)
+
+
+class _FakeChunk:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, reply, first_token_delay, chunk_delay):
+        self._reply = reply
+        self._first_token_delay = first_token_delay
+        self._chunk_delay = chunk_delay
+
+    def _answer(self, contents):
+        if self._reply is not None:
+            return self._reply(contents) if callable(self._reply) else self._reply
+        question = str(contents).rsplit("User:", 1)[-1].replace("Assistant:", "").strip()
+        return (f"**Coach (offline):** you asked *{question}*. This answer comes from the local fake "
+                "client, so no tactical analysis was generated. Set GEMINI_API_KEY to ask Gemini.")
+
+    def generate_content_stream(self, model, contents, config=None):
+        words = self._answer(contents).split(" ")
+        time.sleep(self._first_token_delay)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self._chunk_delay)
+            yield _FakeChunk(word if i == 0 else " " + word)
+
+    def generate_content(self, model, contents, config=None):
+        return _FakeChunk("".join(chunk.text for chunk in self.generate_content_stream(model, contents, config)))
+
+
+class FakeStreamingClient:
+    """Offline stand-in for genai.Client: `reply` is a string or contents -> string"""
+
+    def __init__(self, reply=None, first_token_delay=0.3, chunk_delay=0.02):
+        self.models = _FakeModels(reply, first_token_delay, chunk_delay)
@@ -0,0 +1,61 @@
+"""K-best squads from one model with no-good cuts vs a rebuild for every squad.
+
+Usage:
+    python benchmarks/bench_alternatives.py [--players 35 200 500] [--k 5 10]
+
+The baseline is the naive enumeration: for the j-th squad, build a fresh model
+with the j-1 squads found so far excluded, then solve it.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from alternatives import k_best_squads  # noqa: E402
+from optimizer import NUM_GOALKEEPERS, SquadModel  # noqa: E402
+
+
+def repeated_solves(roster, formation, k, budget):
+    """Baseline: a fresh model (plus every earlier squad's cut) per squad"""
+    found, objectives = [], []
+    for _ in range(k):
+        model = SquadModel(roster, *formation, max_training_time=budget)
+        for players in found:
+            model.exclude_squad(players)
+        if model.solve() != 'Optimal':
+            break
+        found.append([i for i, _ in model.assignment()])
+        objectives.append(model.objective_value())
+    return objectives
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[35, 200, 500])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--formation", type=int, nargs=3, default=[4, 4, 2], metavar=("D", "M", "F"))
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'k':>4}{'one model (s)':>15}{'rebuilds (s)':>14}{'speedup':>9}{'objectives':>12}")
+    for size in args.players:
+        roster = make_roster(size, seed=size)
+        # ~10% below the squad's average training time, so the budget binds
+        budget = float(roster.training_time.mean()) * (sum(args.formation) + NUM_GOALKEEPERS) * 0.9
+        for k in args.k:
+            squads, incremental = k_best_squads(roster, roster.team_id, *args.formation, k=k,
+                                                max_training_time=budget)
+            start = time.perf_counter()
+            baseline = repeated_solves(roster, args.formation, k, budget)
+            rebuilds = time.perf_counter() - start
+
+            same = len(baseline) == len(squads) and all(
+                abs(a - objective) < 1e-6 for a, (_, _, objective) in zip(baseline, squads))
+            print(f"{size:>8}{k:>4}{incremental:>15.2f}{rebuilds:>14.2f}{rebuilds / incremental:>8.1f}x"
+                  f"{'match' if same else 'MISMATCH':>12}")
+
+
+if __name__ == "__main__":
+    main()
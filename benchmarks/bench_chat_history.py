@@ -0,0 +1,91 @@
+"""Per-message chat cost vs conversation length: full re-render vs Patch + server-side log.
+
+Usage:
+    python benchmarks/bench_chat_history.py [--lengths 10 50 100 200] [--message-chars 600]
+
+Before: the browser sends the whole history and receives every bubble again.
+After: it sends a chat id and receives a Patch with the two new bubbles; the
+history is a ChatLog in the session store.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dash import Patch, dcc, html  # noqa: E402
+
+import chat_log  # noqa: E402
+from chat_log import ChatLog  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+
+def render_message(msg):
+    if msg['role'] == 'user':
+        return html.Div(msg['content'], className='chat-message user-message')
+    return html.Div([dcc.Markdown(msg['content'], style={'margin': '0'})], className='chat-message bot-message')
+
+
+def _size(value):
+    return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def before(history, question, answer):
+    """Original handle_chat: append to the history and render all of it"""
+    start = time.perf_counter()
+    history = history + [{'role': 'user', 'content': question}]
+    window = history[-6:]
+    history.append({'role': 'assistant', 'content': answer})
+    messages = [render_message(msg) for msg in history]
+    response = _size([messages, history])
+    return time.perf_counter() - start, _size(history) + len(question), response, len(window)
+
+
+def after(store, chat_id, question, answer):
+    """New handle_chat: load the ChatLog, append, and patch in two bubbles"""
+    start = time.perf_counter()
+    log = store.get(f"chat:{chat_id}")
+    user_entry = log.append('user', question)
+    window = list(log.window)
+    bot_entry = log.append('assistant', answer)
+    store.set(f"chat:{chat_id}", log)
+    patch = Patch()
+    patch.extend([render_message(user_entry), render_message(bot_entry)])
+    response = _size([patch, chat_id])
+    return time.perf_counter() - start, len(chat_id) + len(question), response, len(window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--message-chars", type=int, default=600)
+    args = parser.parse_args()
+
+    question = "What tactical adjustments should we make if we're losing at halftime?"
+    answer = "x" * args.message_chars
+    with tempfile.TemporaryDirectory() as directory:
+        chat_log.CHAT_ARCHIVE_DIR = directory
+        store = SessionStore(directory=directory)
+        print(f"{'messages':>9}{'req before':>12}{'req after':>11}{'resp before':>13}{'resp after':>12}"
+              f"{'ms before':>11}{'ms after':>10}")
+        for length in args.lengths:
+            history = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': answer} for i in range(length)]
+            log = ChatLog("bench")
+            for msg in history:
+                log.append(msg['role'], msg['content'])
+            store.set("chat:bench", log)
+
+            old_time, old_request, old_response, _ = before(history, question, answer)
+            new_time, new_request, new_response, _ = after(store, "bench", question, answer)
+            print(f"{length:>9}{old_request / 1024:>10.1f}KB{new_request:>10}B{old_response / 1024:>11.1f}KB"
+                  f"{new_response / 1024:>10.1f}KB{old_time * 1000:>11.2f}{new_time * 1000:>10.2f}")
+    print(f"The server keeps the last {chat_log.CHAT_HISTORY_LIMIT} messages per chat and archives older ones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Chat request payload size: squad + roster in dcc.Store vs a server-side session key.
+
+Usage:
+    python benchmarks/bench_chat_payload.py [--sizes 25 100 500 2000] [--history 6]
+
+Builds the JSON body Dash posts to /_dash-update-component for one chat
+message, with the context as State values (before) and as a session key
+(after), plus the squad Build Squad sends back to the browser.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from optimizer import solve_squad  # noqa: E402
+from session_store import SessionStore, new_session_key  # noqa: E402
+
+ROSTER_COLUMNS = ['player_name', 'team_name', 'final_position', 'overall_rating', 'training_time', 'Cost']
+
+
+def chat_context(roster, d, m, f):
+    """team_data and roster records as optimize_team builds them"""
+    selected_df, status, objective_value = solve_squad(roster, roster.team_id, d, m, f)
+    team_data = {
+        'players': selected_df.to_dict('records'),
+        'total_players': len(selected_df),
+        'total_rating': float(selected_df['overall_rating'].sum()),
+        'total_training_time': float(selected_df['training_time'].sum()),
+        'total_cost': float(selected_df['cost'].sum()),
+        'formation': f"{d}-{m}-{f}",
+        'status': status,
+        'objective_value': float(objective_value),
+        'max_training_time': None,
+        'max_cost': None
+    }
+    players = roster.df[ROSTER_COLUMNS].rename(columns={'Cost': 'cost'}).to_dict('records')
+    return team_data, players
+
+
+def request_body(states, message, history):
+    """Dash callback request for handle_chat with the given extra State values"""
+    state = [{'id': 'chat-input', 'property': 'value', 'value': message},
+             {'id': 'chat-history', 'property': 'data', 'value': history}]
+    state += [{'id': component, 'property': 'data', 'value': value} for component, value in states]
+    body = {'output': '..chat-messages.children...chat-history.data...chat-input.value..',
+            'inputs': [{'id': 'send-btn', 'property': 'n_clicks', 'value': 1}],
+            'state': state, 'changedPropIds': ['send-btn.n_clicks']}
+    return json.dumps(body, default=str).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 500, 2000, 5000])
+    parser.add_argument("--history", type=int, default=6, help="chat messages already in the history")
+    args = parser.parse_args()
+
+    store = SessionStore()
+    message = "Analyze the tactical strengths and weaknesses of this optimized squad"
+    history = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': 'x' * 400} for i in range(args.history)]
+
+    print(f"{'players':>8}{'before (KB)':>13}{'after (KB)':>12}{'reduction':>11}{'store lookup (us)':>19}")
+    for size in args.sizes:
+        roster = make_roster(size, seed=size)
+        team_data, players = chat_context(roster, 4, 4, 2)
+        before = request_body([('selected-team-data', team_data), ('all-team-players-data', players)],
+                              message, history)
+        key = new_session_key()
+        store.set(key, {'team_data': team_data, 'all_team_players': players})
+        after = request_body([('session-key', key)], message, history)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            store.get(key)
+        lookup = (time.perf_counter() - start) / 1000
+
+        print(f"{size:>8}{len(before) / 1024:>13.1f}{len(after) / 1024:>12.1f}"
+              f"{len(before) / len(after):>10.1f}x{lookup * 1e6:>19.1f}")
+    print("Build Squad responses shrink by the same amount: they returned both objects and now return the key.")
+
+
+if __name__ == "__main__":
+    main()
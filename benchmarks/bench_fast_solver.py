@@ -0,0 +1,54 @@
+"""Solve time of the in-process assignment solver vs CBC on randomized rosters.
+
+Usage:
+    python benchmarks/bench_fast_solver.py [--trials 200] [--max-players 60]
+
+Agreement with CBC is checked by tests/test_fast_solver.py.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_players  # noqa: E402
+from data_loader import TeamRoster  # noqa: E402
+from fast_solver import solve_assignment  # noqa: E402
+from optimizer import POSITION_MAP, SquadModel  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--max-players", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    fast_total = cbc_total = 0.0
+    for trial in range(args.trials):
+        players = make_players(rng.randint(8, args.max_players), seed=args.seed + trial)
+        # Skew some rosters so infeasible and all-rounder-scarce cases are covered
+        if trial % 4 == 0:
+            players["final_position"] = [rng.choice(list(POSITION_MAP)) for _ in range(len(players))]
+        roster = TeamRoster(1, players)
+        d = rng.randint(1, 6)
+        m = rng.randint(1, 9 - d)
+        f = 10 - d - m
+
+        start = time.perf_counter()
+        solve_assignment(roster, d, m, f)
+        fast_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        SquadModel(roster, d, m, f).solve()
+        cbc_total += time.perf_counter() - start
+
+    print(f"{args.trials} rosters: fast solver {fast_total / args.trials * 1000:.2f} ms/solve, "
+          f"CBC {cbc_total / args.trials * 1000:.2f} ms/solve")
+
+
+if __name__ == "__main__":
+    main()
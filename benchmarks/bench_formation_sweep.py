@@ -0,0 +1,45 @@
+"""Formation sweep wall-clock time vs process-pool size.
+
+Usage:
+    python benchmarks/bench_formation_sweep.py [--players 300] [--workers 1 2 4 8]
+
+A training-time budget is set so every formation goes through CBC rather than
+the in-process fast path.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from formation_sweep import enumerate_formations, sweep_formations  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-training-time", type=float, default=120)
+    parser.add_argument("--wide", action="store_true", help="sweep 1-8 players per line instead of the default bounds")
+    args = parser.parse_args()
+
+    roster = make_roster(args.players, seed=args.players)
+    bounds = ((1, 8),) * 3 if args.wide else ()
+    formations = enumerate_formations(*bounds)
+    print(f"{len(formations)} formations, {args.players} players, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'wall (s)':>10}{'speedup':>9}")
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        sweep_formations(roster, roster.team_id, max_training_time=args.max_training_time,
+                         formations=formations, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
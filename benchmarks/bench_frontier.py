@@ -0,0 +1,52 @@
+"""Frontier sweep on one warm-started model vs an independent rebuild per level.
+
+Usage:
+    python benchmarks/bench_frontier.py [--players 60 200 500] [--points 12] [--budget training_time]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from frontier import compute_frontier  # noqa: E402
+from optimizer import SquadModel  # noqa: E402
+
+
+def independent_solves(roster, formation, budget, levels):
+    """Baseline: build and solve a fresh model for every budget level"""
+    objectives = []
+    for level in levels:
+        limits = {"training_time": None, "cost": None, budget: level}
+        model = SquadModel(roster, *formation, limits["training_time"], limits["cost"])
+        objectives.append(model.objective_value() if model.solve() == 'Optimal' else None)
+    return objectives
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[60, 200, 500])
+    parser.add_argument("--points", type=int, default=12)
+    parser.add_argument("--budget", choices=["training_time", "cost"], default="training_time")
+    parser.add_argument("--formation", type=int, nargs=3, default=[4, 4, 2], metavar=("D", "M", "F"))
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'persistent (s)':>16}{'independent (s)':>17}{'speedup':>9}{'objectives':>12}")
+    for size in args.players:
+        roster = make_roster(size, seed=size)
+        points, persistent = compute_frontier(roster, roster.team_id, *args.formation, args.budget,
+                                              num_points=args.points)
+        start = time.perf_counter()
+        baseline = independent_solves(roster, args.formation, args.budget, points['budget_level'])
+        independent = time.perf_counter() - start
+
+        same = all((a is None and b != b) or (a is not None and abs(a - b) < 1e-6)
+                   for a, b in zip(baseline, points['objective_value']))
+        print(f"{size:>8}{persistent:>16.2f}{independent:>17.2f}{independent / persistent:>8.1f}x"
+              f"{'match' if same else 'MISMATCH':>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Per-worker memory of the player table: private copies vs one memory-mapped cache.
+
+Usage:
+    python benchmarks/bench_memory.py [--workers 4] [--scale 1 10] [--data Database.xlsx]
+
+Starts --workers fresh Python processes (like gunicorn workers importing the
+app) that each load the player table and build the TeamIndex, then touch
+every column. Two loaders are compared:
+
+    private   the feather cache read into a private DataFrame and every team's
+              rows copied out of it (the loader before the shared cache)
+    shared    data_loader.read_cache: DataFrame over a memory map of the cache
+              file, rosters sliced from it
+
+Memory is read once all workers hold the data. RSS counts shared pages in
+full in every worker. USS is what each worker holds on its own, and PSS
+splits shared pages between the processes mapping them, so the PSS total is
+the real footprint. --scale repeats the workbook's rows under new team ids
+to show how the difference grows with the data.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import psutil
+import pyarrow.feather as feather
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import TeamIndex, TeamRoster, read_cache, read_workbook, write_cache  # noqa: E402
+
+MODES = ("private", "shared")
+
+
+def legacy_index(df):
+    """The TeamIndex before the shared cache, condensed: every roster copies its rows"""
+    order = df["team_id"].to_numpy().argsort(kind="stable")
+    teams = {}
+    for team_id, rows in pd.Series(order).groupby(df["team_id"].to_numpy()[order]).groups.items():
+        teams[team_id] = TeamRoster(team_id, df.iloc[order[rows]].reset_index(drop=True))
+    return teams
+
+
+def load(mode, path):
+    if mode == "private":
+        df = feather.read_table(path).to_pandas()
+        return df, legacy_index(df)
+    df = read_cache(path)
+    return df, TeamIndex(df)
+
+
+def worker(mode, path, loaded, measured, results):
+    process = psutil.Process()
+    before = process.memory_full_info()
+    start = time.perf_counter()
+    df, index = load(mode, path)
+    seconds = time.perf_counter() - start
+    # Fault in every column, as serving requests eventually does (without boxing the strings)
+    for column in df.columns:
+        values = df[column]
+        values.str.len().sum() if values.dtype == "str" else values.sum()
+    loaded.wait()
+    after = process.memory_full_info()
+    results.put({"load_s": seconds, "rss": after.rss, "uss": after.uss - before.uss, "pss": after.pss - before.pss})
+    measured.wait()
+
+
+def run(mode, path, workers):
+    context = multiprocessing.get_context("spawn")
+    loaded, measured = context.Barrier(workers + 1), context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, path, loaded, measured, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    loaded.wait()
+    samples = [results.get(timeout=300) for _ in processes]
+    measured.wait()
+    for process in processes:
+        process.join()
+    return samples
+
+
+def scaled_table(df, scale):
+    """The workbook's rows repeated `scale` times, each copy under its own team ids"""
+    offset = int(df["team_id"].max()) + 1
+    copies = [df.assign(team_id=df["team_id"] + k * offset) for k in range(scale)]
+    return pd.concat(copies, ignore_index=True).sort_values("team_id", kind="stable", ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="Database.xlsx")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    players = read_workbook(args.data)
+    mb = 1024 * 1024
+    print(f"{'players':>9}{'loader':>9}{'load s':>8}{'RSS MB':>9}{'USS MB':>9}{'PSS MB':>9}"
+          f"{'PSS total':>11}   (per worker: mean; data only, except RSS)")
+    with tempfile.TemporaryDirectory(prefix="tactiq-memory-") as directory:
+        for scale in args.scale:
+            path = os.path.join(directory, f"players_x{scale}.feather")
+            table = scaled_table(players, scale)
+            write_cache(table, path)
+            for mode in MODES:
+                samples = run(mode, path, args.workers)
+
+                def mean(key):
+                    return sum(sample[key] for sample in samples) / len(samples)
+                total = sum(sample["pss"] for sample in samples)
+                print(f"{len(table):>9}{mode:>9}{mean('load_s'):>8.2f}{mean('rss') / mb:>9.1f}"
+                      f"{mean('uss') / mb:>9.1f}{mean('pss') / mb:>9.1f}{total / mb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Model construction time vs roster size: original loop builder vs SquadModel.
+
+Usage:
+    python benchmarks/bench_model_build.py [--sizes 20 100 500 1000] [--solve]
+
+With --solve both models are solved with CBC and their objectives compared.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pulp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from optimizer import ALPHA, BETA, NUM_GOALKEEPERS, POSITION_MAP, ROLES, SquadModel  # noqa: E402
+
+
+def build_legacy_model(team_df, num_defenders, num_midfielders, num_forwards):
+    """The original cell-by-cell builder from run_optimization, kept for comparison"""
+    players = team_df.index.tolist()
+    x = pulp.LpVariable.dicts("player", players, cat='Binary')
+    y = {role: pulp.LpVariable.dicts(role, players, cat='Binary') for role in ROLES}
+    prob = pulp.LpProblem("Team_Selection", pulp.LpMaximize)
+    prob += pulp.lpSum([
+        ALPHA * team_df.loc[i, "overall_rating"] * x[i] -
+        BETA * team_df.loc[i, "training_time"] * x[i] for i in players
+    ])
+    for role in ROLES:
+        for i in players:
+            if role in POSITION_MAP.get(team_df.loc[i, "final_position"], []):
+                prob += y[role][i] <= x[i]
+            else:
+                prob += y[role][i] == 0
+    for i in players:
+        prob += pulp.lpSum([y[role][i] for role in ROLES]) == x[i]
+    prob += pulp.lpSum([y["Defender"][i] for i in players]) == num_defenders
+    prob += pulp.lpSum([y["Mid"][i] for i in players]) == num_midfielders
+    prob += pulp.lpSum([y["Forward"][i] for i in players]) == num_forwards
+    prob += pulp.lpSum([y["Goalkeeper"][i] for i in players]) == NUM_GOALKEEPERS
+    prob += pulp.lpSum([x[i] for i in players]) == num_defenders + num_midfielders + num_forwards + NUM_GOALKEEPERS
+    all_rounders = [i for i in players if {"Mid", "Defender"} <= set(POSITION_MAP.get(team_df.loc[i, "final_position"], []))]
+    if len(all_rounders) >= 1:
+        prob += pulp.lpSum([x[i] for i in all_rounders]) >= 1
+    if len(all_rounders) >= 2:
+        prob += pulp.lpSum([x[i] for i in all_rounders]) >= 2
+    return prob
+
+
+def _best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 250, 500, 1000, 2000])
+    parser.add_argument("--formation", type=int, nargs=3, default=[4, 4, 2], metavar=("D", "M", "F"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--solve", action="store_true")
+    args = parser.parse_args()
+    d, m, f = args.formation
+
+    print(f"{'players':>8}{'legacy vars':>13}{'new vars':>10}{'legacy (ms)':>13}{'new (ms)':>10}{'speedup':>9}"
+          + (f"{'objectives':>13}" if args.solve else ""))
+    for size in args.sizes:
+        roster = make_roster(size, seed=size)
+        legacy_time, legacy = _best_of(lambda: build_legacy_model(roster.df, d, m, f), args.repeat)
+        new_time, model = _best_of(lambda: SquadModel(roster, d, m, f), args.repeat)
+        line = (f"{size:>8}{len(legacy.variables()):>13}{model.num_variables:>10}"
+                f"{legacy_time * 1000:>13.1f}{new_time * 1000:>10.1f}{legacy_time / new_time:>8.1f}x")
+        if args.solve:
+            legacy.solve(pulp.PULP_CBC_CMD(msg=0))
+            model.solve()
+            same = abs(pulp.value(legacy.objective) - model.objective_value()) < 1e-6
+            line += f"{'match' if same else 'MISMATCH':>13}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
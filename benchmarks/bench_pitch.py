@@ -0,0 +1,101 @@
+"""Pitch figure size and build time: per-player shapes vs cached template + three traces.
+
+Usage:
+    python benchmarks/bench_pitch.py [--repeat 50]
+
+Before: every solve re-adds the pitch markings and three shapes per player,
+then copies the shape list back into the layout. After: pitch.create_vertical_pitch().
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pitch import PITCH_HEIGHT, PITCH_WIDTH, create_vertical_pitch, player_positions  # noqa: E402
+
+FORMATIONS = {"4-4-2": (4, 4, 2), "4-3-3": (4, 3, 3), "3-5-2": (3, 5, 2)}
+
+
+def make_squad(defenders, midfielders, forwards):
+    roles = ['Goalkeeper'] + ['Defender'] * defenders + ['Mid'] * midfielders + ['Forward'] * forwards
+    return pd.DataFrame({'player_name': [f"Player Number {i}" for i in range(len(roles))], 'assigned_role': roles})
+
+
+def legacy_pitch(selected_df):
+    """The original create_vertical_pitch, condensed"""
+    fig = go.Figure()
+    w, h = PITCH_WIDTH, PITCH_HEIGHT
+    line = dict(color="white", width=2)
+    clear = "rgba(0,0,0,0)"
+    fig.add_shape(type="rect", x0=0, y0=0, x1=w, y1=h, fillcolor="#1a7f3e", line=dict(color="white", width=3))
+    fig.add_shape(type="line", x0=0, y0=h/2, x1=w, y1=h/2, line=line)
+    fig.add_shape(type="circle", x0=w/2-8, y0=h/2-8, x1=w/2+8, y1=h/2+8, line=line, fillcolor=clear)
+    fig.add_shape(type="circle", x0=w/2-0.7, y0=h/2-0.7, x1=w/2+0.7, y1=h/2+0.7,
+                  fillcolor="white", line=dict(color="white", width=0))
+    fig.add_shape(type="rect", x0=12, y0=0, x1=w-12, y1=14, line=line, fillcolor=clear)
+    fig.add_shape(type="rect", x0=12, y0=h-14, x1=w-12, y1=h, line=line, fillcolor=clear)
+    fig.add_shape(type="rect", x0=21, y0=0, x1=w-21, y1=5, line=line, fillcolor=clear)
+    fig.add_shape(type="rect", x0=21, y0=h-5, x1=w-21, y1=h, line=line, fillcolor=clear)
+    for y in (10, h - 10):
+        fig.add_shape(type="circle", x0=w/2-0.7, y0=y-0.7, x1=w/2+0.7, y1=y+0.7,
+                      fillcolor="white", line=dict(color="white", width=0))
+
+    all_x, all_y, all_names = player_positions(selected_df)
+    for x, y in zip(all_x, all_y):
+        fig.add_shape(type="circle", x0=x-0.8, y0=y+1.5, x1=x+0.8, y1=y+3.1, fillcolor='#1e293b',
+                      line=dict(color='#1e293b', width=1), layer='above')
+        fig.add_shape(type="line", x0=x, y0=y+1.5, x1=x, y1=y-1.5, line=dict(color='#1e293b', width=2.5),
+                      layer='above')
+        fig.add_shape(type="line", x0=x-1.5, y0=y+0.5, x1=x+1.5, y1=y+0.5, line=dict(color='#1e293b', width=2.5),
+                      layer='above')
+    if all_x:
+        fig.add_trace(go.Scatter(x=all_x, y=[y - 3 for y in all_y], mode='text', text=all_names,
+                                 textfont=dict(size=7, color='white', family='Arial Black'),
+                                 showlegend=False, hoverinfo='text', hovertext=all_names))
+
+    fig.update_layout(
+        xaxis=dict(range=[-2, w+2], showgrid=False, zeroline=False, visible=False),
+        yaxis=dict(range=[-2, h+2], showgrid=False, zeroline=False, visible=False),
+        plot_bgcolor='#1a7f3e', paper_bgcolor='white', margin=dict(l=20, r=20, t=20, b=20), height=900,
+        shapes=[shape for shape in fig.layout.shapes]
+    )
+    fig.update_xaxes(fixedrange=True)
+    fig.update_yaxes(fixedrange=True, scaleanchor="x", scaleratio=1)
+    for trace in fig.data:
+        trace.update(visible=True)
+    return fig
+
+
+def measure(build, squad, repeat):
+    """Mean ms to build the figure and serialize it, plus its JSON size and trace/shape counts"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = build(squad).to_json()
+    elapsed = (time.perf_counter() - start) / repeat
+    fig = build(squad)
+    shapes = len(fig.layout.shapes) + len(fig.layout.template.layout.shapes)
+    return elapsed * 1000, len(payload), len(fig.data), shapes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'formation':>10}{'KB before':>11}{'KB after':>10}{'ms before':>11}{'ms after':>10}"
+          f"{'traces':>9}{'shapes':>10}")
+    for name, counts in FORMATIONS.items():
+        squad = make_squad(*counts)
+        old_ms, old_size, old_traces, old_shapes = measure(legacy_pitch, squad, args.repeat)
+        new_ms, new_size, new_traces, new_shapes = measure(create_vertical_pitch, squad, args.repeat)
+        print(f"{name:>10}{old_size / 1024:>11.1f}{new_size / 1024:>10.1f}{old_ms:>11.2f}{new_ms:>10.2f}"
+              f"{old_traces:>4} -> {new_traces}{old_shapes:>5} -> {new_shapes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Coach system prompt: original per-message rendering vs the memoized compact builder.
+
+Usage:
+    python benchmarks/bench_prompt_context.py [--sizes 25 100 500 2000] [--messages 20]
+
+Reports prompt size (characters, estimated tokens) and CPU time per chat
+message for the original sentence-per-player prompt and for PromptContextBuilder.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chat_payload import chat_context  # noqa: E402
+from synthetic import make_roster  # noqa: E402
+from prompt_context import ASSISTANT_RULES, PromptContextBuilder, estimate_tokens  # noqa: E402
+
+
+def legacy_prompt(team_data, all_team_players):
+    """The original string-concatenating prompt from get_football_assistant_response"""
+    system_prompt = ASSISTANT_RULES
+    system_prompt += f"""
+
+COMPLETE TEAM ROSTER (All {len(all_team_players)} available players):
+"""
+    for player in all_team_players:
+        cost_value = player.get('Cost', 'N/A')
+        system_prompt += f"- {player['player_name']} ({player['team_name']}) - Position: {player['final_position']} | Rating: {player['overall_rating']}, Training: {player['training_time']} hours, Cost: ${cost_value}\n"
+    system_prompt += "\n"
+    system_prompt += f"""
+CURRENTLY SELECTED 11 PLAYERS (Optimized Squad):
+Formation: {team_data['formation']} (1 Goalkeeper - {team_data['formation']})
+Total Players: {team_data['total_players']}
+Total Team Rating: {team_data['total_rating']:.1f}
+Total Training Time: {team_data['total_training_time']:.1f} hours
+Total Cost: ${team_data['total_cost']:,.0f}
+"""
+    system_prompt += f"""Optimization Status: {team_data['status']}
+Objective Value: {team_data['objective_value']:.2f}
+
+Selected Players:
+"""
+    for player in team_data['players']:
+        system_prompt += f"- {player['player_name']} ({player['team_name']}) - {player['assigned_role']} | Rating: {player['overall_rating']}, Training: {player['training_time']} hours, Cost: ${player['cost']}\n"
+    system_prompt += """
+When discussing the team, you can refer to both the selected 11 players AND the complete roster. Provide tactical insights, suggest alternatives from the bench, analyze strengths and weaknesses.
+"""
+    return system_prompt + "\nCurrent conversation context:"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 500, 2000])
+    parser.add_argument("--messages", type=int, default=20, help="chat messages about the same squad")
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'legacy tokens':>15}{'compact tokens':>16}{'legacy (ms/msg)':>17}"
+          f"{'cached (ms/msg)':>17}{'first (ms)':>12}")
+    for size in args.sizes:
+        roster = make_roster(size, seed=size)
+        team_data, players = chat_context(roster, 4, 4, 2)
+
+        start = time.perf_counter()
+        for _ in range(args.messages):
+            legacy = legacy_prompt(team_data, players)
+        legacy_time = (time.perf_counter() - start) / args.messages
+
+        builder = PromptContextBuilder()
+        start = time.perf_counter()
+        context = builder.build(team_data, players, roster.team_id, "bench")
+        first_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.messages):
+            context = builder.build(team_data, players, roster.team_id, "bench")
+        cached_time = (time.perf_counter() - start) / args.messages
+
+        print(f"{size:>8}{estimate_tokens(legacy):>15}{context.tokens:>16}{legacy_time * 1000:>17.2f}"
+              f"{cached_time * 1000:>17.3f}{first_time * 1000:>12.2f}")
+    print("tokens are estimated at ~4 characters per token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Re-solve latency of a session's persistent squad model vs a cold build and solve.
+
+Usage:
+    python benchmarks/bench_resolve.py [--sizes 35 200 1000] [--repeat 3]
+
+A coach changes one thing per click (one more defender, a 5% lower budget,
+...). For every click of EDITS the squad is solved three ways:
+
+    cold      SquadModel built from scratch, then solved (the old run_optimization)
+    memory    SquadModelPool in one process: update the right-hand sides, MIP start
+    server    model_server.ModelServer: the pool in a solver process, reached over a
+              Unix socket with the roster sent along - what a background job pays
+
+The first click of each sequence builds the pool's model and is not counted.
+Objective values of the three are checked against each other.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_league  # noqa: E402
+from data_loader import TeamIndex  # noqa: E402
+from optimizer import NUM_GOALKEEPERS, SquadModel, SquadModelPool  # noqa: E402
+from model_server import ModelServer  # noqa: E402
+
+# (defenders, midfielders, forwards, training budget as a fraction of the base budget)
+EDITS = [(4, 4, 2, 1.0), (5, 3, 2, 1.0), (5, 3, 2, 0.95), (4, 4, 2, 0.95), (4, 3, 3, 0.95),
+         (4, 3, 3, 0.9), (3, 5, 2, 0.9), (3, 5, 2, 1.0)]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def cold_solve(roster, d, m, f, budget):
+    model = SquadModel(roster, d, m, f, max_training_time=budget)
+    return model, model.solve()
+
+
+def bench_size(size, repeat, server):
+    league = make_league(5, size, seed=size)
+    index = TeamIndex(league)
+    roster = index.get(1)
+    roster_key = (1, index.team_hash(1))
+    # ~10% below the squad's average training time, so the budget binds
+    base = float(league['training_time'].mean()) * (sum(EDITS[0][:3]) + NUM_GOALKEEPERS) * 0.9
+    pools = {"memory": SquadModelPool(),
+             "server": server}
+    timings = {"cold": [], "memory": [], "server": []}
+
+    for run in range(repeat):
+        session = f"{size}-{run}"
+        for click, (d, m, f, fraction) in enumerate(EDITS):
+            budget = round(base * fraction)
+            (model, _), ms = _timed(lambda: cold_solve(roster, d, m, f, budget))
+            objectives = {"cold": model.objective_value()}
+            if click > 0:
+                timings["cold"].append(ms)
+            for name, pool in pools.items():
+                (model, _, _), ms = _timed(lambda: pool.solve(session, roster_key, roster, d, m, f, budget))
+                objectives[name] = model.objective_value()
+                if click > 0:
+                    timings[name].append(ms)
+            if max(objectives.values()) - min(objectives.values()) > 1e-6:
+                raise RuntimeError(f"{size} players, click {click}: objectives differ {objectives}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[35, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=3, help="times to replay the click sequence")
+    args = parser.parse_args()
+
+    server = ModelServer().start()
+    print(f"{'players':>8}{'cold ms':>10}{'memory ms':>11}{'server ms':>11}{'memory x':>10}{'server x':>10}   (median)")
+    for size in args.sizes:
+        timings = bench_size(size, args.repeat, server)
+        cold, memory, remote = (statistics.median(timings[name]) for name in ("cold", "memory", "server"))
+        print(f"{size:>8}{cold:>10.1f}{memory:>11.1f}{remote:>11.1f}{cold / memory:>10.2f}{cold / remote:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
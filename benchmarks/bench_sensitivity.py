@@ -0,0 +1,90 @@
+"""Player-exclusion sensitivity on one model with bound pruning vs a fresh solve per player.
+
+Usage:
+    python benchmarks/bench_sensitivity.py [--players 35 200 500] [--workers 2 4] [--budgets 0 0.9]
+
+For every starter of the best squad, the best squad without that player is
+found three ways:
+
+    rebuilds  a new model with the player fixed out, solved from scratch
+              (the 11 manual solves)
+    one model sensitivity.player_importance in-process: one model, the player's
+              variables fixed in place, no MIP when the budget relaxation or
+              the best swap settles the answer
+    N workers the same, exclusions split over N processes
+
+--budgets are training-time caps as a fraction of an average squad's total
+(0 = no cap). Objectives are checked against each other; "pruned" counts
+exclusions settled without a MIP solve.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_roster  # noqa: E402
+from optimizer import NUM_GOALKEEPERS, SquadModel  # noqa: E402
+from sensitivity import player_importance  # noqa: E402
+
+
+def rebuilds(roster, formation, budget):
+    """Baseline: a fresh model per excluded starter; returns {player name: objective or None}"""
+    model = SquadModel(roster, *formation, max_training_time=budget)
+    model.solve()
+    names = roster.df['player_name'].to_numpy()
+    values = {}
+    for player, _ in model.assignment():
+        excluded = SquadModel(roster, *formation, max_training_time=budget)
+        excluded.set_unavailable([player])
+        excluded.solve()
+        values[names[player]] = excluded.objective_value() if excluded.has_solution else None
+    return values
+
+
+def same(values, table):
+    for name, value in zip(table['player_name'], table['objective_value']):
+        expected = values[name]
+        if (expected is None) != (value != value) or (expected is not None and abs(expected - value) > 1e-6):
+            return False
+    return len(values) == len(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[35, 200, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0, 0.9])
+    parser.add_argument("--formation", type=int, nargs=3, default=[4, 4, 2], metavar=("D", "M", "F"))
+    args = parser.parse_args()
+
+    header = f"{'players':>8}{'budget':>8}{'rebuilds (s)':>14}{'one model (s)':>15}{'pruned':>8}"
+    header += "".join(f"{f'{n} workers (s)':>15}" for n in args.workers)
+    print(header + f"{'objectives':>12}")
+    for size in args.players:
+        roster = make_roster(size, seed=size)
+        for fraction in args.budgets:
+            budget = float(roster.training_time.mean()) * (sum(args.formation) + NUM_GOALKEEPERS) * fraction or None
+
+            start = time.perf_counter()
+            values = rebuilds(roster, args.formation, budget)
+            baseline = time.perf_counter() - start
+            table, one_model = player_importance(roster, roster.team_id, *args.formation, max_training_time=budget,
+                                                 workers=1)
+            matched = same(values, table)
+            timings = []
+            for workers in args.workers:
+                parallel_table, seconds = player_importance(roster, roster.team_id, *args.formation,
+                                                            max_training_time=budget, workers=workers)
+                matched = matched and same(values, parallel_table)
+                timings.append(seconds)
+
+            pruned = int((table['method'] != 'MIP').sum())
+            line = f"{size:>8}{fraction or 'none':>8}{baseline:>14.2f}{one_model:>15.2f}{pruned:>5}/{len(table):<2}"
+            line += "".join(f"{seconds:>15.2f}" for seconds in timings)
+            print(line + f"{'match' if matched else 'MISMATCH':>12}")
+
+
+if __name__ == "__main__":
+    main()
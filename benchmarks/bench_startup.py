@@ -0,0 +1,54 @@
+"""Compare cold-start data loading: parsing Database.xlsx vs the columnar cache.
+
+Usage:
+    python benchmarks/bench_startup.py [--path Database.xlsx] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import load_player_data, read_workbook  # noqa: E402
+
+
+def _time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="Database.xlsx")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="tactiq-bench-")
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            load_player_data(args.path, cache_dir=cache_dir)
+
+        results = [
+            ("read_excel (no cache)", _time(lambda: read_workbook(args.path), args.repeat)),
+            ("cache build (first start)", _time(cold, args.repeat)),
+            ("cache hit (later starts)", _time(lambda: load_player_data(args.path, cache_dir=cache_dir), args.repeat)),
+        ]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    baseline = results[0][1][0]
+    print(f"{'path':<28}{'best (ms)':>12}{'mean (ms)':>12}{'speedup':>10}")
+    for name, (best, mean) in results:
+        print(f"{name:<28}{best * 1000:>12.1f}{mean * 1000:>12.1f}{baseline / best:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Chunk arrival times of a streamed coach reply from the local fake client (no network).
+
+Usage:
+    python benchmarks/bench_streaming.py [--first-token 0.2] [--chunk-delay 0.01]
+
+Prints when the first and last chunks arrive and the time to first token the
+metrics recorded. Correctness is checked by tests/test_streaming.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant import FakeStreamingClient, StreamMetrics, stream_reply  # noqa: E402
+
+REPLY = ("Press high with the front three, keep the full-backs narrow and let the holding midfielder "
+         "screen the centre-backs when the ball is lost.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--first-token", type=float, default=0.2)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    metrics = StreamMetrics()
+    client = FakeStreamingClient(REPLY, first_token_delay=args.first_token, chunk_delay=args.chunk_delay)
+    start = time.perf_counter()
+    arrivals = []
+    for _ in stream_reply(client, "User: How should we press?\nAssistant:", metrics=metrics):
+        arrivals.append(time.perf_counter() - start)
+    ttft = metrics.summary()["time_to_first_token"]["p50"]
+    print(f"{len(arrivals)} chunks, first after {arrivals[0] * 1000:.0f} ms, "
+          f"complete after {arrivals[-1] * 1000:.0f} ms (recorded TTFT {ttft * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Stage-by-stage timings of the Build Squad and coach hot paths on synthetic rosters.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 20 100 500 1000 5000] [--repeat 5] [--output results.json]
+    python benchmarks/bench_suite.py --compare benchmarks/results/BASELINE.json
+
+Each roster size gets a synthetic league (synthetic.make_league, Database.xlsx
+schema) and every stage is timed separately:
+
+    filter_dataframe   get_team_roster on the plain player table
+    filter_index       TeamIndex lookup (what the app uses)
+    model_build        SquadModel with a training-time budget (the CBC path)
+    solve              SquadModel.solve with the default solver settings
+    extract            selected_players() - the squad DataFrame
+    solve_fast         budget-free fast_solver.solve_assignment
+    figure             pitch.create_vertical_pitch
+    serialize          the figure's JSON, as sent to the browser
+    prompt_cold        system prompt rendered from scratch
+    prompt_warm        system prompt with the roster and squad blocks memoized
+
+Results are written as JSON (environment, then min/median/mean ms per size and
+stage) to --output, by default benchmarks/results/<UTC time>.json. With
+--compare the run is checked against an earlier results file and stages that
+got slower by more than --threshold are listed; the exit code is 1 if any did.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pulp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_league  # noqa: E402
+from data_loader import TeamIndex, get_team_roster  # noqa: E402
+from fast_solver import solve_assignment  # noqa: E402
+from optimizer import NUM_GOALKEEPERS, SquadModel  # noqa: E402
+from pitch import create_vertical_pitch  # noqa: E402
+from prompt_context import PromptContextBuilder  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+STAGES = ["filter_dataframe", "filter_index", "model_build", "solve", "extract", "solve_fast",
+          "figure", "serialize", "prompt_cold", "prompt_warm"]
+ROSTER_COLUMNS = ['player_name', 'team_name', 'final_position', 'overall_rating', 'training_time', 'Cost']
+QUESTION = "Who should replace our weakest defender?"
+
+
+def _timed(timings, stage, fn):
+    start = time.perf_counter()
+    result = fn()
+    timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def team_summary(selected_df, formation, max_training_time):
+    """team_data as optimize_team builds it for the coach"""
+    return {
+        'players': selected_df.to_dict('records'),
+        'total_players': len(selected_df),
+        'total_rating': float(selected_df['overall_rating'].sum()),
+        'total_training_time': float(selected_df['training_time'].sum()),
+        'total_cost': float(selected_df['cost'].sum()),
+        'formation': "-".join(str(n) for n in formation),
+        'status': 'Optimal',
+        'objective_value': 0.0,
+        'max_training_time': max_training_time,
+        'max_cost': None
+    }
+
+
+def conversation(builder, team_data, players, team_id, data_version):
+    """Full prompt for one chat message, as app.build_conversation assembles it"""
+    return builder.build(team_data, players, team_id, data_version).text + f"\n\nUser: {QUESTION}\nAssistant:"
+
+
+def bench_size(size, args):
+    """{stage: [ms, ...]} for one roster size"""
+    league = make_league(args.teams, size, seed=size)
+    index = TeamIndex(league)
+    team_id = 1
+    d, m, f = args.formation
+    # A training budget ~10% below the squad's average forces the MIP path
+    budget = round(float(league['training_time'].mean()) * (d + m + f + NUM_GOALKEEPERS) * 0.9)
+    warm_builder = PromptContextBuilder()
+    timings = {}
+
+    for _ in range(args.repeat):
+        _timed(timings, "filter_dataframe", lambda: get_team_roster(league, team_id))
+        roster = _timed(timings, "filter_index", lambda: index.get(team_id))
+        model = _timed(timings, "model_build", lambda: SquadModel(roster, d, m, f, max_training_time=budget))
+        _timed(timings, "solve", model.solve)
+        if model.prob.status != pulp.LpStatusOptimal:
+            raise RuntimeError(f"{size} players: solver status {pulp.LpStatus[model.prob.status]}")
+        selected = _timed(timings, "extract", model.selected_players)
+        _timed(timings, "solve_fast", lambda: solve_assignment(roster, d, m, f))
+        fig = _timed(timings, "figure", lambda: create_vertical_pitch(selected))
+        _timed(timings, "serialize", fig.to_json)
+
+        team_data = team_summary(selected, args.formation, budget)
+        players = roster.df[ROSTER_COLUMNS].rename(columns={'Cost': 'cost'}).to_dict('records')
+        _timed(timings, "prompt_cold",
+               lambda: conversation(PromptContextBuilder(maxsize=0), team_data, players, team_id, index.version))
+        conversation(warm_builder, team_data, players, team_id, index.version)
+        _timed(timings, "prompt_warm",
+               lambda: conversation(warm_builder, team_data, players, team_id, index.version))
+    return timings
+
+
+def summarize(samples):
+    return {"min_ms": round(min(samples), 4), "median_ms": round(statistics.median(samples), 4),
+            "mean_ms": round(statistics.fmean(samples), 4), "samples": len(samples)}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(RESULTS_DIR), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "pandas": pd.__version__, "pulp": pulp.__version__}
+
+
+def compare(results, baseline, threshold):
+    """Stages whose best time is more than `threshold` (a fraction) slower than the baseline's"""
+    slower = []
+    for size, stages in results["sizes"].items():
+        for stage, summary in stages.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(stage)
+            if before is None or before["min_ms"] <= 0:
+                continue
+            ratio = summary["min_ms"] / before["min_ms"]
+            # Sub-millisecond stages are too noisy to flag on ratio alone
+            if ratio > 1 + threshold and summary["min_ms"] - before["min_ms"] > 0.5:
+                slower.append((int(size), stage, before["min_ms"], summary["min_ms"], ratio))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 250, 500, 1000, 2000, 5000])
+    parser.add_argument("--teams", type=int, default=5, help="teams in the synthetic league")
+    parser.add_argument("--formation", type=int, nargs=3, default=[4, 4, 2], metavar=("D", "M", "F"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<UTC time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    results = {"environment": environment(),
+               "parameters": {"teams": args.teams, "formation": args.formation, "repeat": args.repeat},
+               "sizes": {}}
+    print(f"{'players':>8}" + "".join(f"{stage:>17}" for stage in STAGES) + "   (median ms)")
+    for size in args.sizes:
+        stages = {stage: summarize(samples) for stage, samples in bench_size(size, args).items()}
+        results["sizes"][str(size)] = stages
+        print(f"{size:>8}" + "".join(f"{stages[stage]['median_ms']:>17.2f}" for stage in STAGES))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        slower = compare(results, baseline, args.threshold)
+        for size, stage, before, after, ratio in slower:
+            print(f"✗ {stage} at {size} players: {before:.2f}ms -> {after:.2f}ms ({ratio:.2f}x)")
+        if slower:
+            sys.exit(1)
+        print(f"✓ No stage more than {args.threshold:.0%} slower than {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Load test: many simulated coaches driving Build Squad and the chat over HTTP.
+
+Usage:
+    python benchmarks/load_test.py [--workers 1 2 4] [--users 1 5 10 25] [--duration 30]
+    python benchmarks/load_test.py --url http://127.0.0.1:8050 --users 10
+
+Each simulated user repeatedly builds a squad for a random team and formation
+and asks the coach --chats questions about it. Requests go through the same
+/_dash-update-component endpoint the browser uses, including polling the
+background jobs at each callback's own interval. Latencies are what a coach
+waits, from click to final answer.
+
+For every worker count a server is started (gunicorn app:server --workers N,
+or waitress with --threads threads when gunicorn is not installed) with the
+local stub in place of Gemini and its state in a temporary directory. With
+--url an already running server is tested instead. Throughput, p50/p95/p99
+latency and error rate are printed per action and concurrency level, and
+written as JSON with --output.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loader import TeamIndex, load_player_data  # noqa: E402
+
+FORMATIONS = [(4, 4, 2), (4, 3, 3), (3, 5, 2), (4, 5, 1), (5, 3, 2)]
+QUESTIONS = [
+    "Who is our most important player and why?",
+    "How should we press against a team that plays out from the back?",
+    "Which bench players could cover for an injured defender?",
+    "What should we change if we concede early?",
+]
+# Per-process state directories, so each server run starts empty
+STATE_DIRS = {
+    "TACTIQ_JOB_CACHE_DIR": "jobs",
+    "TACTIQ_SESSION_DIR": "sessions",
+    "TACTIQ_METRICS_DIR": "metrics",
+    "TACTIQ_LLM_STATE_DIR": "llm",
+    "TACTIQ_RESPONSE_CACHE_DIR": "responses",
+    "TACTIQ_CHAT_ARCHIVE_DIR": "chat_archive",
+    "TACTIQ_SOLUTION_CACHE_DIR": "solutions",
+    "TACTIQ_CACHE_DIR": "player_data",
+}
+REQUEST_TIMEOUT = 120
+
+
+class DashClient:
+    """Calls one Dash callback the way the renderer does, polling background jobs"""
+
+    def __init__(self, session, url, dependency):
+        self.session = session
+        self.url = url
+        self.dependency = dependency
+        self.interval = dependency.get("background", {}).get("interval", 1000) / 1000 if dependency.get(
+            "background") else None
+        output = dependency["output"]
+        ids = output.strip(".").split("...") if output.startswith("..") else [output]
+        self.outputs = [{"id": o.split(".")[0], "property": o.split(".")[1].split("@")[0]} for o in ids]
+
+    def call(self, values, changed):
+        """Run the callback with {(id, property): value} and return the final response JSON"""
+        body = {"output": self.dependency["output"], "outputs": self.outputs,
+                "inputs": [{**i, "value": values.get((i["id"], i["property"]))} for i in self.dependency["inputs"]],
+                "state": [{**s, "value": values.get((s["id"], s["property"]))} for s in self.dependency["state"]],
+                "changedPropIds": changed}
+        endpoint = self.url + "/_dash-update-component"
+        reply = self.session.post(endpoint, json=body, timeout=REQUEST_TIMEOUT)
+        reply.raise_for_status()
+        data = reply.json()
+        if "response" in data or "cacheKey" not in data:
+            return data
+        job = {"cacheKey": data["cacheKey"], "job": data["job"]}
+        give_up = time.monotonic() + REQUEST_TIMEOUT
+        while time.monotonic() < give_up:
+            time.sleep(self.interval)
+            reply = self.session.post(endpoint, params=job, json=body, timeout=REQUEST_TIMEOUT)
+            if reply.status_code == 204:
+                continue
+            reply.raise_for_status()
+            data = reply.json()
+            if "response" in data:
+                return data
+        raise TimeoutError(f"background job {data.get('job')} did not finish")
+
+
+def find_dependency(dependencies, output):
+    return next(d for d in dependencies if output in d["output"])
+
+
+def simulated_user(url, dependencies, team_ids, chats, deadline, results, seed):
+    """Build a squad, ask `chats` questions, repeat until the deadline"""
+    rng = random.Random(seed)
+    session = requests.Session()
+    optimize = DashClient(session, url, find_dependency(dependencies, "results-container.children"))
+    chat = DashClient(session, url, find_dependency(dependencies, "chat-id.data"))
+    # Questions the response cache cannot answer are passed on to the reply job through chat-request
+    reply = DashClient(session, url, next(d for d in dependencies
+                                          if any(i["id"] == "chat-request" for i in d["inputs"])))
+
+    def ask(values):
+        response = chat.call(values, ["send-btn.n_clicks"])
+        request = _output(response, "chat-request", "data")
+        if request is None:
+            return response
+        answer = reply.call({("chat-request", "data"): request, **values}, ["chat-request.data"])
+        answer.setdefault("response", {}).update(response.get("response", {}))
+        return answer
+
+    while time.monotonic() < deadline:
+        d, m, f = rng.choice(FORMATIONS)
+        values = {("optimize-btn", "n_clicks"): 1, ("team-id", "value"): rng.choice(team_ids),
+                  ("num-defenders", "value"): d, ("num-midfielders", "value"): m, ("num-forwards", "value"): f}
+        response = _timed(results, "optimize", lambda: optimize.call(values, ["optimize-btn.n_clicks"]),
+                          failed=lambda text: '"Error: ' in text)
+        session_key = _output(response, "session-key", "data")
+        chat_id = None
+        for i in range(chats):
+            if time.monotonic() >= deadline:
+                break
+            values = {("send-btn", "n_clicks"): i + 1, ("chat-input", "value"): rng.choice(QUESTIONS),
+                      ("chat-id", "data"): chat_id, ("session-key", "data"): session_key}
+            response = _timed(results, "chat", lambda: ask(values),
+                              failed=lambda text: "encountered an error" in text)
+            chat_id = _output(response, "chat-id", "data") or chat_id
+
+
+def _output(response, component, prop):
+    if not response:
+        return None
+    return response.get("response", {}).get(component, {}).get(prop)
+
+
+def _timed(results, action, fn, failed):
+    start = time.perf_counter()
+    error = None
+    response = None
+    try:
+        response = fn()
+        if failed(json.dumps(response)):
+            error = "application error"
+    except Exception as e:
+        error = type(e).__name__
+    results.append((action, time.perf_counter() - start, error))
+    return response
+
+
+def run_level(url, users, duration, chats, team_ids):
+    dependencies = requests.get(url + "/_dash-dependencies", timeout=30).json()
+    results = []
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    threads = [threading.Thread(target=simulated_user,
+                                args=(url, dependencies, team_ids, chats, deadline, results, seed))
+               for seed in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    summary = {}
+    for action in ("optimize", "chat"):
+        samples = [(latency, error) for name, latency, error in results if name == action]
+        if not samples:
+            continue
+        latencies = np.array([latency for latency, _ in samples])
+        errors = [error for _, error in samples if error is not None]
+        summary[action] = {"requests": len(samples), "throughput_per_s": round(len(samples) / elapsed, 3),
+                           "p50_s": round(float(np.percentile(latencies, 50)), 3),
+                           "p95_s": round(float(np.percentile(latencies, 95)), 3),
+                           "p99_s": round(float(np.percentile(latencies, 99)), 3),
+                           "error_rate": round(len(errors) / len(samples), 4),
+                           "errors": {e: errors.count(e) for e in set(errors)}}
+    return summary
+
+
+def server_command(workers, port, threads):
+    if importlib.util.find_spec("gunicorn") is not None:
+        return "gunicorn", [sys.executable, "-m", "gunicorn", "app:server", "-b", f"127.0.0.1:{port}",
+                            "--workers", str(workers), "--timeout", str(REQUEST_TIMEOUT)]
+    return "waitress", [sys.executable, "-m", "waitress", f"--listen=127.0.0.1:{port}", f"--threads={threads}",
+                        "app:server"]
+
+
+def start_server(workers, port, threads, state_dir):
+    """Start the app with the stub LLM; returns (process, server name, url)"""
+    env = {**os.environ, "TACTIQ_LLM_BACKEND": "stub", "GEMINI_API_KEY": "", "TACTIQ_REQUEST_LOG": "0"}
+    env.update({name: os.path.join(state_dir, sub) for name, sub in STATE_DIRS.items()})
+    url = f"http://127.0.0.1:{port}"
+    try:
+        requests.get(url, timeout=2)
+    except requests.ConnectionError:
+        pass
+    else:
+        raise RuntimeError(f"port {port} is already in use - stop that server or pass --port")
+    name, command = server_command(workers, port, threads)
+    log_path = os.path.join(state_dir, "server.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                   start_new_session=True)
+    give_up = time.monotonic() + 180
+    while time.monotonic() < give_up:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}, see {log_path}")
+        try:
+            if requests.get(url + "/_dash-dependencies", timeout=5).ok:
+                return process, name, url
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    stop_server(process)
+    raise RuntimeError(f"server did not start within 180s, see {log_path}")
+
+
+def stop_server(process):
+    # The server's session also holds its workers and background-job processes
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def print_level(label, users, summary):
+    for action, stats in summary.items():
+        print(f"{label:>12}{users:>7}{action:>10}{stats['requests']:>10}{stats['throughput_per_s']:>10.2f}"
+              f"{stats['p50_s']:>9.2f}{stats['p95_s']:>9.2f}{stats['p99_s']:>9.2f}{stats['error_rate']:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test this running server instead of starting one per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="gunicorn worker counts")
+    parser.add_argument("--threads", type=int, default=8, help="waitress threads when gunicorn is unavailable")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25], help="concurrent users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--chats", type=int, default=2, help="questions per built squad")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default=os.path.join(REPO_ROOT, "Database.xlsx"))
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    team_ids = TeamIndex(load_player_data(args.data)).team_ids
+    runs = []
+    if args.url:
+        targets = [None]
+    elif server_command(1, args.port, args.threads)[0] == "gunicorn":
+        targets = args.workers
+    else:
+        print(f"✗ gunicorn is not installed - testing one waitress process with {args.threads} threads")
+        targets = [1]
+    print(f"{'workers':>12}{'users':>7}{'action':>10}{'requests':>10}{'req/s':>10}"
+          f"{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'errors':>9}")
+    for workers in targets:
+        with tempfile.TemporaryDirectory(prefix="tactiq-load-") as state_dir:
+            process = None
+            if args.url:
+                url, label = args.url, "external"
+            else:
+                process, server, url = start_server(workers, args.port, args.threads, state_dir)
+                label = f"{workers} {server}"
+            try:
+                for users in args.users:
+                    summary = run_level(url, users, args.duration, args.chats, team_ids)
+                    print_level(label, users, summary)
+                    runs.append({"server": label, "users": users, "duration_s": args.duration, **summary})
+            finally:
+                if process is not None:
+                    stop_server(process)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"chats_per_squad": args.chats, "runs": runs}, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Synthetic rosters with the Database.xlsx schema, for benchmarks."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import TeamRoster  # noqa: E402
+
+# Position mix observed in Database.xlsx
+POSITION_WEIGHTS = {
+    "Defender": 0.218,
+    "Forward": 0.203,
+    "Midfielder": 0.163,
+    "Mid-Back All-rounder": 0.152,
+    "Forward-Mid All-rounder": 0.136,
+    "Goalkeeper": 0.112,
+    "All All-rounder": 0.016,
+}
+
+
+def make_players(num_players, team_id=1, seed=0):
+    """DataFrame of num_players players for one team (always includes a goalkeeper)"""
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(POSITION_WEIGHTS), size=num_players,
+                           p=np.array(list(POSITION_WEIGHTS.values())) / sum(POSITION_WEIGHTS.values()))
+    positions[0] = "Goalkeeper"
+    return pd.DataFrame({
+        "player_id": np.arange(num_players) + team_id * 100_000,
+        "player_name": [f"Player {team_id}-{i}" for i in range(num_players)],
+        "team_id": team_id,
+        "team_name": f"Team {team_id}",
+        "Cost": (rng.normal(72_000, 6_000, num_players) // 500 * 500).astype(np.int64),
+        "training_time": rng.integers(5, 28, num_players),
+        "overall_rating": np.clip(rng.normal(68, 6.3, num_players), 40, 95).astype(np.int64),
+        "final_position": positions,
+    })
+
+
+def make_roster(num_players, team_id=1, seed=0):
+    """TeamRoster wrapping make_players()"""
+    return TeamRoster(team_id, make_players(num_players, team_id, seed))
+
+
+def make_league(num_teams, players_per_team, seed=0):
+    """Player table for several synthetic teams"""
+    return pd.concat([make_players(players_per_team, team_id, seed + team_id)
+                      for team_id in range(1, num_teams + 1)], ignore_index=True)
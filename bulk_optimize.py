@@ -0,0 +1,167 @@
+"""Headless bulk optimizer: solve every team in the database for a list of formations.
+
+Usage:
+    python bulk_optimize.py --output squads.csv
+    python bulk_optimize.py --formations 4-4-2 4-3-3 --max-training-time 80 --output squads.parquet --workers 8
+
+Results are streamed to CSV or Parquet (chosen by the output extension) as each
+team finishes. Infeasible teams and solver errors are recorded, not fatal.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data_loader import TeamIndex, load_player_data
+from formation_sweep import summarize_result, timed_solve
+from optimizer import available_solvers, solver_settings
+
+OUTPUT_COLUMNS = ['team_id', 'team_name', 'formation', 'defenders', 'midfielders', 'forwards', 'status',
+                  'objective_value', 'total_rating', 'total_training_time', 'total_cost', 'players',
+                  'solve_time', 'message']
+
+
+def parse_formation(text):
+    """'4-4-2' -> (4, 4, 2)"""
+    try:
+        d, m, f = (int(part) for part in text.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"formation must look like 4-4-2, got '{text}'")
+    return d, m, f
+
+
+def optimize_team_formations(roster, formations, max_training_time, max_cost, settings=None):
+    """Solve all formations for one team (runs inside a pool worker)"""
+    team_name = roster.df['team_name'].iloc[0] if 'team_name' in roster.df.columns else 'N/A'
+    rows = []
+    for formation in formations:
+        try:
+            result, solve_time = timed_solve(roster, roster.team_id, *formation, max_training_time, max_cost,
+                                             settings)
+            row = summarize_result(formation, result, solve_time)
+            if result[0] is not None:
+                row['players'] = '; '.join(f"{name} ({role})" for name, role in
+                                           zip(result[0]['player_name'], result[0]['assigned_role']))
+        except Exception as e:
+            d, m, f = formation
+            row = {'formation': f"{d}-{m}-{f}", 'defenders': d, 'midfielders': m, 'forwards': f,
+                   'status': 'Error', 'message': str(e), 'solve_time': 0.0}
+        row.update(team_id=roster.team_id, team_name=team_name)
+        rows.append(row)
+    return rows
+
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=OUTPUT_COLUMNS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Appends one row group per batch so finished teams are on disk immediately"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([
+            ('team_id', pa.int64()), ('team_name', pa.string()), ('formation', pa.string()),
+            ('defenders', pa.int64()), ('midfielders', pa.int64()), ('forwards', pa.int64()),
+            ('status', pa.string()), ('objective_value', pa.float64()), ('total_rating', pa.float64()),
+            ('total_training_time', pa.float64()), ('total_cost', pa.float64()), ('players', pa.string()),
+            ('solve_time', pa.float64()), ('message', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = {name: [row.get(name) for row in rows] for name in self._schema.names}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path):
+    if path.endswith(".parquet"):
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="Database.xlsx", help="player workbook (default: Database.xlsx)")
+    parser.add_argument("--formations", type=parse_formation, nargs="+", default=[(4, 4, 2)],
+                        metavar="D-M-F", help="formations to solve for every team (default: 4-4-2)")
+    parser.add_argument("--teams", type=int, nargs="+", help="only these team IDs (default: all)")
+    parser.add_argument("--max-training-time", type=float)
+    parser.add_argument("--max-cost", type=float)
+    parser.add_argument("--solver", choices=available_solvers(), help="PuLP backend (default: TACTIQ_SOLVER or CBC)")
+    parser.add_argument("--time-limit", type=float, help="solver time limit per solve, in seconds")
+    parser.add_argument("--gap", type=float, help="relative MIP gap, e.g. 0.01")
+    parser.add_argument("--threads", type=int, help="solver threads per solve")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="squads.csv", help=".csv or .parquet")
+    args = parser.parse_args(argv)
+
+    settings = solver_settings(args.solver, args.time_limit, args.gap, args.threads)
+    start = time.perf_counter()
+    index = TeamIndex(load_player_data(args.data))
+    team_ids = args.teams or index.team_ids
+    rosters = [index.get(team_id) for team_id in team_ids]
+    missing = [team_id for team_id, roster in zip(team_ids, rosters) if roster is None]
+    if missing:
+        print(f"✗ Skipping unknown team IDs: {', '.join(map(str, missing))}", file=sys.stderr)
+    rosters = [roster for roster in rosters if roster is not None]
+    print(f"✓ Loaded {len(index)} teams in {time.perf_counter() - start:.2f}s - "
+          f"solving {len(rosters)} teams x {len(args.formations)} formations on {args.workers} workers",
+          file=sys.stderr)
+
+    sink = open_sink(args.output)
+    team_times = []
+    statuses = {}
+    solve_start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(optimize_team_formations, roster, args.formations,
+                                   args.max_training_time, args.max_cost, settings): roster.team_id
+                       for roster in rosters}
+            for done, future in enumerate(as_completed(futures), start=1):
+                team_id = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:  # e.g. a worker process died
+                    rows = [{'team_id': team_id, 'status': 'Error', 'message': str(e), 'solve_time': 0.0}]
+                sink.write(rows)
+                team_time = sum(row['solve_time'] for row in rows)
+                team_times.append(team_time)
+                for row in rows:
+                    statuses[row['status']] = statuses.get(row['status'], 0) + 1
+                summary = ", ".join(f"{row.get('formation', '?')} {row['status']}" for row in rows)
+                print(f"[{done}/{len(futures)}] team {team_id}: {summary} ({team_time:.2f}s)", file=sys.stderr)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - solve_start
+    solves = sum(statuses.values())
+    times = np.array(team_times) if team_times else np.zeros(1)
+    print(f"✓ {solves} solves for {len(team_times)} teams in {elapsed:.2f}s "
+          f"({solves / elapsed if elapsed else 0:.1f} solves/s) -> {args.output}", file=sys.stderr)
+    print(f"  per-team solve time: mean {times.mean():.3f}s, p95 {np.percentile(times, 95):.3f}s, "
+          f"max {times.max():.3f}s", file=sys.stderr)
+    print("  " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
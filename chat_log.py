@@ -0,0 +1,56 @@
+"""Server-side chat history for the AI coach, bounded and incrementally windowed.
+
+Each browser chat has a ChatLog kept in the session store under its chat id.
+Only the most recent messages are retained; older ones are appended to a
+JSON-lines archive file per chat. The model's context window (the last few
+messages) is a deque updated as messages arrive rather than re-sliced.
+"""
+import json
+import os
+import time
+from collections import deque
+
+from session_store import is_session_key
+
+CHAT_HISTORY_LIMIT = int(os.getenv("TACTIQ_CHAT_HISTORY_LIMIT", 50))  # messages kept per chat
+CHAT_CONTEXT_MESSAGES = 6  # messages sent to the model with each question
+CHAT_ARCHIVE_DIR = os.getenv("TACTIQ_CHAT_ARCHIVE_DIR", os.path.join(".tactiq_cache", "chat_archive"))
+
+
+class ChatLog:
+    """Recent messages of one chat plus the model's context window"""
+    __slots__ = ("chat_id", "limit", "messages", "window", "archived")
+
+    def __init__(self, chat_id, limit=CHAT_HISTORY_LIMIT, context_messages=CHAT_CONTEXT_MESSAGES):
+        self.chat_id = chat_id
+        self.limit = limit
+        self.messages = deque()
+        self.window = deque(maxlen=context_messages)
+        self.archived = 0
+
+    def append(self, role, content):
+        """Add a message, archiving the oldest one once the log is full"""
+        message = {'role': role, 'content': content}
+        self.messages.append(message)
+        self.window.append(message)
+        while len(self.messages) > self.limit:
+            archive_message(self.chat_id, self.messages.popleft())
+            self.archived += 1
+        return message
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def archive_message(chat_id, message, directory=None):
+    """Append one message to the chat's archive file (in CHAT_ARCHIVE_DIR by default)"""
+    directory = directory or CHAT_ARCHIVE_DIR
+    if not is_session_key(chat_id):  # never let a chat id pick the file's path
+        print(f"✗ Not archiving chat message: invalid chat id {chat_id!r}")
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{chat_id}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({**message, 'archived_at': time.time()}) + "\n")
+    except OSError as e:
+        print(f"✗ Could not archive chat message: {e}")
@@ -0,0 +1,417 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional - fall back to reading the workbook directly
+    pa = None
+    feather = None
+
+# Bump when the cached column layout changes so stale caches are rebuilt
+# (2: rows grouped by team_id)
+CACHE_FORMAT_VERSION = 2
+PLAYER_DATA_PATH = "Database.xlsx"
+# Defaults to a .tactiq_cache directory next to the workbook
+CACHE_DIR = os.getenv("TACTIQ_CACHE_DIR")
+# Seconds between checks of the workbook for changes (0 = never reload)
+RELOAD_INTERVAL = float(os.getenv("TACTIQ_DATA_RELOAD_INTERVAL", 30))
+
+# Every TeamIndex gets a new version so caches keyed on it never serve stale data
+_index_versions = itertools.count(1)
+
+# Columns the optimizer and UI rely on - these must be stored as numbers
+CORE_NUMERIC_COLUMNS = ["team_id", "overall_rating", "training_time", "Cost"]
+
+
+def _cache_paths(source_path, cache_dir):
+    """Return the (data, metadata) cache file paths for a source workbook"""
+    base = os.path.splitext(os.path.basename(source_path))[0]
+    return (os.path.join(cache_dir, f"{base}.feather"),
+            os.path.join(cache_dir, f"{base}.meta.json"))
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def normalize_player_data(df):
+    """Give every column a stable, columnar-friendly type and group the rows by team.
+
+    The stable sort keeps each team's players in workbook order; with every team
+    contiguous, TeamIndex can slice the table instead of copying rows out of it.
+    """
+    df = df.copy()
+    for col in CORE_NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "team_id" in df.columns:
+        df = df.sort_values("team_id", kind="stable", ignore_index=True)
+
+    # Mixed-type object columns (e.g. numbers typed into a text column) cannot be
+    # stored in a typed columnar file - render every non-missing value as text
+    for col in df.columns:
+        if df[col].dtype == object:
+            mask = df[col].notna()
+            df[col] = df[col].where(~mask, df[col].astype(str))
+    return df
+
+
+def read_workbook(path):
+    """Parse the Excel workbook (slow path)"""
+    return normalize_player_data(pd.read_excel(path))
+
+
+def read_cache(cache_path):
+    """Read the columnar cache as a DataFrame over a memory map of the file.
+
+    One block per column lets numeric columns without missing values, and the
+    Arrow-backed string columns, point straight into the mapped file, so every
+    worker process reading the same cache shares those pages instead of holding
+    a private copy.
+    """
+    table = feather.read_table(cache_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def write_cache(df, cache_path):
+    """Write the columnar cache atomically (uncompressed so it can be memory-mapped).
+
+    One record batch keeps every column contiguous; columns split over several
+    batches would have to be concatenated - copied - on every read.
+    """
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    table = pa.Table.from_pandas(df).combine_chunks()
+    feather.write_feather(table, tmp_path, compression="uncompressed", chunksize=max(len(df), 1))
+    os.replace(tmp_path, cache_path)
+
+
+def load_player_data(path, cache_dir=CACHE_DIR, use_cache=True):
+    """Load player data, using a binary columnar cache of the workbook when available.
+
+    The cache is reused while the workbook's mtime and size are unchanged. When they
+    change, the file hash decides whether the contents really changed (e.g. a plain
+    `touch` or copy) before the cache is rebuilt. The returned DataFrame is a view
+    of the memory-mapped cache, shared by every process that loads the same file.
+    """
+    if not use_cache or feather is None:
+        return read_workbook(path)
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), ".tactiq_cache")
+    cache_path, meta_path = _cache_paths(path, cache_dir)
+    stat = os.stat(path)
+    meta = _read_meta(meta_path)
+    cache_usable = (meta is not None
+                    and meta.get("format_version") == CACHE_FORMAT_VERSION
+                    and os.path.exists(cache_path))
+
+    if cache_usable and meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        try:
+            return read_cache(cache_path)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"✗ Ignoring unreadable player data cache: {e}")
+
+    digest = _file_sha256(path)
+    if cache_usable and meta.get("sha256") == digest:
+        try:
+            df = read_cache(cache_path)
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_meta(meta_path, meta)
+            return df
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"✗ Ignoring unreadable player data cache: {e}")
+
+    df = read_workbook(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_cache(df, cache_path)
+        _write_meta(meta_path, {
+            "format_version": CACHE_FORMAT_VERSION,
+            "source": os.path.abspath(path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "rows": len(df),
+            "built_at": time.time(),
+        })
+        # Serve from the shared memory map rather than this process's parsed copy
+        return read_cache(cache_path)
+    except (OSError, pa.ArrowException) as e:
+        # A read-only deployment can still serve from the workbook
+        print(f"✗ Could not write player data cache: {e}")
+    return df
+
+
+def _column_arrays(df):
+    """(rating, training_time, cost, position) arrays the optimizer works on"""
+    # A handful of distinct positions: the object array refers to one string per position
+    codes, positions = pd.factorize(df["final_position"], use_na_sentinel=False)
+    return (df["overall_rating"].to_numpy(dtype=np.float64),
+            df["training_time"].to_numpy(dtype=np.float64),
+            df["Cost"].to_numpy(dtype=np.float64) if "Cost" in df.columns else np.zeros(len(df)),
+            np.asarray(positions, dtype=object)[codes])
+
+
+class TeamRoster:
+    """One team's players plus contiguous column arrays for the optimizer.
+
+    Rosters that TeamIndex cuts from the whole table hold views of table-wide
+    arrays and build their DataFrame only when it is first used. Pickling sends
+    just the team's rows, never the table.
+    """
+
+    __slots__ = ("team_id", "rating", "training_time", "cost", "position", "_df", "_table", "_rows")
+
+    def __init__(self, team_id, df):
+        self.team_id = team_id
+        self._df, self._table, self._rows = df, None, None
+        self.rating, self.training_time, self.cost, self.position = _column_arrays(df)
+
+    @classmethod
+    def from_table(cls, team_id, table, rows, arrays):
+        """Roster for `rows` (a slice or index array) of `table`, given its _column_arrays"""
+        roster = cls.__new__(cls)
+        roster.team_id = team_id
+        roster._df, roster._table, roster._rows = None, table, rows
+        roster.rating, roster.training_time, roster.cost, roster.position = (a[rows] for a in arrays)
+        return roster
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = self._table.iloc[self._rows].reset_index(drop=True)
+            self._table = None
+        return self._df
+
+    def __reduce__(self):
+        return TeamRoster, (self.team_id, self.df)
+
+    def __len__(self):
+        return len(self.rating)
+
+
+class TeamIndex:
+    """Partition of the player table by team_id, built once per load of the data.
+
+    Rows are grouped with a single stable sort so each team's players keep their
+    workbook order and lookups are a dict access rather than a full-table mask.
+    A table that is already grouped (as load_player_data returns it) is sliced,
+    so the rosters share its memory instead of copying it. `version` increases
+    with every index built in this process. Each team's rows are hashed, for
+    diff() against an earlier index and as a cache key for per-team results.
+    Every roster is cut from this index's own table (slicing is O(1)), so an
+    old index and its table are freed once nothing else refers to them.
+    """
+
+    def __init__(self, df):
+        self.version = next(_index_versions)
+        self._df = df
+        self._teams = {}
+        self._team_hashes = {}
+        if df is None or df.empty:
+            self._fingerprint = hashlib.sha256(b"").hexdigest()
+            return
+        row_hashes = _row_hashes(df)
+        self._fingerprint = hashlib.sha256(row_hashes.tobytes()).hexdigest()
+        # Renamed or reordered columns change every team's hash
+        columns = "\x1f".join(map(str, df.columns)).encode()
+
+        arrays = _column_arrays(df)
+        team_ids = df["team_id"].to_numpy()
+        order = np.argsort(team_ids, kind="stable")
+        # Tables from load_player_data are already grouped by team: slice instead of copying
+        contiguous = bool(np.array_equal(order, np.arange(len(order))))
+        sorted_ids = team_ids[order]
+        boundaries = np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        for start, end in zip(starts, ends):
+            team_id = sorted_ids[start].item()
+            rows = slice(int(start), int(end)) if contiguous else order[start:end]
+            self._team_hashes[team_id] = hashlib.sha256(columns + row_hashes[rows].tobytes()).hexdigest()
+            self._teams[team_id] = TeamRoster.from_table(team_id, df, rows, arrays)
+
+    def get(self, team_id):
+        """Return the TeamRoster for team_id, or None if the team has no players"""
+        if team_id is None:
+            return None
+        return self._teams.get(team_id)
+
+    def team_hash(self, team_id):
+        """Content hash of one team's rows, or None if the team has no players"""
+        return self._team_hashes.get(team_id)
+
+    def diff(self, previous):
+        """Team ids added, removed and changed since the `previous` index"""
+        old = previous._team_hashes if previous is not None else {}
+        return {
+            "added": [t for t in self._team_hashes if t not in old],
+            "removed": [t for t in old if t not in self._team_hashes],
+            "changed": [t for t, h in self._team_hashes.items() if t in old and old[t] != h],
+        }
+
+    @property
+    def df(self):
+        return self._df
+
+    @property
+    def fingerprint(self):
+        """Content hash of the player table - stable across processes and restarts"""
+        return self._fingerprint
+
+    @property
+    def team_ids(self):
+        return list(self._teams.keys())
+
+    def __contains__(self, team_id):
+        return self.get(team_id) is not None
+
+    def __len__(self):
+        return len(self._teams)
+
+
+class LivePlayerData:
+    """The current TeamIndex for a workbook, reloaded in the background when the file changes.
+
+    A poll thread compares the workbook's mtime and size every `interval`
+    seconds. Once a change has been stable for one poll (so a file still being
+    written is left alone) the data is loaded again (through the columnar cache),
+    re-indexed, compared team by team with the current index, and the new
+    TeamIndex replaces `index` in one reference assignment. Requests should read `index` once and
+    use that snapshot throughout, so a reload never mixes two versions. A file
+    that cannot be read (e.g. half-saved) keeps the current data and is retried
+    on the next change.
+    """
+
+    def __init__(self, path, interval=RELOAD_INTERVAL, loader=load_player_data):
+        self.path = path
+        self.interval = interval
+        self.loader = loader
+        self.index = None
+        self.reloads = 0
+        self.last_reload = None
+        self.last_error = None
+        self._stat = None
+        self._pending_stat = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Load the workbook now; returns the new index (raises if the first load fails)"""
+        with self._lock:
+            # Recorded first, so a file that fails to load is not retried until it changes again
+            previous, self._stat, self._pending_stat = self.index, _file_stat(self.path), None
+            start = time.perf_counter()
+            index = TeamIndex(self.loader(self.path))
+            elapsed = time.perf_counter() - start
+            if previous is not None and index.fingerprint == previous.fingerprint:
+                return previous  # touched or re-saved without changes
+            self.index = index
+            if previous is not None:
+                changes = index.diff(previous)
+                self.reloads += 1
+                self.last_reload = {"at": time.time(), "seconds": round(elapsed, 3), "version": index.version,
+                                    **{k: len(v) for k, v in changes.items()}}
+                print(f"✓ Reloaded {self.path} in {elapsed:.2f}s: {len(changes['changed'])} teams changed, "
+                      f"{len(changes['added'])} added, {len(changes['removed'])} removed")
+            return index
+
+    def check(self):
+        """Reload if the workbook changed since the last load; returns True if the data was swapped"""
+        try:
+            stat = _file_stat(self.path)
+            if stat == self._stat:
+                return False
+            if stat != self._pending_stat and self.index is not None:
+                self._pending_stat = stat  # still changing? look again next poll
+                return False
+            previous = self.index
+            swapped = self.load() is not previous
+            self.last_error = None
+            return swapped
+        except Exception as e:
+            if repr(e) != self.last_error:  # e.g. a missing file is reported once, not on every poll
+                print(f"✗ Keeping current player data, reload failed: {e}")
+            self.last_error = repr(e)
+            return False
+
+    def start(self):
+        """Start the background poll thread (no-op when the interval is 0 or it already runs)"""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="tactiq-data-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        index = self.index
+        return {"path": self.path, "interval": self.interval, "version": index.version if index else None,
+                "fingerprint": index.fingerprint if index else None, "teams": len(index) if index else 0,
+                "reloads": self.reloads, "last_reload": self.last_reload, "last_error": self.last_error}
+
+
+def _row_hashes(df, chunk_rows=4096):
+    """hash_pandas_object of every row, a chunk at a time.
+
+    Hashing a string column boxes its values as Python objects; in chunks only a
+    few thousand are alive at once, so a memory-mapped table does not leave
+    every worker with a private copy of its strings.
+    """
+    return np.concatenate([pd.util.hash_pandas_object(df.iloc[start:start + chunk_rows], index=False).to_numpy()
+                           for start in range(0, len(df), chunk_rows)])
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_team_roster(data, team_id):
+    """Look up a team in a TeamIndex, or filter a plain DataFrame as a fallback
+
+    A TeamRoster is returned as-is, which lets worker processes receive just one
+    team's players instead of the whole table.
+    """
+    if isinstance(data, TeamIndex):
+        return data.get(team_id)
+    if isinstance(data, TeamRoster):
+        return data if data.team_id == team_id else None
+    team_df = data[data["team_id"] == team_id].reset_index(drop=True)
+    if team_df.empty:
+        return None
+    return TeamRoster(team_id, team_df)
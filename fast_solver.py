@@ -0,0 +1,105 @@
+"""Exact in-process solver for squad selection without budget constraints.
+
+With no training-time or cost cap, the squad problem only has role counts, the
+one-role-per-player rule and the all-rounder minimum. Players with the same set
+of eligible roles are interchangeable apart from their score, so an optimal
+squad always takes the best k of each group. A DP over the multi-role groups,
+with the state (players per role, all-rounders taken), solves it exactly
+without starting CBC.
+"""
+import itertools
+
+import numpy as np
+
+from optimizer import ALPHA, BETA, NUM_GOALKEEPERS, ROLES, eligibility_matrix
+
+_MID = ROLES.index("Mid")
+_DEF = ROLES.index("Defender")
+
+
+def _splits(role_indices, limits, max_total):
+    """Every way of spreading up to max_total players over role_indices within limits"""
+    ranges = [range(min(limits[r], max_total) + 1) for r in role_indices]
+    for counts in itertools.product(*ranges):
+        if sum(counts) <= max_total:
+            yield counts
+
+
+def solve_assignment(roster, num_defenders, num_midfielders, num_forwards):
+    """Optimal (player_index, role) assignment and objective, or (None, None) if infeasible"""
+    counts = {"Defender": num_defenders, "Mid": num_midfielders,
+              "Forward": num_forwards, "Goalkeeper": NUM_GOALKEEPERS}
+    target = tuple(counts[role] for role in ROLES)
+    if min(target) < 0:
+        return None, None
+
+    eligible = eligibility_matrix(roster.position)
+    score = ALPHA * roster.rating - BETA * roster.training_time
+    all_rounder = eligible[:, _MID] & eligible[:, _DEF]
+    required = min(2, int(all_rounder.sum()))
+
+    # Group players by eligibility pattern, best score first (roster order on ties)
+    patterns = {}
+    for i, row in enumerate(map(tuple, eligible)):
+        if any(row):
+            patterns.setdefault(row, []).append(i)
+    single = {r: ([], [0.0]) for r in range(len(ROLES))}
+    groups = []
+    for row, members in patterns.items():
+        members = sorted(members, key=lambda i: -score[i])
+        role_indices = [r for r, ok in enumerate(row) if ok]
+        prefix = [0.0] + np.cumsum(score[members]).tolist()
+        if len(role_indices) == 1:
+            single[role_indices[0]] = (members, prefix)
+        else:
+            groups.append((role_indices, members, prefix, bool(all_rounder[members[0]])))
+
+    # DP over the versatile groups only: states are (role counts..., all-rounders
+    # taken capped at 2) -> (value, back-pointer). Single-role players are filled
+    # in afterwards, since each role's remainder is just its best specialists.
+    start = (0,) * len(ROLES) + (0,)
+    layers = [{start: (0.0, None)}]
+    for role_indices, members, prefix, is_all_rounder in groups:
+        following = {}
+        for state, (value, _) in layers[-1].items():
+            remaining = [target[r] - state[r] for r in range(len(ROLES))]
+            for split in _splits(role_indices, remaining, len(members)):
+                k = sum(split)
+                new_counts = list(state[:-1])
+                for r, c in zip(role_indices, split):
+                    new_counts[r] += c
+                taken = min(2, state[-1] + k) if is_all_rounder else state[-1]
+                new_state = tuple(new_counts) + (taken,)
+                new_value = value + prefix[k]
+                best = following.get(new_state)
+                if best is None or new_value > best[0]:
+                    following[new_state] = (new_value, (state, split))
+        layers.append(following)
+
+    best_value, best_state = None, None
+    for state, (value, _) in layers[-1].items():
+        if state[-1] < required:
+            continue
+        for r in range(len(ROLES)):
+            missing = target[r] - state[r]
+            if missing >= len(single[r][1]):
+                break
+            value += single[r][1][missing]
+        else:
+            if best_value is None or value > best_value:
+                best_value, best_state = value, state
+    if best_state is None:
+        return None, None
+
+    assignment = []
+    for r in range(len(ROLES)):
+        members = single[r][0]
+        assignment.extend((i, ROLES[r]) for i in members[:target[r] - best_state[r]])
+    state = best_state
+    for layer, (role_indices, members, _, _) in zip(reversed(layers[1:]), reversed(groups)):
+        state, split = layer[state][1]
+        chosen = iter(members)
+        for r, c in zip(role_indices, split):
+            assignment.extend((next(chosen), ROLES[r]) for _ in range(c))
+    assignment.sort()
+    return assignment, float(best_value)
@@ -0,0 +1,156 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from data_loader import TeamIndex, get_team_roster
+from jobs import FORK_LOCK
+from optimizer import SOLUTION_CACHE, solution_cache_key, solve_squad
+
+OUTFIELD_PLAYERS = 10
+
+# Sensible tactical ranges per line (see README "Basic Workflow")
+DEFENDER_BOUNDS = (3, 5)
+MIDFIELDER_BOUNDS = (2, 6)
+FORWARD_BOUNDS = (1, 4)
+
+SWEEP_WORKERS = int(os.getenv("TACTIQ_SWEEP_WORKERS", 0)) or os.cpu_count() or 1
+
+_SHARED_POOL = None
+_SHARED_POOL_LOCK = threading.Lock()
+
+SWEEP_COLUMNS = ['rank', 'formation', 'defenders', 'midfielders', 'forwards', 'status', 'objective_value',
+                 'total_rating', 'total_training_time', 'total_cost', 'solve_time', 'message']
+
+
+def enumerate_formations(defender_bounds=DEFENDER_BOUNDS, midfielder_bounds=MIDFIELDER_BOUNDS,
+                         forward_bounds=FORWARD_BOUNDS, outfield_players=OUTFIELD_PLAYERS):
+    """Every (defenders, midfielders, forwards) split of the outfield players within the bounds"""
+    formations = []
+    for d in range(defender_bounds[0], defender_bounds[1] + 1):
+        for m in range(midfielder_bounds[0], midfielder_bounds[1] + 1):
+            f = outfield_players - d - m
+            if forward_bounds[0] <= f <= forward_bounds[1]:
+                formations.append((d, m, f))
+    return formations
+
+
+def shared_pool():
+    """The process pool of SWEEP_WORKERS processes shared by every sweep and sensitivity run here.
+
+    Created on first use and kept, so concurrent clicks queue on a fixed
+    number of processes instead of each starting a pool of their own.
+    """
+    global _SHARED_POOL
+    with _SHARED_POOL_LOCK:
+        if _SHARED_POOL is None:
+            _SHARED_POOL = ProcessPoolExecutor(max_workers=SWEEP_WORKERS)
+            atexit.register(_SHARED_POOL.shutdown)
+        return _SHARED_POOL
+
+
+def run_in_pool(fn, argument_lists, workers=None):
+    """fn(*args) for every args in argument_lists on a process pool; results in order.
+
+    workers=None uses shared_pool(); a number starts a private pool of that
+    size for this call (command line tools, benchmarks). Pool processes are
+    forked under the job fork lock, so they never inherit a SQLite lock that
+    another server thread holds.
+    """
+    global _SHARED_POOL
+    if workers is None:
+        pool = shared_pool()
+        try:
+            with FORK_LOCK:
+                futures = [pool.submit(fn, *args) for args in argument_lists]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A pool process died (e.g. killed for memory): start a new pool next time
+            with _SHARED_POOL_LOCK:
+                if _SHARED_POOL is pool:
+                    _SHARED_POOL = None
+            raise
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        with FORK_LOCK:
+            futures = [pool.submit(fn, *args) for args in argument_lists]
+        return [future.result() for future in futures]
+
+
+def timed_solve(roster, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                settings=None):
+    """solve_squad plus its wall-clock time (runs inside pool workers)"""
+    start = time.perf_counter()
+    result = solve_squad(roster, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                         settings)
+    return result, time.perf_counter() - start
+
+
+def summarize_result(formation, result, solve_time):
+    """One summary row - totals, or the error message - for a solve_squad result"""
+    d, m, f = formation
+    row = {'formation': f"{d}-{m}-{f}", 'defenders': d, 'midfielders': m, 'forwards': f, 'solve_time': solve_time}
+    if result[0] is None:
+        row.update(status='Infeasible', message=result[1])
+        return row
+    selected_df, status, objective_value = result
+    row.update(
+        status=status,
+        objective_value=float(objective_value),
+        total_rating=float(selected_df['overall_rating'].sum()),
+        total_training_time=float(selected_df['training_time'].sum()),
+        total_cost=float(selected_df['cost'].sum()),
+        message='',
+    )
+    return row
+
+
+def sweep_formations(data, team_id, max_training_time=None, max_cost=None, formations=None, workers=None,
+                     settings=None):
+    """Solve every formation for a team and rank them by objective value.
+
+    Formations default to enumerate_formations(). Uncached formations are solved
+    concurrently on shared_pool(), or on a private pool of `workers` processes
+    (1 solves in-process).
+    Returns a DataFrame with one row per formation, best first; infeasible
+    formations come last with their error message.
+    """
+    if formations is None:
+        formations = enumerate_formations()
+    roster = get_team_roster(data, team_id)
+    if roster is None:
+        raise ValueError("No players found for the selected Team ID")
+
+    use_cache = isinstance(data, TeamIndex)
+    results = {}
+    pending = []
+    for formation in formations:
+        cached = SOLUTION_CACHE.get(solution_cache_key(team_id, *formation, max_training_time, max_cost, settings),
+                                    data) if use_cache else None
+        if cached is not None:
+            results[formation] = (cached, 0.0)
+        else:
+            pending.append(formation)
+
+    if len(pending) == 1 or (workers or SWEEP_WORKERS) == 1:
+        for formation in pending:
+            results[formation] = timed_solve(roster, team_id, *formation, max_training_time, max_cost, settings)
+    elif pending:
+        solved = run_in_pool(timed_solve, [(roster, team_id, *formation, max_training_time, max_cost, settings)
+                                           for formation in pending],
+                             min(workers, len(pending)) if workers else None)
+        results.update(zip(pending, solved))
+
+    if use_cache:
+        for formation in pending:
+            SOLUTION_CACHE.put(solution_cache_key(team_id, *formation, max_training_time, max_cost, settings),
+                               data, results[formation][0])
+
+    table = pd.DataFrame([summarize_result(formation, *results[formation]) for formation in formations],
+                         columns=SWEEP_COLUMNS[1:])
+    table = table.sort_values('objective_value', ascending=False, na_position='last', kind='stable')
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    return table.reset_index(drop=True)
@@ -0,0 +1,144 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from data_loader import get_team_roster
+from fast_solver import solve_assignment
+from optimizer import SquadModel
+
+FRONTIER_POINTS = 12
+
+BUDGET_LABELS = {
+    "training_time": "Total Training Time (hrs)",
+    "cost": "Total Cost",
+}
+
+
+def _mark_pareto(points, budget):
+    """Flag points no other point beats on both rating (higher) and budget use (lower)"""
+    rating = points['total_rating'].to_numpy()
+    used = points[f'total_{budget}'].to_numpy()
+    pareto = []
+    for r, u in zip(rating, used):
+        dominated = np.any((rating >= r) & (used <= u) & ((rating > r) | (used < u)))
+        pareto.append(not dominated)
+    return pareto
+
+
+def cheapest_squad(roster, values, num_defenders, num_midfielders, num_forwards):
+    """The squad that meets the formation rules with the smallest total of `values` (a budget), or None.
+
+    Solved exactly in-process by fast_solver with the budget as a negative rating.
+    """
+    relaxed = SimpleNamespace(position=roster.position, rating=-np.asarray(values, dtype=float),
+                              training_time=np.zeros(len(values)))
+    assignment, _ = solve_assignment(relaxed, num_defenders, num_midfielders, num_forwards)
+    return assignment
+
+
+def compute_frontier(data, team_id, num_defenders, num_midfielders, num_forwards, budget="training_time",
+                     num_points=FRONTIER_POINTS, max_training_time=None, max_cost=None, warm_start=True,
+                     settings=None):
+    """Epsilon-constraint sweep of one budget for a team and formation.
+
+    The swept budget runs from what the cheapest squad meeting the formation
+    rules uses (cheapest_squad) up to what the unconstrained optimum uses. One
+    SquadModel is reused for every level - only the budget's right-hand side
+    changes - and levels are solved from tightest to loosest. The cheapest
+    squad is the MIP start of the first level and each squad found the start
+    of the next, so every start fits the level's budget. The other budget
+    stays fixed at the given limit; a level it makes infeasible is kept as
+    such.
+
+    `settings` are passed to the solver (see optimizer.solver_settings()).
+
+    Returns (points DataFrame, total solve seconds). Infeasible levels are kept
+    with their status; `pareto` marks the non-dominated squads.
+    """
+    if budget not in BUDGET_LABELS:
+        raise ValueError(f"Unknown budget '{budget}' - use one of {', '.join(BUDGET_LABELS)}")
+    roster = get_team_roster(data, team_id)
+    if roster is None:
+        raise ValueError("No players found for the selected Team ID")
+
+    limits = {"training_time": max_training_time, "cost": max_cost}
+    limits[budget] = None
+    start = time.perf_counter()
+    model = SquadModel(roster, num_defenders, num_midfielders, num_forwards,
+                       limits["training_time"], limits["cost"])
+    model.solve(settings)
+    if not model.has_solution:
+        raise ValueError("No feasible squad for this formation and budget")
+
+    values = model.budget_values(budget)
+    upper = float(values[[i for i, _ in model.assignment()]].sum())
+    cheapest = cheapest_squad(roster, values, num_defenders, num_midfielders, num_forwards)
+    lower = float(values[[i for i, _ in cheapest]].sum())
+    levels = np.linspace(lower, upper, num_points) if upper > lower else np.array([upper])
+    if warm_start:
+        model.set_start(cheapest)
+
+    rows = []
+    for level in levels:
+        model.set_budget(budget, float(level))
+        level_start = time.perf_counter()
+        status = model.solve(settings, warm_start=warm_start)
+        row = {'budget_level': float(level), 'status': status, 'solve_time': time.perf_counter() - level_start}
+        if model.has_solution:
+            selected_df = model.selected_players()
+            row.update(
+                objective_value=float(model.objective_value()),
+                total_rating=float(selected_df['overall_rating'].sum()),
+                total_training_time=float(selected_df['training_time'].sum()),
+                total_cost=float(selected_df['cost'].sum()),
+                players=', '.join(selected_df['player_name'].astype(str)),
+            )
+        rows.append(row)
+    elapsed = time.perf_counter() - start
+
+    points = pd.DataFrame(rows, columns=['budget_level', 'status', 'objective_value', 'total_rating',
+                                         'total_training_time', 'total_cost', 'players', 'solve_time'])
+    feasible = points['objective_value'].notna()
+    points['pareto'] = False
+    if feasible.any():
+        points.loc[feasible, 'pareto'] = _mark_pareto(points[feasible], budget)
+    return points, elapsed
+
+
+def create_frontier_figure(points, budget):
+    """Plotly chart of squad rating against the swept budget"""
+    fig = go.Figure()
+    feasible = points[points['objective_value'].notna()].drop_duplicates(subset=['players'])
+    frontier = feasible[feasible['pareto']].sort_values(f'total_{budget}')
+    dominated = feasible[~feasible['pareto']]
+
+    fig.add_trace(go.Scatter(
+        x=frontier[f'total_{budget}'], y=frontier['total_rating'],
+        mode='lines+markers', name='Pareto frontier',
+        line=dict(color='#27ae60', width=2, shape='hv'), marker=dict(size=9, color='#27ae60'),
+        customdata=frontier[['objective_value', 'total_training_time', 'total_cost']],
+        hovertemplate=('Rating: %{y:.0f}<br>Training: %{customdata[1]:.1f} hrs<br>'
+                       'Cost: $%{customdata[2]:,.0f}<br>Objective: %{customdata[0]:.2f}<extra></extra>')
+    ))
+    if len(dominated) > 0:
+        fig.add_trace(go.Scatter(
+            x=dominated[f'total_{budget}'], y=dominated['total_rating'],
+            mode='markers', name='Dominated', marker=dict(size=7, color='#bdc3c7'),
+            hovertemplate='Rating: %{y:.0f}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        xaxis_title=BUDGET_LABELS[budget],
+        yaxis_title='Total Team Rating',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        margin=dict(l=40, r=20, t=20, b=40),
+        height=360,
+        legend=dict(orientation='h', y=1.08)
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='#ecf0f1')
+    fig.update_yaxes(showgrid=True, gridcolor='#ecf0f1')
+    return fig
@@ -0,0 +1,15 @@
+"""Gunicorn settings, read automatically when gunicorn is started from this directory.
+
+The player data cache is built once, in the master before any worker starts.
+Every worker then memory-maps that one file (data_loader.read_cache) instead
+of parsing the workbook into a private copy of its own.
+"""
+from data_loader import PLAYER_DATA_PATH, load_player_data
+
+
+def on_starting(server):
+    try:
+        players = load_player_data(PLAYER_DATA_PATH)
+        server.log.info("Player data cache ready: %d players", len(players))
+    except Exception as e:  # each worker reports the failure again when it loads
+        server.log.warning("Could not prepare the player data cache: %s", e)
@@ -0,0 +1,224 @@
+"""Per-stage latency histograms for Build Squad and the AI coach, plus request logs.
+
+A request handler is wrapped with `traced("optimize")`. Inside it,
+`with stage("solve"):` times a step. It works from any module the request
+calls into, because the active trace is kept in a context variable. When the
+request ends:
+
+- its own duration and every stage duration go into cumulative histograms
+  (one diskcache transaction, so background-job processes and the web
+  workers share the counts),
+- one JSON log line is printed with the stage breakdown.
+
+Stages run outside a traced request (bulk runs, benchmarks) are not recorded.
+STAGE_METRICS.render() gives the Prometheus text served at /metrics.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import diskcache
+except ImportError:  # histograms are kept per process
+    diskcache = None
+
+from jobs import ForkSafeCache
+
+METRICS_DIR = os.getenv("TACTIQ_METRICS_DIR", os.path.join(".tactiq_cache", "metrics"))
+REQUEST_LOG_ENABLED = os.getenv("TACTIQ_REQUEST_LOG", "1") != "0"
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_FAMILIES = {
+    "request": ("tactiq_request_duration_seconds", "tactiq_request_errors_total", "handler",
+                "Time to answer a Build Squad or chat request", "Requests that failed or showed an error"),
+    "stage": ("tactiq_stage_duration_seconds", "tactiq_stage_errors_total", "stage",
+              "Time spent in one stage of a request", "Stages that raised an exception"),
+}
+
+_current_trace = contextvars.ContextVar("tactiq_request_trace", default=None)
+
+
+class StageMetrics:
+    """Cumulative latency histograms, error and call counts per (kind, name).
+
+    With a `directory` the counters live in a diskcache that every process
+    updates atomically; otherwise in a dict for this process only.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, directory=None):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._cache = None
+        if directory is not None and diskcache is not None:
+            self._cache = ForkSafeCache(diskcache.Cache(directory))
+        self._counters = {}
+
+    def record(self, observations):
+        """Add (kind, name, seconds, error) observations in one update"""
+        increments = {}
+        for kind, name, seconds, error in observations:
+            bucket = bisect.bisect_left(self.buckets, seconds)
+            for key, delta in (((kind, name, "count"), 1), ((kind, name, "sum_us"), int(seconds * 1e6)),
+                               ((kind, name, "bucket", bucket), 1), ((kind, name, "errors"), int(error))):
+                increments[key] = increments.get(key, 0) + delta
+        if self._cache is not None:
+            with self._cache.transact():
+                for key, delta in increments.items():
+                    self._cache.incr(key, delta)
+        else:
+            with self._lock:
+                for key, delta in increments.items():
+                    self._counters[key] = self._counters.get(key, 0) + delta
+
+    def snapshot(self):
+        """{(kind, name): {'count', 'sum', 'errors', 'buckets': cumulative counts}}"""
+        if self._cache is not None:
+            counters = {key: self._cache.get(key, 0) for key in list(self._cache)}
+        else:
+            with self._lock:
+                counters = dict(self._counters)
+        series = {}
+        for key, value in counters.items():
+            entry = series.setdefault(key[:2], {"count": 0, "sum": 0.0, "errors": 0,
+                                                "buckets": [0] * (len(self.buckets) + 1)})
+            if key[2] == "bucket":
+                entry["buckets"][key[3]] += value
+            elif key[2] == "sum_us":
+                entry["sum"] = value / 1e6
+            else:
+                entry[key[2]] = value
+        for entry in series.values():
+            running = 0
+            for i, value in enumerate(entry["buckets"]):
+                running += value
+                entry["buckets"][i] = running
+        return series
+
+    def render(self):
+        """Prometheus text exposition format"""
+        series = self.snapshot()
+        lines = []
+        for kind, (histogram, errors, label, help_text, errors_help) in METRIC_FAMILIES.items():
+            names = sorted(name for series_kind, name in series if series_kind == kind)
+            lines += [f"# HELP {histogram} {help_text}", f"# TYPE {histogram} histogram"]
+            for name in names:
+                entry = series[(kind, name)]
+                for bound, count in zip(self.buckets + ("+Inf",), entry["buckets"]):
+                    lines.append(f'{histogram}_bucket{{{label}="{name}",le="{bound}"}} {count}')
+                lines.append(f'{histogram}_sum{{{label}="{name}"}} {entry["sum"]:.6f}')
+                lines.append(f'{histogram}_count{{{label}="{name}"}} {entry["count"]}')
+            lines += [f"# HELP {errors} {errors_help}", f"# TYPE {errors} counter"]
+            lines += [f'{errors}{{{label}="{name}"}} {series[(kind, name)]["errors"]}' for name in names]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+        with self._lock:
+            self._counters.clear()
+
+
+def _create_stage_metrics():
+    try:
+        return StageMetrics(directory=os.path.join(METRICS_DIR, "stages"))
+    except OSError as e:
+        print(f"✗ Stage metrics kept per process: {e}")
+        return StageMetrics()
+
+
+STAGE_METRICS = _create_stage_metrics()
+
+
+class RequestTrace:
+    """Stage timings and log fields of the request being handled"""
+    __slots__ = ("handler", "fields", "stages", "error")
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.fields = {}
+        self.stages = []
+        self.error = None
+
+
+@contextmanager
+def request_trace(handler, metrics=None):
+    """Trace one request: record its stages and duration, then log it"""
+    trace = RequestTrace(handler)
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = trace.error or repr(e)
+        raise
+    finally:
+        _current_trace.reset(token)
+        _finish(trace, time.perf_counter() - start, metrics or STAGE_METRICS)
+
+
+def traced(handler):
+    """Decorator form of request_trace"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with request_trace(handler):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage(name):
+    """Time a step of the current request (a no-op timer outside one)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_stage(name, time.perf_counter() - start, error=True)
+        raise
+    record_stage(name, time.perf_counter() - start)
+
+
+def record_stage(name, seconds, error=False):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stages.append((name, seconds, error))
+
+
+def annotate(**fields):
+    """Add fields to the current request's log line"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+def mark_error(error):
+    """Count the current request as failed even though the handler recovered"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.error = error if isinstance(error, str) else repr(error)
+
+
+def _finish(trace, seconds, metrics):
+    failed = trace.error is not None
+    observations = [("request", trace.handler, seconds, failed)]
+    observations += [("stage", name, stage_seconds, error) for name, stage_seconds, error in trace.stages]
+    try:
+        metrics.record(observations)
+    except Exception as e:  # metrics must never fail a request
+        print(f"✗ Could not record request metrics: {e}")
+    if REQUEST_LOG_ENABLED:
+        stages = {}
+        for name, stage_seconds, _ in trace.stages:
+            stages[name] = round(stages.get(name, 0.0) + stage_seconds * 1000, 2)
+        line = {"event": "request", "handler": trace.handler, "outcome": "error" if failed else "ok",
+                "duration_ms": round(seconds * 1000, 2), "stages_ms": stages, **trace.fields}
+        if failed:
+            line["error"] = trace.error
+        print(json.dumps(line, default=str), flush=True)
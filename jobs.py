@@ -0,0 +1,131 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import diskcache
+    import psutil
+    from dash import DiskcacheManager
+except ImportError:  # dash[diskcache] extras not installed - callbacks run synchronously
+    diskcache = None
+    DiskcacheManager = None
+
+JOB_CACHE_DIR = os.getenv("TACTIQ_JOB_CACHE_DIR", os.path.join(".tactiq_cache", "jobs"))
+BACKGROUND_JOBS_ENABLED = os.getenv("TACTIQ_BACKGROUND_JOBS", "1") != "0"
+# Background jobs run at lower CPU priority so they never starve the web workers
+JOB_NICENESS = int(os.getenv("TACTIQ_JOB_NICENESS", 5))
+
+
+# Held around every fork in this process (background jobs, sweep pool) and
+# every call on a diskcache the children share - the job queue, sessions,
+# stage and reply metrics, the solution, response and assistant caches - so
+# a child never starts while another server thread is inside SQLite on one of
+# them (it would inherit SQLite's in-process lock state and could wait for a
+# lock nobody releases, losing its result after the cache timeout)
+FORK_LOCK = threading.RLock()
+
+
+class ForkSafeCache:
+    """Proxy for a diskcache Cache or Deque whose calls never overlap a fork"""
+
+    def __init__(self, cache, lock=FORK_LOCK):
+        self._cache = cache
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._cache, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._cache))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._cache
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._cache[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._cache[key]
+
+    @contextmanager
+    def transact(self, retry=False):
+        with self._lock, self._cache.transact(retry):
+            yield
+
+
+if DiskcacheManager is not None:
+    class JobManager(DiskcacheManager):
+        """DiskcacheManager hardened for a multi-threaded web server.
+
+        - Job processes are forked under FORK_LOCK, with the job cache
+          wrapped in ForkSafeCache.
+        - Jobs that exit while they are being cleaned up are ignored. Dash
+          kills a finished job's process tree when its result is fetched. A
+          job that exited between the existence check and the child lookup
+          made psutil raise NoSuchProcess, and the poll failed with a 500.
+        """
+
+        def __init__(self, cache):
+            super().__init__(cache)
+            self.handle = ForkSafeCache(cache)
+
+        def call_job_fn(self, key, job_fn, args, context):
+            with FORK_LOCK:
+                return super().call_job_fn(key, job_fn, args, context)
+
+        def terminate_job(self, job):
+            try:
+                super().terminate_job(job)
+            except psutil.NoSuchProcess:
+                pass
+
+
+def create_job_manager():
+    """Local background-callback manager (disk-backed queue, one process per job).
+
+    Finished results are handed out once and dropped, never reused for a
+    repeated request.
+
+    Returns None when background jobs are disabled or the diskcache extras are
+    missing, in which case callers register ordinary synchronous callbacks.
+    """
+    if not BACKGROUND_JOBS_ENABLED or DiskcacheManager is None:
+        return None
+    try:
+        cache = diskcache.Cache(JOB_CACHE_DIR)
+        return JobManager(cache)
+    except (ImportError, OSError) as e:
+        print(f"✗ Background jobs disabled: {e}")
+        return None
+
+
+def lower_job_priority():
+    """Call at the start of a background job (runs in the job's own process)"""
+    if JOB_NICENESS > 0 and hasattr(os, "nice"):
+        try:
+            os.nice(JOB_NICENESS)
+        except OSError:
+            pass
+
+
+def ignore_progress(_value):
+    """Stand-in for Dash's set_progress when a callback runs synchronously"""
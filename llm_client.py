@@ -0,0 +1,288 @@
+"""Resilient client for the AI coach's language model.
+
+AssistantClient has the same `models.generate_content_stream()` interface as
+`genai.Client`, so assistant.stream_reply() works with either, and adds:
+
+- a bounded thread pool that runs each stream, so a stalled call never blocks
+  past its deadline,
+- a per-call deadline covering queueing, retries and the whole stream,
+- jittered exponential retry of transient errors (before the first chunk),
+- a circuit breaker that fails fast after repeated failures,
+- a concurrency limit shared by every process (web workers and background jobs).
+
+The backend is created lazily on first use, so a missing GEMINI_API_KEY no
+longer fails at import. The "stub" backend answers locally with no network.
+"""
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from google import genai
+from google.genai import errors, types
+
+from assistant import FakeStreamingClient
+from jobs import ForkSafeCache
+
+try:
+    import diskcache
+except ImportError:  # limits and breaker state are per process
+    diskcache = None
+
+try:
+    import httpx
+    _TRANSPORT_ERRORS = (httpx.TransportError,)
+except ImportError:
+    _TRANSPORT_ERRORS = ()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# "gemini" or "stub"; defaults to the stub when no API key is configured
+LLM_BACKEND = os.getenv("TACTIQ_LLM_BACKEND") or ("gemini" if GEMINI_API_KEY else "stub")
+LLM_MAX_CONCURRENT = int(os.getenv("TACTIQ_LLM_MAX_CONCURRENT", 4))
+LLM_DEADLINE = float(os.getenv("TACTIQ_LLM_DEADLINE", 30))  # seconds per reply
+LLM_RETRIES = int(os.getenv("TACTIQ_LLM_RETRIES", 2))
+LLM_BREAKER_THRESHOLD = int(os.getenv("TACTIQ_LLM_BREAKER_THRESHOLD", 5))  # consecutive failures
+LLM_BREAKER_COOLDOWN = float(os.getenv("TACTIQ_LLM_BREAKER_COOLDOWN", 30))  # seconds
+LLM_STATE_DIR = os.getenv("TACTIQ_LLM_STATE_DIR", os.path.join(".tactiq_cache", "llm"))
+
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class AssistantUnavailable(RuntimeError):
+    """The call was refused before reaching the model (breaker open, all slots busy, no API key)"""
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def _gemini_backend():
+    if not GEMINI_API_KEY:
+        raise AssistantUnavailable("GEMINI_API_KEY is not set - add it to .env or set TACTIQ_LLM_BACKEND=stub")
+    return genai.Client(api_key=GEMINI_API_KEY,
+                        http_options=types.HttpOptions(timeout=int(LLM_DEADLINE * 1000)))
+
+
+# Backend name -> factory returning an object with models.generate_content_stream()
+BACKENDS = {
+    "gemini": _gemini_backend,
+    "stub": FakeStreamingClient,
+}
+
+
+def is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections"""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError) + _TRANSPORT_ERRORS)
+
+
+def retry_delay(attempt):
+    """Exponential backoff with full-range jitter, so retries from many users spread out"""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class LocalSlots:
+    """Concurrency limit within one process"""
+
+    def __init__(self, limit):
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self, timeout):
+        return object() if self._semaphore.acquire(timeout=max(timeout, 0)) else None
+
+    def release(self, token):
+        self._semaphore.release()
+
+
+class SharedSlots:
+    """Concurrency limit across processes: `limit` leased keys in a diskcache.
+
+    A slot is held by adding its key; leases expire after `lease` seconds so a
+    crashed process cannot leak a slot.
+    """
+
+    def __init__(self, cache, limit, lease, poll=0.05):
+        self._cache = cache
+        self._keys = [f"llm-slot-{i}" for i in range(limit)]
+        self._lease = lease
+        self._poll = poll
+
+    def acquire(self, timeout):
+        token = uuid.uuid4().hex
+        give_up = time.monotonic() + timeout
+        while True:
+            for key in random.sample(self._keys, len(self._keys)):
+                if self._cache.add(key, token, expire=self._lease):
+                    return key, token
+            if time.monotonic() >= give_up:
+                return None
+            time.sleep(self._poll)
+
+    def release(self, held):
+        key, token = held
+        with self._cache.transact():
+            if self._cache.get(key) == token:
+                self._cache.delete(key)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and stays open for `cooldown` seconds.
+
+    `state` is a dict, or a diskcache.Cache to share the breaker between processes.
+    After the cooldown one trial call is let through (half-open); its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold, cooldown, state=None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._state = state if state is not None else {}
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise AssistantUnavailable while the breaker is open"""
+        with self._lock:
+            open_until = self._state.get("breaker-open-until", 0.0)
+            now = time.time()
+            if now < open_until:
+                raise AssistantUnavailable(f"The AI coach is paused after repeated errors - "
+                                           f"try again in {open_until - now:.0f}s")
+            if open_until:
+                # Half-open: this call is the trial, everyone else waits another cooldown
+                self._state["breaker-open-until"] = now + self.cooldown
+
+    def record_success(self):
+        with self._lock:
+            self._state["breaker-failures"] = 0
+            self._state["breaker-open-until"] = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            failures = self._state.get("breaker-failures", 0) + 1
+            self._state["breaker-failures"] = failures
+            if failures >= self.threshold:
+                self._state["breaker-open-until"] = time.time() + self.cooldown
+
+    def stats(self):
+        open_until = self._state.get("breaker-open-until", 0.0)
+        return {"open": time.time() < open_until, "consecutive_failures": self._state.get("breaker-failures", 0)}
+
+
+class AssistantClient:
+    """Drop-in for genai.Client (streaming only) with deadlines, retries, breaker and limits"""
+
+    def __init__(self, backend=LLM_BACKEND, max_concurrent=LLM_MAX_CONCURRENT, deadline=LLM_DEADLINE,
+                 retries=LLM_RETRIES, breaker_threshold=LLM_BREAKER_THRESHOLD,
+                 breaker_cooldown=LLM_BREAKER_COOLDOWN, state_dir=None):
+        self.backend = backend
+        self.deadline = deadline
+        self.retries = retries
+        self.max_concurrent = max_concurrent
+        self._factory = BACKENDS[backend] if isinstance(backend, str) else backend
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        state = ForkSafeCache(diskcache.Cache(state_dir)) if state_dir is not None and diskcache is not None else None
+        if state is not None:
+            self._slots = SharedSlots(state, max_concurrent, lease=deadline + 5)
+        else:
+            self._slots = LocalSlots(max_concurrent)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown, state)
+
+    @property
+    def models(self):
+        return self
+
+    def generate_content_stream(self, model, contents, config=None, deadline=None):
+        """Yield response chunks; raises DeadlineExceeded, AssistantUnavailable or the backend error"""
+        give_up = time.monotonic() + (deadline or self.deadline)
+        self.breaker.check()
+        held = self._slots.acquire(timeout=give_up - time.monotonic())
+        if held is None:
+            raise AssistantUnavailable("The AI coach is busy with other questions - please try again shortly")
+        try:
+            attempt = 0
+            while True:
+                started = False
+                cancelled = threading.Event()
+                chunks = queue.Queue()
+                self._executor().submit(self._pump, model, contents, config, chunks, cancelled)
+                try:
+                    while True:
+                        remaining = give_up - time.monotonic()
+                        try:
+                            kind, value = chunks.get(timeout=max(remaining, 0))
+                        except queue.Empty:
+                            raise DeadlineExceeded(f"No answer within {deadline or self.deadline:.0f}s")
+                        if kind == "error":
+                            raise value
+                        if kind == "done":
+                            self.breaker.record_success()
+                            return
+                        started = True
+                        yield value
+                except Exception as e:
+                    cancelled.set()
+                    delay = retry_delay(attempt)
+                    if (started or attempt >= self.retries or not is_retryable(e)
+                            or isinstance(e, DeadlineExceeded) or time.monotonic() + delay >= give_up):
+                        self.breaker.record_failure()
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+                finally:
+                    cancelled.set()
+        finally:
+            self._slots.release(held)
+
+    @property
+    def backend_name(self):
+        return self.backend if isinstance(self.backend, str) else "custom"
+
+    def stats(self):
+        return {"backend": self.backend_name,
+                "max_concurrent": self.max_concurrent, "deadline": self.deadline, "retries": self.retries,
+                **self.breaker.stats()}
+
+    def _backend_client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._factory()
+            return self._client
+
+    def _executor(self):
+        # Background jobs are forked from the web process - never reuse the parent's threads
+        if self._pool_pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="llm")
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _pump(self, model, contents, config, chunks, cancelled):
+        """Runs on the pool: forward the backend's stream into the queue"""
+        try:
+            for chunk in self._backend_client().models.generate_content_stream(model=model, contents=contents,
+                                                                               config=config):
+                if cancelled.is_set():
+                    return
+                chunks.put(("chunk", chunk))
+            chunks.put(("done", None))
+        except Exception as e:
+            chunks.put(("error", e))
+
+
+def create_assistant_client():
+    """AssistantClient for the configured backend, sharing limits through LLM_STATE_DIR"""
+    if LLM_BACKEND == "stub":
+        print("✓ AI coach using the local stub backend (no Gemini calls)")
+    try:
+        return AssistantClient(state_dir=LLM_STATE_DIR)
+    except OSError as e:
+        print(f"✗ AI coach limits kept per process: {e}")
+        return AssistantClient()
@@ -0,0 +1,140 @@
+"""Long-lived solver process that keeps each session's squad model between clicks.
+
+Build Squad runs in a background job: a process forked for one click that
+exits afterwards, so a model it kept would be lost, and one pickled to disk
+costs as much to load and save as the rebuild it saves. Instead every web
+process starts one ModelServer - a child process holding a SquadModelPool in
+memory and listening on a Unix socket. Jobs inherit its address when they are
+forked, send the roster and the new formation and budgets, and get the squad
+back; the model stays in the server, updated in place and warm-started on the
+session's next click.
+
+ModelServer.solve has the same signature as SquadModelPool.solve, so either
+can be passed to run_optimization as its `pool`.
+"""
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+from instrumentation import stage
+from jobs import FORK_LOCK
+from optimizer import SquadModel, SquadModelPool
+
+MODEL_SERVER_SESSIONS = int(os.getenv("TACTIQ_MODEL_SERVER_SESSIONS", 64))  # models kept, least recently used out
+START_TIMEOUT = 10  # seconds
+
+
+class SolvedSquad:
+    """The parts of a solved SquadModel that run_optimization reads, sent back from the server"""
+    __slots__ = ("has_solution", "_assignment", "_objective")
+
+    def __init__(self, assignment, objective):
+        self.has_solution = assignment is not None
+        self._assignment = assignment
+        self._objective = objective
+
+    def assignment(self):
+        return self._assignment
+
+    def objective_value(self):
+        return self._objective
+
+
+class ModelServer:
+    """Client handle of a solver process; start() it in the web process before jobs fork"""
+
+    def __init__(self, maxsize=MODEL_SERVER_SESSIONS):
+        self.maxsize = maxsize
+        self.address = None
+        self._authkey = os.urandom(32)
+        self._process = None
+
+    def start(self):
+        """Start the solver process and wait until it accepts connections"""
+        directory = tempfile.mkdtemp(prefix="tactiq-models-")
+        self.address = os.path.join(directory, "models.sock")
+        ready, notify = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.get_context("fork").Process(
+            target=_serve, args=(self.address, self._authkey, self.maxsize, notify), daemon=True)
+        with FORK_LOCK:
+            self._process.start()
+        notify.close()
+        owner = os.getpid()
+        atexit.register(lambda: os.getpid() == owner and shutil.rmtree(directory, ignore_errors=True))
+        if not ready.poll(START_TIMEOUT):
+            self._process.terminate()
+            raise OSError("model server did not start")
+        ready.recv()
+        return self
+
+    def solve(self, session, roster_key, roster, num_defenders, num_midfielders, num_forwards,
+              max_training_time=None, max_cost=None, settings=None):
+        """Solve on the session's model in the server; returns (squad, status, reused).
+
+        If the server cannot be reached the model is built and solved here, as
+        without a pool.
+        """
+        request = (session, roster_key, roster, (num_defenders, num_midfielders, num_forwards),
+                   max_training_time, max_cost, settings)
+        try:
+            with stage("model_server"):
+                with Client(self.address, family="AF_UNIX", authkey=self._authkey) as connection:
+                    connection.send(request)
+                    reply = connection.recv()
+        except (OSError, EOFError) as e:
+            print(f"✗ Model server unavailable ({e}) - building the model in this process")
+            with stage("model_build"):
+                model = SquadModel(roster, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+            with stage("solve"):
+                status = model.solve(settings)
+            return model, status, False
+        if isinstance(reply, Exception):
+            raise reply
+        assignment, objective, status, reused = reply
+        return SolvedSquad(assignment, objective), status, reused
+
+
+def _serve(address, authkey, maxsize, notify):
+    """Solver process: one thread per request, all sharing one SquadModelPool"""
+    pool = SquadModelPool(maxsize=maxsize)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    notify.send(True)
+    notify.close()
+    while True:
+        try:
+            connection = listener.accept()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            continue
+        threading.Thread(target=_handle, args=(pool, connection), daemon=True).start()
+
+
+def _handle(pool, connection):
+    with connection:
+        try:
+            session, roster_key, roster, formation, max_training_time, max_cost, settings = connection.recv()
+            model, status, reused = pool.solve(session, roster_key, roster, *formation, max_training_time, max_cost,
+                                               settings)
+            if model.has_solution:
+                reply = (model.assignment(), float(model.objective_value()), status, reused)
+            else:
+                reply = (None, None, status, reused)
+        except (OSError, EOFError):
+            return
+        except Exception as e:  # reported to the job, which shows it like any solver error
+            reply = RuntimeError(f"Model server: {e}")
+        connection.send(reply)
+
+
+def start_model_server():
+    """A running ModelServer, or None (models are then rebuilt on every click)"""
+    try:
+        server = ModelServer().start()
+    except OSError as e:
+        print(f"✗ Model server disabled: {e}")
+        return None
+    print(f"✓ Model server keeping up to {server.maxsize} session models")
+    return server
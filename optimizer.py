@@ -0,0 +1,545 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pulp
+
+try:
+    import diskcache
+except ImportError:  # solution cache is kept per process
+    diskcache = None
+
+from data_loader import TeamIndex, get_team_roster
+from instrumentation import annotate, stage
+from jobs import ForkSafeCache
+from session_store import SessionStore
+
+ALPHA = 1.0  # Rating importance (higher = prioritize rating)
+BETA = 0.1   # Training time penalty (higher = avoid long training)
+NUM_GOALKEEPERS = 1
+
+ROLES = ["Defender", "Mid", "Forward", "Goalkeeper"]
+
+POSITION_MAP = {
+    "Forward": ["Forward"],
+    "Midfielder": ["Mid"],
+    "Defender": ["Defender"],
+    "Goalkeeper": ["Goalkeeper"],
+    "Forward-Mid All-rounder": ["Forward", "Mid"],
+    "Mid-Back All-rounder": ["Mid", "Defender"],
+    "All All-rounder": ["Forward", "Mid", "Defender"]
+}
+
+
+def _env_number(name, cast):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else None
+
+
+# Solver defaults - any PuLP backend available locally (see available_solvers())
+DEFAULT_SOLVER_SETTINGS = {
+    "backend": os.getenv("TACTIQ_SOLVER", "PULP_CBC_CMD"),
+    "time_limit": _env_number("TACTIQ_SOLVER_TIME_LIMIT", float),  # seconds
+    "gap_rel": _env_number("TACTIQ_SOLVER_GAP", float),            # e.g. 0.01 = stop within 1% of optimal
+    "threads": _env_number("TACTIQ_SOLVER_THREADS", int),
+}
+
+FEASIBLE_TIME_LIMIT = "Feasible (time limit)"
+
+# run_optimization results shared by every process (see SolutionCache)
+SOLUTION_CACHE_DIR = os.getenv("TACTIQ_SOLUTION_CACHE_DIR", os.path.join(".tactiq_cache", "solutions"))
+SOLUTION_CACHE_TTL = int(os.getenv("TACTIQ_SOLUTION_CACHE_TTL", 3600))
+_RESULT_BYTES = 16 * 1024  # generous size of one cached squad, to bound the disk cache by entries
+
+
+def available_solvers():
+    """Names of the PuLP solver backends usable on this machine"""
+    return pulp.listSolvers(onlyAvailable=True)
+
+
+def solver_settings(backend=None, time_limit=None, gap_rel=None, threads=None):
+    """DEFAULT_SOLVER_SETTINGS with any given (non-empty) values overridden.
+
+    A time limit or thread count of 0 or below means 'no limit' / the solver's
+    default, like the budgets (CBC stops at once with timeLimit=0).
+    """
+    settings = dict(DEFAULT_SOLVER_SETTINGS)
+    overrides = {"backend": backend, "time_limit": time_limit, "gap_rel": gap_rel, "threads": threads}
+    settings.update({key: value for key, value in overrides.items() if value not in (None, "")})
+    for key in ("time_limit", "threads"):
+        settings[key] = _budget(settings[key])
+    return settings
+
+
+def make_solver(settings=None, warm_start=False):
+    """PuLP solver instance for the given solver settings"""
+    settings = settings or DEFAULT_SOLVER_SETTINGS
+    options = {"msg": False, "timeLimit": settings.get("time_limit"), "gapRel": settings.get("gap_rel"),
+               "threads": settings.get("threads")}
+    if warm_start:
+        options["warmStart"] = True
+    return pulp.getSolver(settings.get("backend") or "PULP_CBC_CMD",
+                          **{key: value for key, value in options.items() if value is not None})
+
+
+def solution_status(prob):
+    """PuLP status string, reporting a solver stopped early with an incumbent as feasible"""
+    if prob.sol_status == pulp.LpSolutionIntegerFeasible:
+        return FEASIBLE_TIME_LIMIT
+    return pulp.LpStatus[prob.status]
+
+
+_ROLE_INDEX = {role: r for r, role in enumerate(ROLES)}
+_POSITION_ROWS = {
+    position: np.array([role in roles for role in ROLES])
+    for position, roles in POSITION_MAP.items()
+}
+_NO_ROLES = np.zeros(len(ROLES), dtype=bool)
+
+
+def eligibility_matrix(positions):
+    """Boolean (players x roles) matrix of the roles each player may fill"""
+    if len(positions) == 0:
+        return np.zeros((0, len(ROLES)), dtype=bool)
+    return np.vstack([_POSITION_ROWS.get(position, _NO_ROLES) for position in positions])
+
+
+class SquadModel:
+    """Squad selection MIP for one roster, built from the roster's column arrays.
+
+    Only eligible (player, role) pairs get a binary variable, so ineligible pairs
+    need no `== 0` constraints, and a player's selection is the sum of their role
+    variables. Coefficients are computed with NumPy and handed to PuLP in bulk.
+    """
+
+    def __init__(self, roster, num_defenders, num_midfielders, num_forwards,
+                 max_training_time=None, max_cost=None):
+        self.roster = roster
+        eligible = eligibility_matrix(roster.position)
+        self.pair_player, self.pair_role = np.nonzero(eligible)
+
+        self.prob = pulp.LpProblem("Team_Selection", pulp.LpMaximize)
+        self.y = [
+            pulp.LpVariable(f"{ROLES[r]}_{i}", cat="Binary")
+            for i, r in zip(self.pair_player.tolist(), self.pair_role.tolist())
+        ]
+
+        score = ALPHA * roster.rating - BETA * roster.training_time
+        self.prob.setObjective(self._player_expression(score))
+
+        # Formation: exact number of players per role
+        counts = {"Defender": num_defenders, "Mid": num_midfielders,
+                  "Forward": num_forwards, "Goalkeeper": NUM_GOALKEEPERS}
+        self.role_constraints = {}
+        for role, count in counts.items():
+            role_vars = [self.y[k] for k in np.flatnonzero(self.pair_role == _ROLE_INDEX[role]).tolist()]
+            self.role_constraints[role] = self._add(
+                pulp.LpAffineExpression([(v, 1) for v in role_vars]), pulp.LpConstraintEQ, count, f"count_{role}")
+
+        # Each versatile player fills at most one role (pairs are grouped by player)
+        roles_per_player = eligible.sum(axis=1)
+        first_pair = np.concatenate(([0], np.cumsum(roles_per_player)[:-1]))
+        for i in np.flatnonzero(roles_per_player > 1).tolist():
+            start, end = int(first_pair[i]), int(first_pair[i] + roles_per_player[i])
+            self._add(pulp.LpAffineExpression([(v, 1) for v in self.y[start:end]]), pulp.LpConstraintLE, 1, f"one_role_{i}")
+
+        self.no_good_cuts = []
+        self.budget_constraints = {}
+        self.set_budget("training_time", max_training_time)
+        self.set_budget("cost", max_cost)
+
+        # Field at least two Mid-Back capable all-rounders (or as many as the team has)
+        self.unavailable = set()
+        self.all_rounders = eligible[:, _ROLE_INDEX["Mid"]] & eligible[:, _ROLE_INDEX["Defender"]]
+        self.all_rounder_constraint = None
+        if self.required_all_rounders() > 0:
+            self.all_rounder_constraint = self._add(self._player_expression(self.all_rounders.astype(float)),
+                                                    pulp.LpConstraintGE, self.required_all_rounders(), "all_rounders")
+
+    def _player_expression(self, player_coefs):
+        """Linear expression sum_i coef[i] * x[i], with x[i] the sum of player i's role variables"""
+        pair_coefs = np.asarray(player_coefs, dtype=float)[self.pair_player]
+        return pulp.LpAffineExpression(
+            [(v, c) for v, c in zip(self.y, pair_coefs.tolist()) if c != 0])
+
+    def budget_values(self, budget):
+        """Per-player coefficient array of a budget ("training_time" or "cost")"""
+        return {"training_time": self.roster.training_time, "cost": self.roster.cost}[budget]
+
+    def set_budget(self, budget, limit):
+        """Set, change or lift (limit None/<= 0) a budget in place.
+
+        Changing an existing budget only updates the constraint's right-hand side,
+        so the model can be re-solved without rebuilding it.
+        """
+        if limit is None or limit <= 0:
+            constraint = self.budget_constraints.get(budget)
+            if constraint is not None:
+                # Lifting a budget: relax the row so it can never bind
+                constraint.changeRHS(float(np.abs(self.budget_values(budget)).sum()) + 1.0)
+            return
+        constraint = self.budget_constraints.get(budget)
+        if constraint is None:
+            self.budget_constraints[budget] = self._add(
+                self._player_expression(self.budget_values(budget)), pulp.LpConstraintLE, limit, f"max_{budget}")
+        else:
+            constraint.changeRHS(limit)
+
+    def set_formation(self, num_defenders, num_midfielders, num_forwards):
+        """Change the outfield counts in place (right-hand sides of the count constraints)"""
+        counts = {"Defender": num_defenders, "Mid": num_midfielders, "Forward": num_forwards}
+        for role, count in counts.items():
+            self.role_constraints[role].changeRHS(count)
+
+    def update(self, num_defenders, num_midfielders, num_forwards, max_training_time=None, max_cost=None):
+        """Re-target the model at a new formation and budgets without rebuilding it"""
+        self.set_formation(num_defenders, num_midfielders, num_forwards)
+        self.set_budget("training_time", max_training_time)
+        self.set_budget("cost", max_cost)
+
+    def exclude_squad(self, players):
+        """No-good cut: never select exactly this set of players again, in any roles.
+
+        Every other squad stays feasible, so re-solving gives the next best one.
+        """
+        players = sorted(set(players))
+        coefs = np.zeros(len(self.roster))
+        coefs[players] = 1.0
+        self.no_good_cuts.append(self._add(self._player_expression(coefs), pulp.LpConstraintLE, len(players) - 1,
+                                           f"no_good_{len(self.no_good_cuts)}"))
+
+    def required_all_rounders(self):
+        """Mid-Back all-rounders the squad must field: two, or as many as are available"""
+        available = self.all_rounders.copy()
+        available[list(self.unavailable)] = False
+        return min(2, int(available.sum()))
+
+    def set_unavailable(self, players):
+        """Make exactly these players (roster indices) unavailable, in place.
+
+        Each player's role variables are fixed to 0 through their upper bounds,
+        so injuries and suspensions are modelled without rebuilding the model.
+        """
+        self.unavailable = set(players)
+        for k, i in enumerate(self.pair_player.tolist()):
+            self.y[k].upBound = 0 if i in self.unavailable else 1
+        if self.all_rounder_constraint is not None:
+            self.all_rounder_constraint.changeRHS(self.required_all_rounders())
+
+    def set_start(self, assignment):
+        """Set the variable values to a squad's (player_index, role) pairs, the MIP start for solve(warm_start=True)"""
+        chosen = {(i, _ROLE_INDEX[role]) for i, role in assignment}
+        for v, i, r in zip(self.y, self.pair_player.tolist(), self.pair_role.tolist()):
+            v.setInitialValue(1 if (i, r) in chosen else 0)
+
+    def __getstate__(self):
+        # Pickled to pool workers (sensitivity) without its roster, which is re-attached there
+        state = dict(self.__dict__)
+        state["roster"] = None
+        return state
+
+    def _add(self, expression, sense, rhs, name):
+        constraint = pulp.LpConstraint(e=expression, sense=sense, rhs=rhs, name=name)
+        self.prob += constraint
+        return constraint
+
+    @property
+    def num_variables(self):
+        return len(self.y)
+
+    def solve(self, settings=None, warm_start=False):
+        """Solve the model and return its status (see solution_status)
+
+        With warm_start the current variable values (the previous incumbent) are
+        passed to the solver as a MIP start.
+        """
+        self.prob.solve(make_solver(settings, warm_start))
+        return solution_status(self.prob)
+
+    @property
+    def has_solution(self):
+        return self.prob.status == pulp.LpStatusOptimal
+
+    def objective_value(self):
+        return pulp.value(self.prob.objective)
+
+    def assignment(self):
+        """(player_index, role) pairs of the current solution, in roster order"""
+        values = np.array([v.varValue or 0.0 for v in self.y])
+        chosen = np.flatnonzero(values > 0.5)
+        return [(int(self.pair_player[k]), ROLES[self.pair_role[k]]) for k in chosen]
+
+    def selected_players(self):
+        return build_selected_df(self.roster, self.assignment())
+
+
+def build_selected_df(roster, assignment):
+    """Selected-squad DataFrame for a list of (player_index, role) pairs"""
+    team_df = roster.df
+    rows = [i for i, _ in assignment]
+    selected = team_df.iloc[rows]
+    return pd.DataFrame({
+        'player_name': selected['player_name'].to_numpy(),
+        'team_name': selected['team_name'].to_numpy() if 'team_name' in team_df.columns else ['N/A'] * len(rows),
+        'final_position': selected['final_position'].to_numpy(),
+        'assigned_role': [role for _, role in assignment],
+        'overall_rating': selected['overall_rating'].to_numpy(),
+        'training_time': selected['training_time'].to_numpy(),
+        'cost': selected['Cost'].to_numpy() if 'Cost' in team_df.columns else roster.cost[rows]
+    })
+
+
+class SolutionCache:
+    """Thread-safe, bounded cache of run_optimization results for a TeamIndex.
+
+    With a `directory` the results live in a diskcache that every process
+    shares - Build Squad solves in background-job processes that exit right
+    after - keyed by the index's fingerprint, so results of other player data
+    are never served. Entries expire after `ttl` seconds and the least
+    recently used are culled beyond roughly `maxsize` entries.
+
+    Otherwise it is an in-process LRU tied to the TeamIndex version; entries
+    are dropped as soon as a newer version is seen, so a data reload
+    invalidates the cache. Lookups against an older version (an in-flight
+    request during a reload) always miss.
+    """
+
+    def __init__(self, maxsize=256, directory=None, ttl=SOLUTION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if directory is not None and maxsize > 0 and diskcache is not None:
+            try:
+                self._disk = ForkSafeCache(diskcache.Cache(directory, size_limit=maxsize * _RESULT_BYTES,
+                                                           eviction_policy="least-recently-used"))
+                self._disk.stats(enable=True)
+            except OSError as e:
+                print(f"✗ Solution cache directory unavailable ({e}) - caching results per process")
+
+    @property
+    def backend(self):
+        return "disk" if self._disk is not None else "memory"
+
+    def get(self, key, index):
+        if self._disk is not None:
+            return self._disk.get((index.fingerprint, key))
+        data_version = index.version
+        with self._lock:
+            if self._data_version is None or data_version > self._data_version:
+                self._entries.clear()
+                self._data_version = data_version
+            result = self._entries.get(key) if data_version == self._data_version else None
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy_result(result)
+
+    def put(self, key, index, result):
+        if self.maxsize <= 0:
+            return
+        if self._disk is not None:
+            self._disk.set((index.fingerprint, key), result, expire=self.ttl)
+            return
+        data_version = index.version
+        with self._lock:
+            if data_version != self._data_version:
+                return
+            self._entries[key] = _copy_result(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self):
+        if self._disk is not None:
+            hits, misses = self._disk.stats()
+            size, data_version = len(self._disk), None
+        else:
+            with self._lock:
+                hits, misses = self.hits, self.misses
+                size, data_version = len(self._entries), self._data_version
+        lookups = hits + misses
+        return {
+            "backend": self.backend,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": size,
+            "maxsize": self.maxsize,
+            "data_version": data_version,
+        }
+
+
+class SquadModelPool:
+    """Per-session SquadModels that are changed in place and re-solved instead of rebuilt.
+
+    Coaches usually change one thing between clicks - one more defender, a
+    slightly lower budget. Each session's model is kept in `store` (anything
+    with get/set, an in-process SessionStore by default) next to the key of
+    the roster it was built for. Solving the same roster again only updates
+    the formation and budget right-hand sides and passes the previous squad to
+    the solver as a MIP start; a different team, or a data reload that changed
+    this team's rows, rebuilds the model. Background jobs reach a pool kept in
+    a long-lived process through model_server.ModelServer.
+    """
+
+    def __init__(self, store=None, maxsize=64):
+        self.store = store if store is not None else SessionStore(maxsize=maxsize)
+        self.builds = 0
+        self.reuses = 0
+        # Striped locks: one session's clicks are solved one at a time
+        self._locks = [threading.Lock() for _ in range(32)]
+        self._stats_lock = threading.Lock()
+
+    def solve(self, session, roster_key, roster, num_defenders, num_midfielders, num_forwards,
+              max_training_time=None, max_cost=None, settings=None):
+        """Solve for a session, reusing its model if it was built for roster_key; returns (model, status, reused)"""
+        key = f"model:{session}"
+        with self._locks[hash(session) % len(self._locks)]:
+            with stage("model_load"):
+                entry = self.store.get(key)
+            reused = entry is not None and entry[0] == roster_key
+            if reused:
+                model = entry[1]
+                model.roster = roster
+                with stage("model_update"):
+                    model.update(num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+                with stage("solve"):
+                    status = model.solve(settings, warm_start=model.has_solution)
+            else:
+                with stage("model_build"):
+                    model = SquadModel(roster, num_defenders, num_midfielders, num_forwards,
+                                       max_training_time, max_cost)
+                with stage("solve"):
+                    status = model.solve(settings)
+            with stage("model_save"):
+                self.store.set(key, (roster_key, model))
+        with self._stats_lock:
+            if reused:
+                self.reuses += 1
+            else:
+                self.builds += 1
+        return model, status, reused
+
+    def stats(self):
+        with self._stats_lock:
+            return {"builds": self.builds, "reuses": self.reuses}
+
+
+def _copy_result(result):
+    """Callers may modify the returned DataFrame - never hand out the cached one"""
+    if result[0] is None:
+        return result
+    return (result[0].copy(),) + tuple(result[1:])
+
+
+SOLUTION_CACHE = SolutionCache(int(os.getenv("TACTIQ_SOLUTION_CACHE_SIZE", 256)), directory=SOLUTION_CACHE_DIR)
+
+# Use the exact in-process solver (fast_solver.py) when no budget is set
+FAST_SOLVER_ENABLED = os.getenv("TACTIQ_FAST_SOLVER", "1") != "0"
+
+
+def _budget(value):
+    """Budgets of None, 0 or below all mean 'no limit'"""
+    return value if value is not None and value > 0 else None
+
+
+def solution_cache_key(team_id, num_defenders, num_midfielders, num_forwards, max_training_time=None, max_cost=None,
+                       settings=None):
+    settings = settings or DEFAULT_SOLVER_SETTINGS
+    return (team_id, num_defenders, num_midfielders, num_forwards, _budget(max_training_time), _budget(max_cost),
+            tuple(sorted(settings.items())))
+
+
+def run_optimization(data, team_id, num_defenders, num_midfielders, num_forwards, max_training_time=None, max_cost=None,
+                     use_cache=True, settings=None, pool=None, session=None):
+    """Run the optimization algorithm with optional training time and cost constraints
+
+    `data` is either the TeamIndex built at load time or a plain player DataFrame.
+    `settings` (see solver_settings()) picks the solver backend and its limits.
+    Results for a TeamIndex are served from SOLUTION_CACHE when possible.
+    With a `pool` (SquadModelPool) and `session` key, budgeted solves re-use
+    the session's model instead of building a new one.
+    """
+    if not use_cache or not isinstance(data, TeamIndex):
+        return solve_squad(data, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                           settings, pool, session)
+
+    key = solution_cache_key(team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                             settings)
+    with stage("cache_lookup"):
+        result = SOLUTION_CACHE.get(key, data)
+    annotate(cache_hit=result is not None)
+    if result is None:
+        result = solve_squad(data, team_id, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost,
+                             settings, pool, session)
+        SOLUTION_CACHE.put(key, data, result)
+    return result
+
+
+def solve_squad(data, team_id, num_defenders, num_midfielders, num_forwards, max_training_time=None, max_cost=None,
+                settings=None, pool=None, session=None):
+    """Build and solve the squad model (uncached)"""
+    with stage("filter"):
+        roster = get_team_roster(data, team_id)
+    if roster is None:
+        return None, "No players found for the selected Team ID"
+
+    if not any("goalkeeper" in str(position).lower() for position in roster.position):
+        return None, f"Team {team_id} has no eligible Goalkeeper!"
+
+    # Check if budget constraint is feasible
+    if max_cost is not None and max_cost > 0:
+        total_players_needed = num_defenders + num_midfielders + num_forwards + NUM_GOALKEEPERS
+        # Find the cheapest possible team
+        cheapest_11 = np.sort(roster.cost)[:total_players_needed].sum()
+        if cheapest_11 > max_cost:
+            return None, f"Insufficient budget! Minimum cost for 11 players is ${cheapest_11:,.0f}, but your budget is ${max_cost:,.0f}"
+
+    if FAST_SOLVER_ENABLED and _budget(max_training_time) is None and _budget(max_cost) is None:
+        # Budget-free runs are a pure assignment problem - solve in-process without CBC
+        from fast_solver import solve_assignment
+        with stage("fast_solve"):
+            assignment, objective_value = solve_assignment(roster, num_defenders, num_midfielders, num_forwards)
+        status = 'Infeasible' if assignment is None else 'Optimal'
+        model = None
+    elif pool is not None and session and isinstance(data, TeamIndex):
+        # The session's model from its previous click, updated in place and warm-started
+        model, status, reused = pool.solve(session, (team_id, data.team_hash(team_id)), roster, num_defenders,
+                                           num_midfielders, num_forwards, max_training_time, max_cost, settings)
+        annotate(model_reused=reused)
+    else:
+        with stage("model_build"):
+            model = SquadModel(roster, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+        with stage("solve"):
+            status = model.solve(settings)
+    if model is not None and model.has_solution:
+        assignment, objective_value = model.assignment(), model.objective_value()
+    annotate(solver_status=status)
+
+    # Check if solution is infeasible
+    if status == 'Infeasible':
+        if max_cost is not None and max_cost > 0:
+            return None, f"Cannot build a team with the given budget of ${max_cost:,.0f} and formation constraints. Try increasing the budget or adjusting the formation."
+        else:
+            return None, "Optimization failed. The formation constraints cannot be satisfied with the available players."
+    if status not in ('Optimal', FEASIBLE_TIME_LIMIT):
+        return None, f"The solver stopped without finding a squad (status: {status}). Try a longer time limit or fewer constraints."
+
+    with stage("extract"):
+        selected_df = build_selected_df(roster, assignment)
+    return selected_df, status, objective_value
@@ -0,0 +1,120 @@
+"""Vertical football pitch with the optimized squad drawn on it.
+
+The pitch markings never change, so they are built once into a plotly layout
+template. Players are drawn with three Scatter traces whatever the squad
+size: one line trace for every stick-figure body and arms (segments separated
+by None), one marker trace for the heads and one text trace for the names.
+"""
+import plotly.graph_objects as go
+
+PITCH_WIDTH = 60
+PITCH_HEIGHT = 90
+
+# Height of each line of the formation, from our goal (0) to theirs (PITCH_HEIGHT)
+ROLE_ROWS = {
+    'Goalkeeper': 8,
+    'Defender': 22,
+    'Mid': 45,
+    'Forward': 68,
+}
+
+PLAYER_COLOR = '#1e293b'
+HEAD_SIZE = 14  # px, about 1.6 pitch units at the default height
+
+
+def _pitch_shapes():
+    """Pitch markings as layout shapes, drawn below the player traces"""
+    line = dict(color="white", width=2)
+    spot = dict(fillcolor="white", line=dict(color="white", width=0))
+    mid_x, mid_y = PITCH_WIDTH / 2, PITCH_HEIGHT / 2
+
+    def circle(x, y, radius, **style):
+        return dict(type="circle", x0=x - radius, y0=y - radius, x1=x + radius, y1=y + radius, **style)
+
+    def box(x0, y0, x1, y1):
+        return dict(type="rect", x0=x0, y0=y0, x1=x1, y1=y1, line=line, fillcolor="rgba(0,0,0,0)")
+
+    shapes = [
+        # Background and halfway line
+        dict(type="rect", x0=0, y0=0, x1=PITCH_WIDTH, y1=PITCH_HEIGHT,
+             fillcolor="#1a7f3e", line=dict(color="white", width=3)),
+        dict(type="line", x0=0, y0=mid_y, x1=PITCH_WIDTH, y1=mid_y, line=line),
+        # Center circle and spot
+        circle(mid_x, mid_y, 8, line=line, fillcolor="rgba(0,0,0,0)"),
+        circle(mid_x, mid_y, 0.7, **spot),
+        # Penalty areas and 6-yard boxes (our goal at the bottom)
+        box(12, 0, PITCH_WIDTH - 12, 14),
+        box(12, PITCH_HEIGHT - 14, PITCH_WIDTH - 12, PITCH_HEIGHT),
+        box(21, 0, PITCH_WIDTH - 21, 5),
+        box(21, PITCH_HEIGHT - 5, PITCH_WIDTH - 21, PITCH_HEIGHT),
+        # Penalty spots
+        circle(mid_x, 10, 0.7, **spot),
+        circle(mid_x, PITCH_HEIGHT - 10, 0.7, **spot),
+    ]
+    for shape in shapes:
+        shape['layer'] = 'below'
+    return shapes
+
+
+def pitch_template():
+    """Layout template holding the pitch markings and fixed axes"""
+    return go.layout.Template(layout=dict(
+        shapes=_pitch_shapes(),
+        xaxis=dict(range=[-2, PITCH_WIDTH + 2], showgrid=False, zeroline=False, visible=False, fixedrange=True),
+        yaxis=dict(range=[-2, PITCH_HEIGHT + 2], showgrid=False, zeroline=False, visible=False, fixedrange=True,
+                   scaleanchor="x", scaleratio=1),
+        plot_bgcolor='#1a7f3e',
+        paper_bgcolor='white',
+        margin=dict(l=20, r=20, t=20, b=20),
+        height=900,
+        showlegend=False,
+    ))
+
+
+# Built once at import; every pitch figure references it
+PITCH_TEMPLATE = pitch_template()
+
+
+def player_positions(selected_df):
+    """(x, y, name) of each player, spread evenly across the row for their assigned role"""
+    if selected_df is None or len(selected_df) == 0 or 'assigned_role' not in selected_df:
+        return [], [], []
+    if 'player_name' in selected_df:
+        names = selected_df['player_name']
+    else:
+        names = selected_df.index.to_series().map(lambda idx: f"Player {idx}")
+    roles = selected_df['assigned_role']
+    on_pitch = roles.isin(ROLE_ROWS.keys())
+    roles, names = roles[on_pitch], names[on_pitch]
+
+    slot = roles.groupby(roles).cumcount() + 1
+    row_size = roles.map(roles.value_counts())
+    xs = (PITCH_WIDTH * slot / (row_size + 1)).tolist()
+    ys = roles.map(ROLE_ROWS).tolist()
+    return xs, ys, names.tolist()
+
+
+def create_vertical_pitch(selected_df):
+    """Create vertical football pitch with player positions"""
+    xs, ys, names = player_positions(selected_df)
+    if not xs:
+        return go.Figure(layout=dict(template=PITCH_TEMPLATE))
+
+    # Body (y+1.5 to y-1.5) and arms (y+0.5) of every player as one line trace
+    body_x, body_y = [], []
+    for x, y in zip(xs, ys):
+        body_x += [x, x, None, x - 1.5, x + 1.5, None]
+        body_y += [y + 1.5, y - 1.5, None, y + 0.5, y + 0.5, None]
+
+    return go.Figure(
+        data=[
+            go.Scatter(x=body_x, y=body_y, mode='lines', line=dict(color=PLAYER_COLOR, width=2.5),
+                       hoverinfo='skip'),
+            go.Scatter(x=xs, y=[y + 2.3 for y in ys], mode='markers',
+                       marker=dict(size=HEAD_SIZE, color=PLAYER_COLOR), hoverinfo='skip'),
+            go.Scatter(x=xs, y=[y - 3 for y in ys], mode='text', text=names,
+                       textfont=dict(size=7, color='white', family='Arial Black'),
+                       hoverinfo='text', hovertext=names),
+        ],
+        layout=dict(template=PITCH_TEMPLATE),
+    )
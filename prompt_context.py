@@ -0,0 +1,192 @@
+"""System prompt for the AI coach, rendered once per team, data version and squad.
+
+The roster and squad blocks are compact pipe-separated tables (one header,
+one short line per player) instead of a sentence per player, and are memoized
+so sessions about the same team and squad reuse the rendered text. The app
+saves the built prompt with the chat session, so chat jobs in forked
+processes read it back instead of rendering it per message.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+PROMPT_CACHE_SIZE = int(os.getenv("TACTIQ_PROMPT_CACHE_SIZE", 128))
+# Rough Gemini ratio for English text and numbers - good enough to compare encodings
+CHARS_PER_TOKEN = 4
+
+ASSISTANT_RULES = """You are a professional football coach assistant with deep knowledge of tactics, formations, player performance, and team strategies.
+
+STRICT RULES:
+1. ONLY answer questions related to football/soccer (tactics, formations, players, teams, training, strategies, match analysis)
+2. If asked about non-football topics, politely redirect: "I'm specialized in football coaching and tactics. Please ask me about formations, players, team strategies, or match analysis."
+3. Keep responses concise (2-3 paragraphs maximum)
+4. Be professional and insightful
+5. Base advice on established football principles
+6. You have access to Google Search - use it when you need current information about players, teams, tactics, or recent matches
+7. You can talk in all language. If you are instructed to talk or explain in any particular language you should be able to answer it in that language ONLY.
+You can discuss:
+- Team formations and tactics
+- Player positioning and roles
+- Match strategies and analysis
+- Training methods
+- Player synergy and chemistry
+- Historical team performance
+- Tactical adjustments
+"""
+
+SQUAD_GUIDANCE = ("When discussing the team, you can refer to both the selected 11 players AND the complete roster. "
+                  "Provide tactical insights, suggest alternatives from the bench, analyze strengths and weaknesses.\n")
+
+
+class PromptBlock:
+    """Rendered prompt text with its character and (estimated) token size"""
+    __slots__ = ("text", "chars", "tokens")
+
+    def __init__(self, text):
+        self.text = text
+        self.chars = len(text)
+        self.tokens = estimate_tokens(text)
+
+    def __repr__(self):
+        return f"PromptBlock(chars={self.chars}, tokens~{self.tokens})"
+
+
+class PromptContext:
+    """The full system prompt and the blocks it was assembled from"""
+    __slots__ = ("text", "blocks")
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.text = "".join(block.text for block in blocks.values())
+
+    @property
+    def chars(self):
+        return len(self.text)
+
+    @property
+    def tokens(self):
+        return sum(block.tokens for block in self.blocks.values())
+
+    def sizes(self):
+        """{block name: {'chars': n, 'tokens': n}}"""
+        return {name: {"chars": block.chars, "tokens": block.tokens} for name, block in self.blocks.items()}
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _number(value):
+    """Shortest readable form: 85.0 -> 85, 3.25 -> 3.2, None -> -"""
+    if value is None or value != value:
+        return "-"
+    if isinstance(value, str):
+        return value
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.1f}"
+
+
+def render_roster(all_team_players):
+    """Complete-roster block as one table; the team name is given once"""
+    teams = sorted({str(player.get('team_name', 'N/A')) for player in all_team_players})
+    lines = [f"\nCOMPLETE TEAM ROSTER ({len(all_team_players)} players, team: {', '.join(teams)}):",
+             "name|position|rating|training_hrs|cost"]
+    lines += [f"{p['player_name']}|{p['final_position']}|{_number(p['overall_rating'])}|"
+              f"{_number(p['training_time'])}|{_number(p.get('cost'))}" for p in all_team_players]
+    return "\n".join(lines) + "\n\n"
+
+
+def render_squad(team_data):
+    """Optimized-squad block: totals, constraints and one table row per player"""
+    lines = ["\nCURRENTLY SELECTED 11 PLAYERS (Optimized Squad):",
+             f"Formation: {team_data['formation']} (1 Goalkeeper - {team_data['formation']})",
+             f"Total Players: {team_data['total_players']}",
+             f"Total Team Rating: {team_data['total_rating']:.1f}",
+             f"Total Training Time: {team_data['total_training_time']:.1f} hours",
+             f"Total Cost: ${team_data['total_cost']:,.0f}"]
+    if team_data.get('max_training_time'):
+        lines.append(f"Max Training Time Constraint: {team_data['max_training_time']} hours")
+    if team_data.get('max_cost'):
+        lines.append(f"Max Cost Budget: ${team_data['max_cost']:,.0f}")
+    lines += [f"Optimization Status: {team_data['status']}",
+              f"Objective Value: {team_data['objective_value']:.2f}",
+              "",
+              "Selected Players (name|role|rating|training_hrs|cost):"]
+    lines += [f"{p['player_name']}|{p['assigned_role']}|{_number(p['overall_rating'])}|"
+              f"{_number(p['training_time'])}|{_number(p['cost'])}" for p in team_data['players']]
+    if team_data.get('alternatives'):
+        lines += ["", "Next-Best Alternative Squads (rank|objective|gap|players_in|players_out):"]
+        lines += [f"{a['rank']}|{a['objective_value']:.2f}|{a['gap']:.2f}|{a['players_in'] or '-'}|"
+                  f"{a['players_out'] or '-'}" for a in team_data['alternatives']]
+    if team_data.get('importance'):
+        lines += ["", "Player Importance - objective lost without each player (rank|name|role|loss|best_replacement):"]
+        lines += [f"{p['rank']}|{p['player_name']}|{p['assigned_role']}|"
+                  + (f"{p['loss']:.2f}|{p['replaced_by'] or '-'}" if p['loss'] is not None else "irreplaceable|-")
+                  for p in team_data['importance']]
+    return "\n".join(lines) + "\n\n" + SQUAD_GUIDANCE
+
+
+def content_hash(value):
+    """Stable short hash of JSON-like data (squads, rosters)"""
+    payload = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+class PromptContextBuilder:
+    """Memoizes rendered roster and squad blocks in a small LRU.
+
+    Roster blocks are keyed by (team_id, data_version) when the caller knows
+    them, otherwise by a hash of the roster records; squad blocks by the hash
+    of the squad summary.
+    """
+
+    def __init__(self, maxsize=PROMPT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self._rules = PromptBlock(ASSISTANT_RULES)
+        self._footer = PromptBlock("\nCurrent conversation context:")
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, team_data=None, all_team_players=None, team_id=None, data_version=None):
+        """PromptContext for the given squad summary and roster records"""
+        blocks = {"rules": self._rules}
+        if all_team_players:
+            if team_id is not None and data_version is not None:
+                key = ("roster", team_id, data_version)
+            else:
+                key = ("roster", content_hash(all_team_players))
+            blocks["roster"] = self._block(key, render_roster, all_team_players)
+        if team_data:
+            blocks["squad"] = self._block(("squad", content_hash(team_data)), render_squad, team_data)
+        blocks["footer"] = self._footer
+        return PromptContext(blocks)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._blocks), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def _block(self, key, render, data):
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
+        block = PromptBlock(render(data))
+        if self.maxsize > 0:
+            with self._lock:
+                self._blocks[key] = block
+                while len(self._blocks) > self.maxsize:
+                    self._blocks.popitem(last=False)
+        return block
+
+
+PROMPT_CONTEXT = PromptContextBuilder()
@@ -0,0 +1,86 @@
+"""Disk-persisted cache of AI coach answers to the quick-prompt buttons.
+
+The six quick prompts are asked again and again about the same optimized
+squad. Answers are keyed by (normalized prompt, hash of the squad and roster,
+assistant backend, model) and kept in a diskcache directory, so they survive restarts and are
+shared by all web workers and background jobs. Entries expire after a TTL and
+the least recently used ones are evicted once the cache exceeds its size limit.
+"""
+import os
+import re
+
+from jobs import ForkSafeCache
+from prompt_context import content_hash
+
+try:
+    import diskcache
+except ImportError:  # quick prompts always go to Gemini
+    diskcache = None
+
+RESPONSE_CACHE_ENABLED = os.getenv("TACTIQ_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_DIR = os.getenv("TACTIQ_RESPONSE_CACHE_DIR", os.path.join(".tactiq_cache", "responses"))
+RESPONSE_CACHE_TTL = int(os.getenv("TACTIQ_RESPONSE_CACHE_TTL", 24 * 3600))
+RESPONSE_CACHE_SIZE_MB = int(os.getenv("TACTIQ_RESPONSE_CACHE_SIZE_MB", 64))
+
+
+def normalize_prompt(prompt):
+    """Case, whitespace and trailing punctuation do not change the question"""
+    return re.sub(r"\s+", " ", prompt).strip().rstrip("?!. ").lower()
+
+
+def context_hash(team_data, all_team_players, team_id=None, data_version=None):
+    """Hash of the squad summary and roster the answer was based on"""
+    if team_id is not None and data_version is not None:
+        roster = (team_id, data_version)
+    else:
+        roster = content_hash(all_team_players)
+    return content_hash([team_data, roster])
+
+
+class ResponseCache:
+    """Answers to a fixed set of prompts, TTL- and size-bounded, on disk"""
+
+    def __init__(self, prompts, directory=RESPONSE_CACHE_DIR, ttl=RESPONSE_CACHE_TTL,
+                 size_limit=RESPONSE_CACHE_SIZE_MB * 1024 * 1024):
+        self.prompts = {normalize_prompt(prompt) for prompt in prompts}
+        self.ttl = ttl
+        self._cache = ForkSafeCache(diskcache.Cache(directory, size_limit=size_limit,
+                                                    eviction_policy="least-recently-used"))
+        self._cache.stats(enable=True)
+
+    def key(self, prompt, context, model, backend="gemini"):
+        """Cache key for a prompt, or None if it is not one of the cached prompts
+
+        The backend is part of the key so offline stub answers are never served
+        to users of the real model.
+        """
+        normalized = normalize_prompt(prompt)
+        if normalized not in self.prompts:
+            return None
+        return f"{backend}:{model}:{context}:{content_hash(normalized)}"
+
+    def get(self, key):
+        return self._cache.get(key) if key is not None else None
+
+    def put(self, key, response):
+        if key is not None:
+            self._cache.set(key, response, expire=self.ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        hits, misses = self._cache.stats()
+        return {"entries": len(self._cache), "bytes": self._cache.volume(), "size_limit": self._cache.size_limit,
+                "ttl": self.ttl, "hits": hits, "misses": misses}
+
+
+def create_response_cache(prompts):
+    """ResponseCache for the quick prompts, or None when disabled or unavailable"""
+    if not RESPONSE_CACHE_ENABLED or diskcache is None:
+        return None
+    try:
+        return ResponseCache(prompts)
+    except OSError as e:
+        print(f"✗ Quick-prompt response cache disabled: {e}")
+        return None
@@ -0,0 +1,163 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from data_loader import get_team_roster
+from fast_solver import solve_assignment
+from formation_sweep import SWEEP_WORKERS, run_in_pool
+from optimizer import ALPHA, BETA, ROLES, SquadModel
+
+BOUND_TOLERANCE = 1e-6
+
+IMPORTANCE_COLUMNS = ['rank', 'player_name', 'assigned_role', 'objective_value', 'loss', 'loss_pct', 'replaced_by',
+                      'status', 'method']
+
+
+def best_swap(model, assignment, excluded, limits):
+    """Best squad that swaps `excluded` for one bench player in the same role.
+
+    Respects the budgets in `limits` and the all-rounder minimum. Returns
+    (assignment, objective value), or (None, None) when no swap is feasible.
+    """
+    roster = model.roster
+    score = ALPHA * roster.rating - BETA * roster.training_time
+    role = ROLES.index(dict(assignment)[excluded])
+    squad = [i for i, _ in assignment if i != excluded]
+
+    candidates = model.pair_player[model.pair_role == role]
+    taken = set(squad) | {excluded} | model.unavailable
+    candidates = np.array([i for i in candidates.tolist() if i not in taken], dtype=int)
+    for budget, limit in limits.items():
+        if limit is not None and limit > 0 and len(candidates):
+            values = model.budget_values(budget)
+            candidates = candidates[values[squad].sum() + values[candidates] <= limit + BOUND_TOLERANCE]
+    if model.all_rounders[squad].sum() < model.required_all_rounders() and len(candidates):
+        candidates = candidates[model.all_rounders[candidates]]
+    if not len(candidates):
+        return None, None
+
+    best = int(candidates[np.argmax(score[candidates])])
+    swapped = [(best, r) if i == excluded else (i, r) for i, r in assignment]
+    return swapped, float(score[[i for i, _ in swapped]].sum())
+
+
+def relaxed_squad(model, formation):
+    """Best squad of the available players with the budgets dropped (fast_solver), or (None, None).
+
+    Dropping constraints can only help, so its objective bounds every squad the
+    model allows, and it is solved exactly in-process without starting CBC.
+    """
+    positions = model.roster.position.copy()
+    positions[list(model.unavailable)] = None  # no eligible roles
+    relaxed = SimpleNamespace(position=positions, rating=model.roster.rating,
+                              training_time=model.roster.training_time)
+    return solve_assignment(relaxed, *formation)
+
+
+def within_budgets(model, assignment, limits):
+    players = [i for i, _ in assignment]
+    return all(limit is None or limit <= 0 or model.budget_values(budget)[players].sum() <= limit + BOUND_TOLERANCE
+               for budget, limit in limits.items())
+
+
+def exclusion_results(model, roster, formation, assignment, players, limits, settings=None):
+    """Best squad without each of `players` in turn, re-solving one model (runs inside pool workers).
+
+    A player is fixed out through their variables' bounds, then the MIP is
+    skipped whenever a bound settles the answer:
+
+        relaxation  the best squad with the budgets dropped fits the budgets
+                    anyway, so it is optimal (always the case without budgets)
+        swap        the best one-for-one replacement reaches that bound
+        bound       not even the relaxation has a squad: irreplaceable
+
+    Otherwise the model is solved with the best swap as its MIP start.
+    Returns {player: (status, assignment or None, objective or None, method)}.
+    """
+    model.roster = roster
+    results = {}
+    for player in players:
+        model.set_unavailable([player])
+        relaxed, bound = relaxed_squad(model, formation)
+        if relaxed is None:
+            results[player] = ('Infeasible', None, None, 'bound')
+            continue
+        if within_budgets(model, relaxed, limits):
+            results[player] = ('Optimal', relaxed, bound, 'relaxation')
+            continue
+        swap, swap_value = best_swap(model, assignment, player, limits)
+        if swap is not None and swap_value >= bound - BOUND_TOLERANCE:
+            results[player] = ('Optimal', swap, swap_value, 'swap')
+            continue
+        if swap is not None:
+            model.set_start(swap)
+        status = model.solve(settings, warm_start=swap is not None)
+        if model.has_solution:
+            results[player] = (status, model.assignment(), float(model.objective_value()), 'MIP')
+        else:
+            results[player] = (status, None, None, 'MIP')
+    model.set_unavailable([])
+    return results
+
+
+def player_importance(data, team_id, num_defenders, num_midfielders, num_forwards, max_training_time=None,
+                      max_cost=None, settings=None, workers=None):
+    """How much the best squad loses without each of its players, most important first.
+
+    The squad is solved once; every starter is then excluded in turn on that
+    same model, skipping the MIP where a bound settles it (see
+    exclusion_results). Exclusions are split over the shared sweep pool
+    (formation_sweep.shared_pool), or a private pool of `workers` processes
+    (1 runs in-process), each re-solving its own copy of the solved model. Players who cannot be replaced
+    under the formation and budgets come first. A negative loss means the
+    player was only picked to meet the all-rounder minimum, which drops to the
+    all-rounders still available.
+
+    `settings` are passed to the solver (see optimizer.solver_settings()).
+
+    Returns (importance DataFrame, total seconds).
+    """
+    roster = get_team_roster(data, team_id)
+    if roster is None:
+        raise ValueError("No players found for the selected Team ID")
+
+    start = time.perf_counter()
+    model = SquadModel(roster, num_defenders, num_midfielders, num_forwards, max_training_time, max_cost)
+    model.solve(settings)
+    if not model.has_solution:
+        raise ValueError("No feasible squad for this formation and budget")
+    assignment = model.assignment()
+    base_value = float(model.objective_value())
+    players = [i for i, _ in assignment]
+    formation = (num_defenders, num_midfielders, num_forwards)
+    limits = {"training_time": max_training_time, "cost": max_cost}
+
+    chunks = min(workers or SWEEP_WORKERS, len(players))
+    if chunks <= 1:
+        results = exclusion_results(model, roster, formation, assignment, players, limits, settings)
+    else:
+        results = {}
+        for chunk in run_in_pool(exclusion_results, [(model, roster, formation, assignment, players[k::chunks], limits,
+                                                      settings) for k in range(chunks)],
+                                 chunks if workers else None):
+            results.update(chunk)
+
+    names = roster.df['player_name'].to_numpy()
+    base_players = set(players)
+    rows = []
+    for player, role in assignment:
+        status, replacement, value, method = results[player]
+        row = {'player_name': names[player], 'assigned_role': role, 'status': status, 'method': method}
+        if replacement is not None:
+            loss = base_value - value
+            row.update(objective_value=value, loss=loss,
+                       loss_pct=100 * loss / abs(base_value) if base_value else 0.0,
+                       replaced_by=', '.join(sorted(names[i] for i, _ in replacement if i not in base_players)))
+        rows.append(row)
+
+    table = pd.DataFrame(rows, columns=IMPORTANCE_COLUMNS[1:])
+    table = table.sort_values('loss', ascending=False, na_position='first', kind='stable')
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    return table.reset_index(drop=True), time.perf_counter() - start
@@ -0,0 +1,137 @@
+"""Server-side storage for per-browser session state (optimized squad, team roster).
+
+Callbacks keep only a short random key in a dcc.Store; the objects themselves
+stay on the server, so chat requests no longer upload and download the whole
+roster as JSON. Entries live in a diskcache directory shared by background
+jobs and all web workers, or in an in-process LRU with the memory backend.
+"""
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    import diskcache
+except ImportError:  # memory backend only
+    diskcache = None
+
+from jobs import ForkSafeCache
+
+SESSION_BACKEND = os.getenv("TACTIQ_SESSION_BACKEND", "disk")  # "disk" or "memory"
+SESSION_DIR = os.getenv("TACTIQ_SESSION_DIR", os.path.join(".tactiq_cache", "sessions"))
+SESSION_CACHE_SIZE = int(os.getenv("TACTIQ_SESSION_CACHE_SIZE", 512))
+# Sessions idle for longer than this (seconds) are dropped
+SESSION_TTL = int(os.getenv("TACTIQ_SESSION_TTL", 4 * 3600))
+
+_MISSING = object()
+_KEY_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def new_session_key():
+    return uuid.uuid4().hex
+
+
+def is_session_key(key):
+    """True for keys new_session_key() could have made - browser-sent ids are checked before use"""
+    return isinstance(key, str) and _KEY_PATTERN.fullmatch(key) is not None
+
+
+class SessionStore:
+    """TTL-evicted session objects, in a disk cache or an in-process LRU.
+
+    Reads refresh an entry's expiry. Given a directory, every read and write
+    goes to the disk cache. It is the single source of truth, so a session
+    that another process rewrote is never served from a stale local copy.
+    Without one, an in-process LRU holds up to `maxsize` entries.
+    """
+
+    def __init__(self, maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL, directory=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._disk = ForkSafeCache(diskcache.Cache(directory)) if directory is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return "disk" if self._disk is not None else "memory"
+
+    def get(self, key, default=None):
+        if not key:
+            return default
+        if self._disk is not None:
+            value = self._disk.get(key, default=_MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._disk.touch(key, expire=self.ttl)
+            return value
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] <= now:
+                del self._items[key]
+                item = None
+        if item is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._remember(key, item[1], now)
+        return item[1]
+
+    def set(self, key, value):
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.ttl)
+        else:
+            self._remember(key, value, time.time())
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._disk) if self._disk is not None else len(self._items)
+            return {"backend": self.backend, "entries": entries, "maxsize": self.maxsize,
+                    "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+    def _remember(self, key, value, now):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = (now + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+def create_session_store():
+    """SessionStore for the configured backend, falling back to memory only.
+
+    The memory backend is only safe with a single web process and synchronous
+    callbacks (TACTIQ_BACKGROUND_JOBS=0), since background jobs run elsewhere.
+    """
+    directory = None
+    if SESSION_BACKEND == "disk":
+        if diskcache is None:
+            print("✗ diskcache not installed - keeping sessions in memory")
+        else:
+            directory = SESSION_DIR
+    try:
+        return SessionStore(directory=directory)
+    except OSError as e:
+        print(f"✗ Session directory unavailable ({e}) - keeping sessions in memory")
+        return SessionStore()
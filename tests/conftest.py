@@ -0,0 +1,6 @@
+"""Tests import the app modules and the benchmark helpers (synthetic rosters, fakes) directly."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
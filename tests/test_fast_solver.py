@@ -0,0 +1,43 @@
+"""The in-process assignment solver agrees with CBC on randomized rosters."""
+import random
+
+import pytest
+
+from synthetic import make_players
+from data_loader import TeamRoster
+from fast_solver import solve_assignment
+from optimizer import POSITION_MAP, SquadModel
+
+TRIALS = 100
+MAX_PLAYERS = 60
+
+
+def random_case(trial):
+    rng = random.Random(trial)
+    players = make_players(rng.randint(8, MAX_PLAYERS), seed=trial)
+    # Skew some rosters so infeasible and all-rounder-scarce cases are covered
+    if trial % 4 == 0:
+        players["final_position"] = [rng.choice(list(POSITION_MAP)) for _ in range(len(players))]
+    d = rng.randint(1, 6)
+    m = rng.randint(1, 9 - d)
+    return TeamRoster(1, players), (d, m, 10 - d - m)
+
+
+@pytest.mark.parametrize("trial", range(TRIALS))
+def test_matches_cbc(trial):
+    roster, formation = random_case(trial)
+    assignment, objective = solve_assignment(roster, *formation)
+    model = SquadModel(roster, *formation)
+    if model.solve() != "Optimal":
+        assert assignment is None
+    else:
+        assert assignment is not None
+        assert objective == pytest.approx(model.objective_value(), abs=1e-6)
+
+
+def test_assignment_fills_the_formation():
+    roster = TeamRoster(1, make_players(40, seed=1))
+    assignment, _ = solve_assignment(roster, 4, 4, 2)
+    roles = [role for _, role in assignment]
+    assert len({player for player, _ in assignment}) == len(assignment) == 11
+    assert [roles.count(role) for role in ("Goalkeeper", "Defender", "Mid", "Forward")] == [1, 4, 4, 2]
@@ -0,0 +1,101 @@
+"""AssistantClient's deadlines, retries, circuit breaker and concurrency limit against scripted backends."""
+import threading
+import time
+
+import pytest
+
+from assistant import FakeStreamingClient, StreamMetrics, stream_reply
+from llm_client import AssistantClient, AssistantUnavailable, DeadlineExceeded
+
+
+class FlakyBackend:
+    """Fails with `error` `failures` times, then streams normally"""
+
+    def __init__(self, failures, error=ConnectionError):
+        self.calls = 0
+        self.failures = failures
+        self.error = error
+        self.models = self
+        self._fake = FakeStreamingClient("All good.", first_token_delay=0.01, chunk_delay=0)
+
+    def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("backend unavailable")
+        yield from self._fake.models.generate_content_stream(model, contents, config)
+
+
+def answer(client):
+    return "".join(stream_reply(client, "User: hi\nAssistant:", metrics=StreamMetrics()))
+
+
+def test_transient_errors_are_retried():
+    backend = FlakyBackend(failures=2)
+    client = AssistantClient(backend=lambda: backend, retries=2, deadline=10)
+    assert answer(client) == "All good."
+    assert backend.calls == 3
+
+
+def test_client_errors_are_not_retried():
+    backend = FlakyBackend(failures=1, error=ValueError)
+    client = AssistantClient(backend=lambda: backend, retries=2, deadline=10)
+    with pytest.raises(ValueError):
+        answer(client)
+    assert backend.calls == 1
+
+
+def test_deadline_cuts_off_a_slow_reply():
+    slow = FakeStreamingClient("Too late.", first_token_delay=2.0)
+    client = AssistantClient(backend=lambda: slow, deadline=0.3, retries=0)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        answer(client)
+    assert time.perf_counter() - start < 0.6
+
+
+def test_breaker_opens_fails_fast_and_closes():
+    backend = FlakyBackend(failures=100)
+    client = AssistantClient(backend=lambda: backend, retries=0, breaker_threshold=3, breaker_cooldown=0.5)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            answer(client)
+    with pytest.raises(AssistantUnavailable):
+        answer(client)
+    assert backend.calls == 3
+
+    backend.failures = 0
+    time.sleep(0.6)
+    assert answer(client) == "All good."
+
+
+def test_concurrency_limit_is_shared_between_clients(tmp_path):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    class CountingBackend:
+        def __init__(self):
+            self.models = self
+
+        def generate_content_stream(self, model, contents, config=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            yield type("Chunk", (), {"text": "ok"})()
+
+    # Two clients sharing one state directory stand in for two worker processes
+    clients = [AssistantClient(backend=CountingBackend, max_concurrent=2, deadline=5, state_dir=str(tmp_path))
+               for _ in range(2)]
+    threads = [threading.Thread(target=answer, args=(clients[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= peak[0] <= 2
+
+
+def test_backend_name():
+    assert AssistantClient(backend="stub").backend_name == "stub"
+    assert AssistantClient(backend=FakeStreamingClient).backend_name == "custom"
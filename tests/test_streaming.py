@@ -0,0 +1,40 @@
+"""Streamed coach replies against the local fake client (no network)."""
+import pytest
+
+from assistant import FakeStreamingClient, StreamMetrics, stream_reply
+
+REPLY = ("Press high with the front three, keep the full-backs narrow and let the holding midfielder "
+         "screen the centre-backs when the ball is lost.")
+FIRST_TOKEN = 0.05
+
+
+class _BrokenModels:
+    def generate_content_stream(self, model, contents, config=None):
+        yield type("Chunk", (), {"text": "Press"})()
+        raise ConnectionError("stream dropped")
+
+
+def test_chunks_add_up_to_the_reply():
+    metrics = StreamMetrics()
+    client = FakeStreamingClient(REPLY, first_token_delay=FIRST_TOKEN, chunk_delay=0.005)
+    chunks = list(stream_reply(client, "User: How should we press?\nAssistant:", metrics=metrics))
+    assert "".join(chunks) == REPLY
+    assert len(chunks) > 1
+
+
+def test_first_token_recorded_before_the_reply_completes():
+    metrics = StreamMetrics()
+    client = FakeStreamingClient(REPLY, first_token_delay=FIRST_TOKEN, chunk_delay=0.005)
+    list(stream_reply(client, "User: How should we press?\nAssistant:", metrics=metrics))
+    summary = metrics.summary()
+    assert summary["replies"] == 1 and summary["errors"] == 0
+    assert FIRST_TOKEN <= summary["time_to_first_token"]["p50"] < summary["total_time"]["p50"]
+
+
+def test_failed_stream_is_raised_and_counted():
+    metrics = StreamMetrics()
+    broken = FakeStreamingClient()
+    broken.models = _BrokenModels()
+    with pytest.raises(ConnectionError):
+        list(stream_reply(broken, "User: hi\nAssistant:", metrics=metrics))
+    assert metrics.summary()["errors"] == 1